@@ -1,38 +1,30 @@
-import json
+import sys
 
-def check_connection_around_gap(path):
-    with open(path, "r") as f:
-        data = json.load(f)
-    
-    entries = data.get("entries", [])
-    gap_start_ms = 1766486414875 
-    gap_end_ms = gap_start_ms + 310120
-    
-    print(f"--- Around Gap Start ({gap_start_ms}) ---")
-    count = 0
-    for e in entries:
+from vakaroslive.session_index import SessionIndex
+
+def print_window(index, center_ms, span_ms=500, limit=10):
+    # Solo se leen los bloques del índice que tocan la ventana
+    for e in index.window(center_ms - span_ms, center_ms + span_ms, ["dashboard", "ble_rx"])[:limit]:
         ts = e.get("ts_ms", 0)
-        if gap_start_ms - 500 <= ts <= gap_start_ms + 500:
-            count += 1
-            if count > 10: continue
-            if e.get("kind") == "dashboard":
-                conn = e.get("state", {}).get("connected")
-                print(f"[{ts}] DASH: Connected={conn}")
-            elif e.get("kind") == "ble_rx":
-                print(f"[{ts}] RX: {e.get('chan')}")
+        if e.get("kind") == "dashboard":
+            conn = e.get("state", {}).get("connected")
+            print(f"[{ts}] DASH: Connected={conn}")
+        elif e.get("kind") == "ble_rx":
+            print(f"[{ts}] RX: {e.get('chan')}")
+
+def check_connection_around_gap(path, gap_start_ms=1766486414875, gap_len_ms=310120):
+    index = SessionIndex.load(path)
+    gap_end_ms = gap_start_ms + gap_len_ms
+
+    print(f"--- Around Gap Start ({gap_start_ms}) ---")
+    print_window(index, gap_start_ms)
 
     print(f"\n--- Around Gap End ({gap_end_ms}) ---")
-    count = 0
-    for e in entries:
-        ts = e.get("ts_ms", 0)
-        if gap_end_ms - 500 <= ts <= gap_end_ms + 500:
-            count += 1
-            if count > 10: continue
-            if e.get("kind") == "dashboard":
-                conn = e.get("state", {}).get("connected")
-                print(f"[{ts}] DASH: Connected={conn}")
-            elif e.get("kind") == "ble_rx":
-                print(f"[{ts}] RX: {e.get('chan')}")
+    print_window(index, gap_end_ms)
 
 if __name__ == "__main__":
-    check_connection_around_gap(r"c:\JAVIER\VAKAROSLIVE\vakaroslive_session_2025-12-23T10-39-05.775Z.json")
+    path = sys.argv[1] if len(sys.argv) > 1 else r"c:\JAVIER\VAKAROSLIVE\vakaroslive_session_2025-12-23T10-39-05.775Z.json"
+    if len(sys.argv) > 3:
+        check_connection_around_gap(path, int(sys.argv[2]), int(sys.argv[3]))
+    else:
+        check_connection_around_gap(path)
@@ -3,7 +3,7 @@ from __future__ import annotations
 import asyncio
 import logging
 import time
-from typing import Any
+from typing import Any, Callable
 
 import bleak
 from bleak import BleakClient, BleakScanner
@@ -13,6 +13,7 @@ from .protocol import (
     VAKAROS_CHAR_TELEMETRY_COMPACT,
     VAKAROS_CHAR_TELEMETRY_MAIN,
     VAKAROS_CHAR_COMMAND_1,
+    VAKAROS_CHAR_COMMAND_2,
     VAKAROS_SERVICE_UUID,
     parse_telemetry_compact,
     parse_telemetry_main,
@@ -24,15 +25,22 @@ class Atlas2BleManager:
         self,
         event_callback: callable,
         logger: logging.Logger | None = None,
+        bleak_client: Any = None,
+        bleak_scanner: Any = None,
     ) -> None:
         self._event_callback = event_callback
         self._logger = logger or logging.getLogger(__name__)
+        # Injection point: atlas2_mcp.fake_ble.FakeAtlas().client / .scanner for tests without hardware.
+        self._client_cls = bleak_client or BleakClient
+        self._scanner_cls = bleak_scanner or BleakScanner
         self._stop = asyncio.Event()
         self._disconnected = asyncio.Event()
         self._current_client: BleakClient | None = None
+        # Raw packet taps (chan, bytes, ts_ms), e.g. for command_sweep correlation
+        self.raw_listeners: list[Callable[[str, bytes, int], None]] = []
 
     async def scan(self, timeout: float = 5.0) -> list[dict[str, Any]]:
-        devices = await BleakScanner.discover(timeout=timeout)
+        devices = await self._scanner_cls.discover(timeout=timeout)
         results = []
         for d in devices:
             name = getattr(d, "name", None) or ""
@@ -68,7 +76,7 @@ class Atlas2BleManager:
             self._logger.info("Connecting to %s...", address)
             
             try:
-                async with BleakClient(address, disconnected_callback=self._on_disconnect) as client:
+                async with self._client_cls(address, disconnected_callback=self._on_disconnect) as client:
                     self._current_client = client
                     self._logger.info("Connected to %s", address)
                     
@@ -94,8 +102,15 @@ class Atlas2BleManager:
 
                     self._event_callback({"type": "status", "connected": True, "device_address": address})
 
+                    def tap(chan: str, data: bytearray) -> None:
+                        if self.raw_listeners:
+                            ts_ms = int(time.time() * 1000)
+                            for listener in list(self.raw_listeners):
+                                listener(chan, bytes(data), ts_ms)
+
                     def on_main(_: int, data: bytearray):
                         data_received_event.set()
+                        tap("main", data)
                         parsed = parse_telemetry_main(bytes(data))
                         if parsed:
                             self._event_callback({
@@ -116,6 +131,7 @@ class Atlas2BleManager:
 
                     def on_compact(_: int, data: bytearray):
                         data_received_event.set()
+                        tap("compact", data)
                         parsed = parse_telemetry_compact(bytes(data))
                         if parsed:
                             self._event_callback({
@@ -131,6 +147,11 @@ class Atlas2BleManager:
                         self._logger.info("Notifications started.")
                     except Exception as e:
                         self._logger.warning("Could not start notifications: %s", e)
+                    for uuid, chan in ((VAKAROS_CHAR_COMMAND_1, "cmd1"), (VAKAROS_CHAR_COMMAND_2, "cmd2")):
+                        try:
+                            await client.start_notify(uuid, lambda _, data, chan=chan: tap(chan, data))
+                        except Exception as e:
+                            self._logger.debug("Notify %s not available: %s", chan, e)
 
                     # Polling fallback loop (Windows compatibility)
                     async def poll_loop():
@@ -164,11 +185,13 @@ class Atlas2BleManager:
                 self._event_callback({"type": "status", "connected": False, "error": str(e)})
                 await asyncio.sleep(5.0)
 
-    async def write_command(self, payload: bytes, char_uuid: str = VAKAROS_CHAR_COMMAND_1) -> bool:
+    async def write_command(
+        self, payload: bytes, char_uuid: str = VAKAROS_CHAR_COMMAND_1, response: bool = True
+    ) -> bool:
         if not self._current_client or not self._current_client.is_connected:
             return False
         try:
-            await self._current_client.write_gatt_char(char_uuid, payload, response=True)
+            await self._current_client.write_gatt_char(char_uuid, payload, response=response)
             return True
         except Exception as e:
             if self._logger:
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from array import array
+import math
+from typing import Any
+
+from .state import AtlasState
+
+CAPTURE_FIELDS = ("heading_deg", "cog_deg", "sog_knots", "pitch_deg", "heel_deg")
+
+
+class TelemetryCapture:
+    """Records every telemetry event into preallocated columns.
+
+    Subscribed to the server's event stream, so each packet is captured exactly once
+    with its own `ts_ms` (no sampling loop). Columns are `array('d')` buffers sized for
+    `duration_s * expected_hz` and doubled if the device streams faster; missing
+    values are NaN.
+    """
+
+    def __init__(self, state: AtlasState, duration_s: float, expected_hz: float = 20.0) -> None:
+        self._state = state
+        capacity = max(64, int(duration_s * expected_hz * 1.5))
+        self._capacity = capacity
+        self._t0_ms: int | None = None
+        self.n = 0
+        self.t = array("d", bytes(8 * capacity))
+        self.columns: dict[str, array] = {
+            name: array("d", [math.nan]) * capacity for name in CAPTURE_FIELDS
+        }
+
+    def _grow(self) -> None:
+        self.t.extend(array("d", bytes(8 * self._capacity)))
+        for column in self.columns.values():
+            column.extend(array("d", [math.nan]) * self._capacity)
+        self._capacity *= 2
+
+    def on_event(self, event: dict[str, Any]) -> None:
+        """Call after the event was applied to the state."""
+        if event.get("type") not in ("telemetry_main", "telemetry_compact"):
+            return
+        ts_ms = event.get("ts_ms") or self._state.last_event_ts_ms
+        if ts_ms is None:
+            return
+        if self._t0_ms is None:
+            self._t0_ms = int(ts_ms)
+        if self.n >= self._capacity:
+            self._grow()
+        i = self.n
+        self.t[i] = (int(ts_ms) - self._t0_ms) / 1000.0
+        for name, column in self.columns.items():
+            value = getattr(self._state, name)
+            column[i] = float(value) if value is not None else math.nan
+        self.n = i + 1
+
+    def to_arrays(self) -> dict[str, array]:
+        """Trimmed copies of the captured columns (picklable, for the plot worker)."""
+        out = {"t": self.t[: self.n]}
+        for name, column in self.columns.items():
+            out[name] = column[: self.n]
+        return out
+
+
+def render_capture_plot(data: dict[str, array], plot_path: str) -> str:
+    """Renders the capture to `plot_path`. Runs in a worker process (module-level, picklable)."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    t = data["t"]
+    fig, axes = plt.subplots(4, 1, figsize=(10, 12), sharex=True)
+
+    axes[0].plot(t, data["heading_deg"], label="Heading", color="blue")
+    axes[0].plot(t, data["cog_deg"], label="COG", color="green", linestyle="--")
+    axes[0].set_ylabel("Degrees")
+    axes[0].legend()
+    axes[0].set_title("Heading vs COG")
+
+    axes[1].plot(t, data["sog_knots"], color="red")
+    axes[1].set_ylabel("Knots")
+    axes[1].set_title("SOG")
+
+    axes[2].plot(t, data["pitch_deg"], color="purple")
+    axes[2].set_ylabel("Degrees")
+    axes[2].set_title("Pitch")
+
+    axes[3].plot(t, data["heel_deg"], color="orange")
+    axes[3].set_ylabel("Degrees")
+    axes[3].set_xlabel("Time (s)")
+    axes[3].set_title("Heel")
+
+    plt.tight_layout()
+    plt.savefig(plot_path)
+    plt.close(fig)
+    return plot_path
@@ -0,0 +1,31 @@
+"""In-process fake Atlas 2 for tests without hardware.
+
+There is one implementation, shared with the bridge: `vakaroslive/fake_ble.py` at the
+repository root (same GATT UUIDs). It is re-exported here so `Atlas2BleManager` tests
+can use `atlas2_mcp.fake_ble.FakeAtlas` with only this directory on `PYTHONPATH`.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+
+try:
+    from vakaroslive.fake_ble import (
+        FakeAtlas,
+        FakeBleakClient,
+        FakeBleakError,
+        FakeBleakScanner,
+        FakeDevice,
+    )
+except ModuleNotFoundError:  # pragma: no cover - MCP launched from its own directory
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+    from vakaroslive.fake_ble import (
+        FakeAtlas,
+        FakeBleakClient,
+        FakeBleakError,
+        FakeBleakScanner,
+        FakeDevice,
+    )
+
+__all__ = ["FakeAtlas", "FakeBleakClient", "FakeBleakError", "FakeBleakScanner", "FakeDevice"]
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+logger = logging.getLogger("atlas2_mcp.notifier")
+
+
+class ResourceNotifier:
+    """Coalesces resource-updated notifications per URI, at most `max_hz` per URI.
+
+    `mark()` is cheap and synchronous: it only flags the URI as dirty. A single
+    long-lived task sends one notification per dirty URI once its interval has
+    elapsed, so a 10 Hz telemetry stream costs `max_hz` notifications per second
+    per resource instead of one task and two notifications per packet.
+    """
+
+    def __init__(self, send: Callable[[str], Awaitable[None]], max_hz: float = 2.0) -> None:
+        self._send = send
+        self.min_interval_s = 1.0 / max_hz if max_hz > 0 else 0.0
+        self._dirty: set[str] = set()
+        self._last_sent: dict[str, float] = {}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self.sent = 0
+        self.coalesced = 0
+
+    def mark(self, *uris: str) -> None:
+        for uri in uris:
+            if uri in self._dirty:
+                self.coalesced += 1
+            else:
+                self._dirty.add(uri)
+        self._wakeup.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._dirty:
+                now = loop.time()
+                due = [
+                    uri
+                    for uri in self._dirty
+                    if now - self._last_sent.get(uri, float("-inf")) >= self.min_interval_s
+                ]
+                if not due:
+                    next_due = min(
+                        self._last_sent[uri] + self.min_interval_s for uri in self._dirty
+                    )
+                    await asyncio.sleep(max(0.0, next_due - now))
+                    continue
+                for uri in due:
+                    self._dirty.discard(uri)
+                    self._last_sent[uri] = now
+                    try:
+                        await self._send(uri)
+                        self.sent += 1
+                    except Exception as e:
+                        # No session yet (e.g. script tests): drop it, the next update retries.
+                        logger.debug(f"Notification error: {e}")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import math
+import time
+from typing import Any, Callable
+
+from .protocol import extract_start_line_candidates, parse_telemetry_compact, parse_telemetry_main
+from .state import AtlasState
+
+# Browser recordings name channels differently from the MCP events
+_CHAN_ALIASES = {"main": "main", "compact": "compact", "command_1": "cmd1", "command_2": "cmd2"}
+
+
+def _decode(chan: str, raw: bytes, ts_ms: int) -> list[dict[str, Any]]:
+    events: list[dict[str, Any]] = []
+    if chan == "main":
+        parsed = parse_telemetry_main(raw)
+        if parsed:
+            events.append({"type": "telemetry_main", "ts_ms": ts_ms, **parsed.__dict__})
+    elif chan == "compact":
+        parsed = parse_telemetry_compact(raw)
+        if parsed:
+            events.append({"type": "telemetry_compact", "ts_ms": ts_ms, **parsed.__dict__})
+    candidates = extract_start_line_candidates(raw)
+    if candidates:
+        events.append({
+            "type": "atlas_start_line_candidates",
+            "ts_ms": ts_ms,
+            "source": f"replay_{chan}",
+            "candidates": candidates,
+        })
+    return events
+
+
+def load_session_events(path: str, raw_rate_hz: float = 10.0) -> list[dict[str, Any]]:
+    """Loads a recording as MCP events, sorted by `ts_ms`.
+
+    Supported inputs:
+    - Browser session JSON (`{"entries": [...]}`): raw `ble_rx` packets are decoded with
+      the MCP parsers; if the file has none, `ble_parsed` entries are used as-is.
+    - Raw capture log (`MAIN: <hex>` per line, as written by the bridge): it has no
+      timestamps, so packets are spaced at `raw_rate_hz`.
+    """
+    events: list[dict[str, Any]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        head = f.read(1)
+        f.seek(0)
+        if head in ("{", "["):
+            data = json.load(f)
+            entries = data.get("entries", []) if isinstance(data, dict) else data
+            parsed_fallback: list[dict[str, Any]] = []
+            for e in entries:
+                kind = e.get("kind")
+                chan = _CHAN_ALIASES.get(e.get("chan"))
+                if kind == "ble_rx" and chan and e.get("raw_b64"):
+                    events.extend(_decode(chan, base64.b64decode(e["raw_b64"]), int(e["ts_ms"])))
+                elif kind == "ble_parsed" and chan in ("main", "compact") and e.get("parsed"):
+                    parsed = dict(e["parsed"])
+                    parsed.setdefault("ts_ms", e.get("ts_ms"))
+                    parsed_fallback.append({"type": f"telemetry_{chan}", **parsed})
+            if not events:
+                events = parsed_fallback
+        else:
+            step_ms = 1000.0 / raw_rate_hz if raw_rate_hz > 0 else 100.0
+            t0 = int(time.time() * 1000)
+            n = 0
+            for line in f:
+                tag, _, hex_payload = line.partition(":")
+                chan = tag.strip().lower()
+                if chan not in ("main", "compact", "cmd1", "cmd2") or not hex_payload.strip():
+                    continue
+                try:
+                    raw = bytes.fromhex(hex_payload.strip())
+                except ValueError:
+                    continue
+                events.extend(_decode(chan, raw, t0 + int(n * step_ms)))
+                n += 1
+    events.sort(key=lambda ev: ev.get("ts_ms") or 0)
+    return events
+
+
+async def replay_events(
+    events: list[dict[str, Any]],
+    state: AtlasState,
+    speed: float = 0.0,
+    on_event: Callable[[dict[str, Any]], None] | None = None,
+) -> None:
+    """Applies `events` to `state`; `speed` is x real time, `0` means unlimited.
+
+    Unlimited replay still yields to the loop every few hundred events so the MCP
+    server keeps serving requests and BLE callbacks.
+    """
+    if not events:
+        return
+    t0_ms = events[0].get("ts_ms") or 0
+    start = time.perf_counter()
+    for i, event in enumerate(events):
+        if speed > 0:
+            due = ((event.get("ts_ms") or t0_ms) - t0_ms) / 1000.0 / speed
+            delay = due - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        elif i % 500 == 0:
+            await asyncio.sleep(0)
+        state.apply_event(event)
+        if on_event is not None:
+            on_event(event)
+
+
+class ReplayRecorder:
+    """Summary metrics (and an optional decimated series) of a replay, one row per fix."""
+
+    def __init__(self, state: AtlasState) -> None:
+        self._state = state
+        self.rows: list[tuple[int, float | None, float | None, float | None, float | None]] = []
+        self.start_line_events = 0
+
+    def on_event(self, event: dict[str, Any]) -> None:
+        etype = event.get("type")
+        if etype == "atlas_start_line_candidates":
+            self.start_line_events += 1
+        elif etype == "telemetry_main":
+            s = self._state
+            self.rows.append((int(event.get("ts_ms") or 0), s.heading_deg, s.cog_deg, s.cog_test_deg, s.sog_knots))
+
+    def summary(self, wall_s: float, series_points: int = 0) -> dict[str, Any]:
+        rows = self.rows
+        out: dict[str, Any] = {"fixes": len(rows), "start_line_events": self.start_line_events, "wall_s": round(wall_s, 3)}
+        if not rows:
+            return out
+        duration_s = (rows[-1][0] - rows[0][0]) / 1000.0
+        sogs = [r[4] for r in rows if r[4] is not None]
+        # Fused COG vs the device's own COG field: the number to minimise when tuning fusion
+        errs = [
+            abs(((r[2] - r[3] + 540.0) % 360.0) - 180.0)
+            for r in rows
+            if r[2] is not None and r[3] is not None
+        ]
+        out.update({
+            "session_s": round(duration_s, 1),
+            "speedup": round(duration_s / wall_s, 1) if wall_s > 0 else None,
+            "sog_mean_kn": round(sum(sogs) / len(sogs), 3) if sogs else None,
+            "sog_max_kn": round(max(sogs), 3) if sogs else None,
+            "cog_vs_native_mae_deg": round(sum(errs) / len(errs), 3) if errs else None,
+            "cog_vs_native_p95_deg": round(sorted(errs)[int(0.95 * (len(errs) - 1))], 3) if errs else None,
+            "final_state": {
+                "latitude": self._state.latitude,
+                "longitude": self._state.longitude,
+                "heading_deg": self._state.heading_deg,
+                "cog_deg": self._state.cog_deg,
+                "sog_knots": self._state.sog_knots,
+            },
+        })
+        if series_points > 0:
+            step = max(1, math.ceil(len(rows) / series_points))
+            t0 = rows[0][0]
+            out["series"] = {
+                "columns": ["t_s", "heading_deg", "cog_deg", "cog_test_deg", "sog_knots"],
+                "rows": [
+                    [round((r[0] - t0) / 1000.0, 2), *(None if v is None else round(v, 2) for v in r[1:])]
+                    for r in rows[::step]
+                ],
+            }
+        return out
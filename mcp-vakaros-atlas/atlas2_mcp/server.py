@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 import asyncio
+from concurrent.futures import ProcessPoolExecutor
 import logging
+import os
 import sys
-from typing import Any
+import time
+from typing import Any, Callable
 
 from mcp.server.models import InitializationOptions
 from mcp.server import NotificationOptions, Server
@@ -11,7 +14,12 @@ from mcp.server.stdio import stdio_server
 import mcp.types as types
 
 from .state import AtlasState
+from .sweep import CommandSweep, expand_payloads, format_sweep_table
 from .ble_manager import Atlas2BleManager
+from .capture import TelemetryCapture, render_capture_plot
+from .notifier import ResourceNotifier
+from .replay import ReplayRecorder, load_session_events, replay_events
+from .window import DEFAULT_STATS, WINDOW_FIELDS, RollingTelemetryBuffer
 
 # Configure logging - MUST go to stderr for MCP
 logging.basicConfig(
@@ -21,32 +29,46 @@ logging.basicConfig(
 )
 logger = logging.getLogger("atlas2_mcp")
 
+TELEMETRY_URIS = ("atlas://telemetry/current", "atlas://state/current")
+
 class Atlas2MCPServer:
-    def __init__(self):
+    def __init__(self, notify_max_hz: float = 2.0):
         self.state = AtlasState()
-        # Wrapper to handle async events from the BLE manager in a thread-safe way
-        def event_wrapper(event):
-            asyncio.create_task(self.handle_event(event))
-        self.ble = Atlas2BleManager(event_callback=event_wrapper, logger=logger)
+        # Resource updates are coalesced per URI and rate-limited (see ResourceNotifier)
+        self.notifier = ResourceNotifier(self._send_resource_updated, max_hz=notify_max_hz)
+        self.ble = Atlas2BleManager(event_callback=self.handle_event, logger=logger)
         self.server = Server("atlas2-mcp")
+        # Always-on columnar history for query_window
+        self.window = RollingTelemetryBuffer(self.state)
+        self._listeners: list[Callable[[dict[str, Any]], None]] = [self.window.on_event]
+        self._pool: ProcessPoolExecutor | None = None
         self._setup_handlers()
 
-    async def handle_event(self, event: dict[str, Any]):
+    def _plot_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=1)
+        return self._pool
+
+    def close(self) -> None:
+        """Shuts down the plot worker process, if one was started."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def handle_event(self, event: dict[str, Any]) -> None:
+        # Runs synchronously on the loop thread (bleak callbacks): no task per packet
         self.state.apply_event(event)
-        # Notify clients that telemetry has updated
+        for listener in self._listeners:
+            listener(event)
         if event.get("type") in ("telemetry_main", "telemetry_compact"):
-            try:
-                # notification_context is only available after session starts
-                if hasattr(self.server, "notification_context") and self.server.notification_context:
-                    await self.server.notification_context.session.send_resource_updated_notification(
-                        uri="atlas://telemetry/current"
-                    )
-                    await self.server.notification_context.session.send_resource_updated_notification(
-                        uri="atlas://state/current"
-                    )
-            except Exception as e:
-                # Log but dont crash if no session is active (e.g. during script tests)
-                logger.debug(f"Notification error: {e}")
+            self.notifier.mark(*TELEMETRY_URIS)
+
+    async def _send_resource_updated(self, uri: str) -> None:
+        # notification_context is only available after session starts
+        if hasattr(self.server, "notification_context") and self.server.notification_context:
+            await self.server.notification_context.session.send_resource_updated_notification(
+                uri=uri
+            )
 
     def _setup_handlers(self):
         @self.server.list_resources()
@@ -68,12 +90,11 @@ class Atlas2MCPServer:
 
         @self.server.read_resource()
         async def handle_read_resource(uri: str) -> str:
-            import json
             if uri == "atlas://state/current":
-                return json.dumps(self.state.to_dict(), indent=2)
+                return self.state.to_json()
             elif uri == "atlas://telemetry/current":
                 # "No cribas" - return everything in the telemetry resource too
-                return json.dumps(self.state.to_dict(), indent=2)
+                return self.state.to_json()
             raise ValueError(f"Unknown resource: {uri}")
 
         @self.server.list_tools()
@@ -103,7 +124,12 @@ class Atlas2MCPServer:
                 types.Tool(
                     name="get_telemetry",
                     description="Get the latest telemetry from the connected device",
-                    inputSchema={"type": "object", "properties": {}},
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "compact": {"type": "boolean", "default": False, "description": "Non-indented JSON"}
+                        }
+                    },
                 ),
                 types.Tool(
                     name="disconnect_device",
@@ -122,6 +148,33 @@ class Atlas2MCPServer:
                         "required": ["payload_hex"]
                     },
                 ),
+                types.Tool(
+                    name="command_sweep",
+                    description=(
+                        "Write a range of payloads (template with {v}) with pacing, capture cmd1/cmd2/"
+                        "telemetry notifications after each write and return which payloads changed which bytes"
+                    ),
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "payload_template": {"type": "string", "description": "Hex with {v}, e.g. '01{v}'"},
+                            "start": {"type": "integer", "default": 0},
+                            "stop": {"type": "integer", "default": 255},
+                            "step": {"type": "integer", "default": 1},
+                            "value_bytes": {"type": "integer", "default": 1},
+                            "char_uuid": {"type": "string", "description": "Optional characteristic UUID (default Command 1)"},
+                            "interval_ms": {"type": "number", "default": 300},
+                            "window_ms": {"type": "number", "default": 250, "description": "Correlation window after each write"},
+                            "quiet_ms": {
+                                "type": "number",
+                                "default": 3000,
+                                "description": "Listening time before the sweep to learn bytes that change on their own",
+                            },
+                            "response": {"type": "boolean", "default": True},
+                        },
+                        "required": ["payload_template"]
+                    },
+                ),
                 types.Tool(
                     name="reboot_device",
                     description="Attempt to reboot the Atlas 2 device",
@@ -132,9 +185,45 @@ class Atlas2MCPServer:
                     description="Force the Atlas 2 to start streaming telemetry (Push)",
                     inputSchema={"type": "object", "properties": {}},
                 ),
+                types.Tool(
+                    name="query_window",
+                    description=(
+                        "Aggregate recent telemetry over a time window (last `seconds`, or "
+                        "start_ts_ms/end_ts_ms). Linear fields: mean/min/max/std/pNN; "
+                        "angles (heading_deg, cog_deg): circular mean, variance and std"
+                    ),
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "seconds": {"type": "number", "description": "Window length ending at the latest sample"},
+                            "start_ts_ms": {"type": "integer"},
+                            "end_ts_ms": {"type": "integer"},
+                            "fields": {"type": "array", "items": {"type": "string", "enum": list(WINDOW_FIELDS)}},
+                            "stats": {"type": "array", "items": {"type": "string"}, "default": list(DEFAULT_STATS)},
+                        }
+                    },
+                ),
+                types.Tool(
+                    name="replay_session",
+                    description=(
+                        "Replay a recorded session (browser session JSON or raw packet log) through "
+                        "a fresh AtlasState, faster than real time, and return fusion/summary metrics. "
+                        "Does not touch the live state"
+                    ),
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "path": {"type": "string"},
+                            "speed": {"type": "number", "default": 0, "description": "x real time; 0 = unlimited"},
+                            "series_points": {"type": "integer", "default": 0, "description": "Decimated time series length (0 = none)"},
+                            "raw_rate_hz": {"type": "number", "default": 10.0, "description": "Packet rate assumed for logs without timestamps"},
+                        },
+                        "required": ["path"]
+                    },
+                ),
                 types.Tool(
                     name="capture_and_plot",
-                    description="Capture 15 seconds of telemetry at 10Hz and generate temporal graphs",
+                    description="Capture every telemetry packet for `duration` seconds (default 15) and generate temporal graphs",
                     inputSchema={
                         "type": "object",
                         "properties": {
@@ -160,8 +249,8 @@ class Atlas2MCPServer:
                     return [types.TextContent(type="text", text=f"Connection attempt started for {address}")]
                 
                 elif name == "get_telemetry":
-                    import json
-                    return [types.TextContent(type="text", text=json.dumps(self.state.to_dict(), indent=2))]
+                    compact = bool(arguments.get("compact", False)) if arguments else False
+                    return [types.TextContent(type="text", text=self.state.to_json(compact=compact))]
 
                 elif name == "disconnect_device":
                     await self.ble.stop()
@@ -177,6 +266,26 @@ class Atlas2MCPServer:
                     success = await self.ble.write_command(payload, char_uuid)
                     return [types.TextContent(type="text", text=f"Command sent: {success}")]
 
+                elif name == "command_sweep":
+                    args = arguments or {}
+                    payloads = expand_payloads(
+                        args["payload_template"],
+                        args.get("start", 0),
+                        args.get("stop", 255),
+                        args.get("step", 1),
+                        args.get("value_bytes", 1),
+                    )
+                    sweep = CommandSweep(
+                        self.ble,
+                        args.get("char_uuid", "ac510002-0000-5a11-0076-616b61726f73"), # Command 1
+                        interval_s=float(args.get("interval_ms", 300)) / 1000.0,
+                        window_s=float(args.get("window_ms", 250)) / 1000.0,
+                        response=bool(args.get("response", True)),
+                        quiet_s=float(args.get("quiet_ms", 3000)) / 1000.0,
+                    )
+                    result = await sweep.run(payloads)
+                    return [types.TextContent(type="text", text=format_sweep_table(result))]
+
                 elif name == "reboot_device":
                     # Rebooting seems complex, but let's try a known Vakaros reboot byte 0xDE
                     payload = bytes([0xDE]) 
@@ -188,53 +297,54 @@ class Atlas2MCPServer:
                     success = await self.ble.write_command(payload)
                     return [types.TextContent(type="text", text=f"Streaming trigger sent (0x01): {success}")]
 
+                elif name == "query_window":
+                    import json
+                    args = arguments or {}
+                    result = self.window.query(
+                        fields=args.get("fields"),
+                        seconds=args.get("seconds"),
+                        start_ts_ms=args.get("start_ts_ms"),
+                        end_ts_ms=args.get("end_ts_ms"),
+                        stats=args.get("stats"),
+                    )
+                    return [types.TextContent(type="text", text=json.dumps(result))]
+
+                elif name == "replay_session":
+                    import json
+                    args = arguments or {}
+                    events = await asyncio.to_thread(
+                        load_session_events, args["path"], float(args.get("raw_rate_hz", 10.0))
+                    )
+                    replay_state = AtlasState()
+                    recorder = ReplayRecorder(replay_state)
+                    t0 = time.perf_counter()
+                    await replay_events(
+                        events, replay_state, float(args.get("speed", 0) or 0), recorder.on_event
+                    )
+                    result = recorder.summary(
+                        time.perf_counter() - t0, int(args.get("series_points", 0) or 0)
+                    )
+                    result["events"] = len(events)
+                    return [types.TextContent(type="text", text=json.dumps(result))]
+
                 elif name == "capture_and_plot":
                     duration = arguments.get("duration", 15.0) if arguments else 15.0
-                    samples = []
-                    start_time = asyncio.get_event_loop().time()
-                    
-                    # Capture loop
-                    while (asyncio.get_event_loop().time() - start_time) < duration:
-                        samples.append({
-                            "t": asyncio.get_event_loop().time() - start_time,
-                            **self.state.to_dict()
-                        })
-                        await asyncio.sleep(0.1) # 10Hz sample rate
-                    
-                    # Generate Plot
-                    import pandas as pd
-                    import matplotlib.pyplot as plt
-                    import os
-                    
-                    df = pd.DataFrame(samples)
-                    fig, axes = plt.subplots(4, 1, figsize=(10, 12), sharex=True)
-                    
-                    axes[0].plot(df["t"], df["heading_deg"], label="Heading", color="blue")
-                    axes[0].plot(df["t"], df["cog_deg"], label="COG", color="green", linestyle="--")
-                    axes[0].set_ylabel("Degrees")
-                    axes[0].legend()
-                    axes[0].set_title("Heading vs COG")
-                    
-                    axes[1].plot(df["t"], df["sog_knots"], color="red")
-                    axes[1].set_ylabel("Knots")
-                    axes[1].set_title("SOG")
-                    
-                    axes[2].plot(df["t"], df["pitch_deg"], color="purple")
-                    axes[2].set_ylabel("Degrees")
-                    axes[2].set_title("Pitch")
-                    
-                    axes[3].plot(df["t"], df["heel_deg"], color="orange")
-                    axes[3].set_ylabel("Degrees")
-                    axes[3].set_xlabel("Time (s)")
-                    axes[3].set_title("Heel")
-                    
-                    plt.tight_layout()
-                    plot_filename = "telemetry_capture.png"
-                    plt.savefig(plot_filename)
-                    plt.close(fig)
-                    
-                    abs_path = os.path.abspath(plot_filename)
-                    return [types.TextContent(type="text", text=f"Captured {len(samples)} samples. Plot saved to: {abs_path}")]
+                    capture = TelemetryCapture(self.state, duration)
+                    self._listeners.append(capture.on_event)
+                    try:
+                        await asyncio.sleep(duration)
+                    finally:
+                        self._listeners.remove(capture.on_event)
+
+                    if not capture.n:
+                        return [types.TextContent(type="text", text=f"No samples captured in {duration:.1f} s; no plot written.")]
+                    # Render in a worker process so BLE handling keeps running meanwhile
+                    abs_path = os.path.abspath("telemetry_capture.png")
+                    await asyncio.get_running_loop().run_in_executor(
+                        self._plot_pool(), render_capture_plot, capture.to_arrays(), abs_path
+                    )
+                    rate = capture.n / duration if duration > 0 else 0.0
+                    return [types.TextContent(type="text", text=f"Captured {capture.n} samples ({rate:.1f} Hz). Plot saved to: {abs_path}")]
 
                 raise ValueError(f"Unknown tool: {name}")
             except Exception as e:
@@ -256,8 +366,11 @@ class Atlas2MCPServer:
             )
 
 async def main():
-    server = Atlas2MCPServer()
-    await server.run()
+    server = Atlas2MCPServer(notify_max_hz=float(os.environ.get("ATLAS2_MCP_NOTIFY_HZ", "2.0")))
+    try:
+        await server.run()
+    finally:
+        server.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import json
 import math
 import time
+from collections import deque
 from dataclasses import dataclass, field
 from typing import Any
 
@@ -78,8 +80,12 @@ class AtlasState:
     v_mps: float | None = None      # field_6
     cog_test_deg: float | None = None # Native COG field
     
-    # Unfiltered Message Buffer (Last 5 messages raw)
-    raw_history: list[dict[str, Any]] = field(default_factory=list)
+    # Unfiltered Message Buffer (last 20 kept, last 5 serialized)
+    raw_history: deque[dict[str, Any]] = field(default_factory=lambda: deque(maxlen=20))
+
+    # Bumped by apply_event; JSON snapshots are cached per version
+    version: int = 0
+    _json_cache: dict[bool, tuple[int, str]] = field(default_factory=dict, repr=False)
     
     _fix_history: list[tuple[int, float, float]] = field(default_factory=list)
     _last_hdg_deg: float | None = field(default=None)
@@ -100,9 +106,22 @@ class AtlasState:
             "cog_test_deg": self.cog_test_deg, # Added
             "v_mps": self.v_mps,
             "marks": self.marks.to_dict(),
-            "raw_history": self.raw_history[-5:] # Show last 5 unfiltered messages
+            "raw_history": list(self.raw_history)[-5:], # Show last 5 unfiltered messages
+            "version": self.version,
         }
 
+    def to_json(self, compact: bool = False) -> str:
+        """Serialized `to_dict()`, re-encoded only when `version` changed."""
+        cached = self._json_cache.get(compact)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        if compact:
+            text = json.dumps(self.to_dict(), separators=(",", ":"))
+        else:
+            text = json.dumps(self.to_dict(), indent=2)
+        self._json_cache[compact] = (self.version, text)
+        return text
+
     @staticmethod
     def _wrap_deg(v: float) -> float:
         res = v % 360.0
@@ -148,10 +167,9 @@ class AtlasState:
         return False
 
     def apply_event(self, event: dict[str, Any]) -> None:
-        # Keep unfiltered history
+        self.version += 1
+        # Keep unfiltered history (bounded deque, serialized only on read)
         self.raw_history.append(event)
-        if len(self.raw_history) > 20:
-            self.raw_history.pop(0)
 
         etype = event.get("type")
         ts_ms = event.get("ts_ms") or int(time.time() * 1000)
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any
+
+from .ble_manager import Atlas2BleManager
+
+SWEEP_CHANNELS = ("cmd1", "cmd2", "main", "compact")
+# Channels that stream on their own: they are only diffed against a value seen before the write
+TELEMETRY_CHANNELS = ("main", "compact")
+MAX_SWEEP_WRITES = 1024
+# Long enough for two 1 Hz compact packets (GPS position/heading bytes move that slowly)
+DEFAULT_QUIET_S = 3.0
+
+
+def expand_payloads(
+    template_hex: str, start: int, stop: int, step: int = 1, value_bytes: int = 1
+) -> list[bytes]:
+    """`template_hex` with `{v}` replaced by each value in `range(start, stop + 1, step)`.
+
+    The value is little-endian over `value_bytes` bytes, e.g. `"01{v}00"` with
+    `start=0, stop=2` gives `010000`, `010100`, `010200`.
+    """
+    if "{v}" not in template_hex:
+        raise ValueError("payload_template must contain {v}")
+    values = range(int(start), int(stop) + 1, max(1, int(step)))
+    if len(values) > MAX_SWEEP_WRITES:
+        raise ValueError(f"Sweep too large ({len(values)} writes, max {MAX_SWEEP_WRITES})")
+    out = []
+    for v in values:
+        v_hex = int(v).to_bytes(value_bytes, "little").hex()
+        out.append(bytes.fromhex(template_hex.replace("{v}", v_hex).replace(" ", "")))
+    return out
+
+
+def _diff_indices(a: bytes | None, b: bytes) -> list[int]:
+    if a is None:
+        return list(range(len(b)))
+    n = max(len(a), len(b))
+    return [i for i in range(n) if i >= len(a) or i >= len(b) or a[i] != b[i]]
+
+
+class CommandSweep:
+    """Paced writes with per-write notification capture.
+
+    Raw notifications are tapped from `Atlas2BleManager.raw_listeners`. Before the
+    sweep, a quiet window of `quiet_s` measures which bytes change on their own (GPS
+    position, heading...) so they are masked out; it must span at least two packets of
+    the slowest stream (compact, 1 Hz). After each write, packets received within
+    `window_s` are compared against the last value seen before the write.
+
+    Telemetry channels are only diffed once they have a baseline: the first packet of a
+    channel never seen before becomes its baseline instead of flagging every byte.
+    A cmd1/cmd2 packet with no baseline is the response itself and is reported as `new`.
+    """
+
+    def __init__(
+        self,
+        ble: Atlas2BleManager,
+        char_uuid: str,
+        interval_s: float = 0.3,
+        window_s: float = 0.25,
+        response: bool = True,
+        quiet_s: float = DEFAULT_QUIET_S,
+    ) -> None:
+        self._ble = ble
+        self._char_uuid = char_uuid
+        self.interval_s = max(0.0, float(interval_s))
+        self.window_s = max(0.0, float(window_s))
+        self.quiet_s = max(self.window_s, float(quiet_s))
+        self._response = response
+        self._last: dict[str, bytes] = {}
+        self._captured: list[tuple[str, bytes]] | None = None
+        self.noise: dict[str, set[int]] = {chan: set() for chan in SWEEP_CHANNELS}
+
+    def _on_raw(self, chan: str, data: bytes, ts_ms: int) -> None:
+        if self._captured is not None:
+            self._captured.append((chan, data))
+        else:
+            self._last[chan] = data
+
+    async def _capture(self, seconds: float, payload: bytes | None = None) -> tuple[bool, list[tuple[str, bytes]]]:
+        # Capture starts before the write: a response can arrive before the write returns
+        captured: list[tuple[str, bytes]] = []
+        self._captured = captured
+        try:
+            ok = True
+            if payload is not None:
+                ok = await self._ble.write_command(payload, self._char_uuid, response=self._response)
+            await asyncio.sleep(seconds)
+            return ok, captured
+        finally:
+            self._captured = None
+
+    def _changes(self, baseline: dict[str, bytes], packets: list[tuple[str, bytes]]) -> dict[str, Any]:
+        changes: dict[str, Any] = {}
+        baseline = dict(baseline)
+        for chan, data in packets:
+            before = baseline.get(chan)
+            if before is None and chan in TELEMETRY_CHANNELS:
+                baseline[chan] = data
+                continue
+            idx = [i for i in _diff_indices(before, data) if i not in self.noise[chan]]
+            entry = changes.setdefault(chan, {"n": 0, "bytes": set(), "hex": data.hex()})
+            if before is None:
+                entry["new"] = True
+            entry["n"] += 1
+            entry["bytes"].update(idx)
+            if idx:
+                entry["hex"] = data.hex()
+        for entry in changes.values():
+            entry["bytes"] = sorted(entry["bytes"])
+        return {chan: e for chan, e in changes.items() if e["bytes"] or chan.startswith("cmd")}
+
+    async def run(self, payloads: list[bytes]) -> dict[str, Any]:
+        self._ble.raw_listeners.append(self._on_raw)
+        try:
+            # Quiet window: bytes that move without any write are noise for this sweep
+            baseline = dict(self._last)
+            _, quiet = await self._capture(self.quiet_s)
+            seen = {chan: 0 for chan in SWEEP_CHANNELS}
+            for chan, data in quiet:
+                seen[chan] = seen.get(chan, 0) + 1
+                if chan in baseline:
+                    self.noise[chan].update(_diff_indices(baseline[chan], data))
+                baseline[chan] = data
+            self._last.update(baseline)
+            # Streams with < 2 packets in the quiet window have no noise estimate
+            unmasked = [chan for chan in TELEMETRY_CHANNELS if seen.get(chan, 0) < 2]
+
+            rows: list[dict[str, Any]] = []
+            t0 = time.perf_counter()
+            for i, payload in enumerate(payloads):
+                baseline = dict(self._last)
+                ok, packets = await self._capture(self.window_s, payload)
+                for chan, data in packets:
+                    self._last[chan] = data
+                row: dict[str, Any] = {"payload": payload.hex(), "ok": ok}
+                changes = self._changes(baseline, packets)
+                if changes:
+                    row["changes"] = changes
+                rows.append(row)
+                # Pacing from write start, so the window counts towards the interval
+                due = t0 + (i + 1) * max(self.interval_s, self.window_s)
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            return {
+                "writes": len(rows),
+                "quiet_s": self.quiet_s,
+                "noise_bytes": {chan: sorted(idx) for chan, idx in self.noise.items() if idx},
+                "unmasked": unmasked,
+                "rows": rows,
+            }
+        finally:
+            self._ble.raw_listeners.remove(self._on_raw)
+
+
+def format_sweep_table(result: dict[str, Any]) -> str:
+    """Compact text table: one line per payload, only channels that reacted."""
+    lines = [f"writes={result['writes']} quiet_s={result['quiet_s']} noise={result['noise_bytes']}"]
+    if result.get("unmasked"):
+        lines.append(f"warning: no noise estimate for {result['unmasked']} (too few packets in the quiet window)")
+    for row in result["rows"]:
+        parts = []
+        for chan, change in row.get("changes", {}).items():
+            new = " new" if change.get("new") else ""
+            parts.append(f"{chan}[n={change['n']}{new} bytes={change['bytes']} {change['hex']}]")
+        status = "ok" if row["ok"] else "FAIL"
+        lines.append(f"{row['payload']} {status} " + (" ".join(parts) if parts else "-"))
+    return "\n".join(lines)
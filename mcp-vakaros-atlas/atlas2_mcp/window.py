@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+from .state import AtlasState
+
+LINEAR_FIELDS = ("sog_knots", "pitch_deg", "heel_deg", "v_mps", "latitude", "longitude")
+ANGLE_FIELDS = ("heading_deg", "cog_deg")
+WINDOW_FIELDS = ANGLE_FIELDS + LINEAR_FIELDS
+
+DEFAULT_STATS = ("mean", "min", "max", "p50", "p90")
+
+
+class RollingTelemetryBuffer:
+    """Columnar ring buffer of post-fusion telemetry, one row per telemetry event.
+
+    Each column is a preallocated NumPy array; `on_event` writes one row in place and
+    `query` slices a time window with `searchsorted` and aggregates it vectorized.
+    At 20 Hz the default capacity covers ~30 minutes in under 4 MB.
+    """
+
+    def __init__(self, state: AtlasState, capacity: int = 36_000) -> None:
+        self._state = state
+        self.capacity = int(capacity)
+        self.ts_ms = np.zeros(self.capacity, dtype=np.int64)
+        self.columns: dict[str, np.ndarray] = {
+            name: np.full(self.capacity, np.nan, dtype=np.float64) for name in WINDOW_FIELDS
+        }
+        self._head = 0  # next write position
+        self.size = 0
+
+    def on_event(self, event: dict[str, Any]) -> None:
+        """Call after the event was applied to the state."""
+        if event.get("type") not in ("telemetry_main", "telemetry_compact"):
+            return
+        ts_ms = event.get("ts_ms") or self._state.last_event_ts_ms
+        if ts_ms is None:
+            return
+        i = self._head
+        self.ts_ms[i] = int(ts_ms)
+        for name, column in self.columns.items():
+            value = getattr(self._state, name)
+            column[i] = np.nan if value is None else float(value)
+        self._head = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def _ordered(self, values: np.ndarray) -> np.ndarray:
+        if self.size < self.capacity:
+            return values[: self.size]
+        return np.concatenate((values[self._head :], values[: self._head]))
+
+    def window(
+        self, start_ts_ms: int | None = None, end_ts_ms: int | None = None
+    ) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        ts = self._ordered(self.ts_ms)
+        lo = 0 if start_ts_ms is None else int(np.searchsorted(ts, start_ts_ms, side="left"))
+        hi = len(ts) if end_ts_ms is None else int(np.searchsorted(ts, end_ts_ms, side="right"))
+        cols = {name: self._ordered(col)[lo:hi] for name, col in self.columns.items()}
+        return ts[lo:hi], cols
+
+    def query(
+        self,
+        fields: list[str] | None = None,
+        seconds: float | None = None,
+        start_ts_ms: int | None = None,
+        end_ts_ms: int | None = None,
+        stats: list[str] | None = None,
+    ) -> dict[str, Any]:
+        if self.size == 0:
+            return {"samples": 0, "fields": {}}
+        if seconds is not None and start_ts_ms is None:
+            ref = end_ts_ms if end_ts_ms is not None else int(self._ordered(self.ts_ms)[-1])
+            start_ts_ms = ref - int(float(seconds) * 1000)
+        ts, cols = self.window(start_ts_ms, end_ts_ms)
+        wanted = [f for f in (fields or WINDOW_FIELDS) if f in self.columns]
+        stats = list(stats or DEFAULT_STATS)
+        out: dict[str, Any] = {
+            "samples": int(len(ts)),
+            "start_ts_ms": int(ts[0]) if len(ts) else None,
+            "end_ts_ms": int(ts[-1]) if len(ts) else None,
+            "fields": {},
+        }
+        for name in wanted:
+            values = cols[name]
+            values = values[~np.isnan(values)]
+            if name in ANGLE_FIELDS:
+                out["fields"][name] = _angle_stats(values)
+            else:
+                out["fields"][name] = _linear_stats(values, stats)
+        return out
+
+
+def _round(value: float) -> float | None:
+    return None if not np.isfinite(value) else round(float(value), 4)
+
+
+def _linear_stats(values: np.ndarray, stats: list[str]) -> dict[str, Any]:
+    result: dict[str, Any] = {"n": int(values.size)}
+    if values.size == 0:
+        return result
+    percentiles = [s for s in stats if s.startswith("p") and s[1:].isdigit()]
+    if percentiles:
+        qs = np.percentile(values, [float(p[1:]) for p in percentiles])
+        result.update({p: _round(q) for p, q in zip(percentiles, qs)})
+    for stat in stats:
+        if stat == "mean":
+            result["mean"] = _round(values.mean())
+        elif stat == "min":
+            result["min"] = _round(values.min())
+        elif stat == "max":
+            result["max"] = _round(values.max())
+        elif stat == "std":
+            result["std"] = _round(values.std())
+    return result
+
+
+def _angle_stats(values_deg: np.ndarray) -> dict[str, Any]:
+    """Circular mean, variance (1 - R) and std in degrees; linear stats are meaningless here."""
+    result: dict[str, Any] = {"n": int(values_deg.size)}
+    if values_deg.size == 0:
+        return result
+    rad = np.radians(values_deg)
+    s = np.sin(rad).mean()
+    c = np.cos(rad).mean()
+    r = min(1.0, float(np.hypot(s, c)))
+    result["circular_mean"] = _round(np.degrees(np.arctan2(s, c)) % 360.0)
+    result["circular_variance"] = _round(1.0 - r)
+    result["circular_std_deg"] = _round(np.degrees(np.sqrt(-2.0 * np.log(max(r, 1e-12)))))
+    return result
@@ -1,152 +1,209 @@
-import json
-import matplotlib.pyplot as plt
-import numpy as np
-import math
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import os
+import tempfile
+import time
 from datetime import datetime
+
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.dates as mdates
+import matplotlib.image as mimage
+import matplotlib.pyplot as plt
+import numpy as np
+
+from vakaroslive.session import load_session_columns
+
+BG_COLOR = "#0b1220"
+PANEL_HEIGHT_IN = 22 / 6
+WIDTH_IN = 14
+DPI = 200
 
 def calculate_bearing(lat1, lon1, lat2, lon2):
-    """Calculates bearing between two points in degrees."""
-    if None in [lat1, lon1, lat2, lon2]: return None
-    phi1, phi2 = math.radians(lat1), math.radians(lat2)
-    d_lambda = math.radians(lon2 - lon1)
-    y = math.sin(d_lambda) * math.cos(phi2)
-    x = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(d_lambda)
-    bearing = math.degrees(math.atan2(y, x))
-    return (bearing + 360) % 360
-
-def plot_session(path):
-    with open(path, "r") as f:
-        data = json.load(f)
-    
-    entries = data.get("entries", [])
-    t_dt = []
-    lat = []
-    lon = []
-    hdg = []
-    pitch = []
-    heel = []
-    sog_kn = []
-    cog_device = []
-    cog_derived = []
-
-    last_lat, last_lon = None, None
-
-    for e in entries:
-        if e.get("kind") == "ble_parsed" and e.get("chan") == "main":
-            parsed = e.get("parsed", {})
-            ts_ms = parsed.get("ts_ms")
-            if ts_ms is None: continue
-            
-            t_dt.append(datetime.fromtimestamp(ts_ms / 1000.0))
-            
-            curr_lat = parsed.get("latitude")
-            curr_lon = parsed.get("longitude")
-            lat.append(curr_lat)
-            lon.append(curr_lon)
-            hdg.append(parsed.get("heading_deg"))
-            pitch.append(parsed.get("field_4")) 
-            heel.append(parsed.get("field_5"))  
-            
-            f6 = parsed.get("field_6")
-            if f6 is not None:
-                sog_kn.append(f6 * 1.94384) 
-            else:
-                sog_kn.append(None)
-                
-            cog_device.append(parsed.get("cog_test_deg"))
-
-            # Calculate Derived COG
-            if last_lat is not None and curr_lat is not None:
-                # Use a small distance threshold to avoid noise at rest
-                dlat = curr_lat - last_lat
-                dlon = curr_lon - last_lon
-                if abs(dlat) > 1e-7 or abs(dlon) > 1e-7:
-                    cog_derived.append(calculate_bearing(last_lat, last_lon, curr_lat, curr_lon))
-                else:
-                    cog_derived.append(cog_derived[-1] if cog_derived else None)
-            else:
-                cog_derived.append(None)
-            
-            last_lat, last_lon = curr_lat, curr_lon
-
-    def clean(arr):
-        return [x if x is not None else np.nan for x in arr]
-
-    lat = clean(lat)
-    hdg = clean(hdg)
-    pitch = clean(pitch)
-    heel = clean(heel)
-    sog_kn = clean(sog_kn)
-    cog_device = clean(cog_device)
-    cog_derived = clean(cog_derived)
-
-    plt.style.use('dark_background')
-    fig, axes = plt.subplots(6, 1, figsize=(14, 22), sharex=True)
-    plt.subplots_adjust(hspace=0.4)
-    
-    bg_color = "#0b1220"
-    fig.patch.set_facecolor(bg_color)
-    
-    start_time = t_dt[0].strftime('%H:%M:%S')
-    end_time = t_dt[-1].strftime('%H:%M:%S')
-    duration_sec = (t_dt[-1] - t_dt[0]).total_seconds()
-
-    for ax in axes:
-        ax.set_facecolor(bg_color)
-        ax.grid(True, alpha=0.1, linestyle='--')
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))
-        ax.xaxis.set_major_locator(mdates.AutoDateLocator(minticks=10, maxticks=20))
-
-    # Title with info
-    axes[0].set_title(f"Vakaros Atlas 2 - Stability & COG Study\nStart: {start_time} | Duration: {duration_sec:.1f}s", 
-                      color="white", fontsize=16, pad=25)
-
-    # Subplot 1: Heading
-    axes[0].plot(t_dt, hdg, color="#4ea1ff", linewidth=1.5, label="Magnetic Heading")
-    axes[0].set_ylabel("Degrees", color="#4ea1ff")
-    axes[0].legend(loc="upper right", frameon=False)
-
-    # Subplot 2: SOG
-    axes[1].fill_between(t_dt, 0, sog_kn, color="#ff5d5d", alpha=0.1)
-    axes[1].plot(t_dt, sog_kn, color="#ff5d5d", linewidth=1.5, label="SOG (knots)")
-    axes[1].set_ylabel("Knots", color="#ff5d5d")
-    axes[1].legend(loc="upper right", frameon=False)
-
-    # Subplot 3: Pitch
-    axes[2].plot(t_dt, pitch, color="#c084fc", linewidth=1.5, label="Pitch (Attitude)")
-    axes[2].set_ylabel("Degrees", color="#c084fc")
-    axes[2].legend(loc="upper right", frameon=False)
-
-    # Subplot 4: Heel
-    axes[3].plot(t_dt, heel, color="#ffa94d", linewidth=1.5, label="Heel (Attitude)")
-    axes[3].set_ylabel("Degrees", color="#ffa94d")
-    axes[3].legend(loc="upper right", frameon=False)
-
-    # Subplot 5: Position Stability
-    lat_arr = np.array(lat)
-    valid_mask = ~np.isnan(lat_arr)
-    if np.any(valid_mask):
-        mean_lat = np.nanmean(lat_arr)
-        lat_diff_m = (lat_arr - mean_lat) * 111111
-        axes[4].plot(t_dt, lat_diff_m, color="#4dffb5", linewidth=1, label="GPS Lat Latency Noise (meters)")
-        axes[4].set_ylabel("Meters", color="#4dffb5")
-        axes[4].legend(loc="upper right", frameon=False)
-
-    # Subplot 6: COG Comparison (The core of the request)
-    axes[5].plot(t_dt, cog_device, color="#ffcc66", linewidth=1.2, alpha=0.6, label="Device Reported COG")
-    axes[5].plot(t_dt, cog_derived, color="#ffffff", linewidth=1.5, label="Derived COG (Calculated from Lat/Lon)")
-    axes[5].set_ylabel("Degrees", color="#ffcc66")
-    axes[5].set_xlabel("Local Time (HH:MM:SS)", color="white")
-    axes[5].legend(loc="upper right", frameon=False)
-
-    plt.gcf().autofmt_xdate()
-    
-    output_path = "logs/session_analysis_fancy.png"
-    plt.savefig(output_path, dpi=200, bbox_inches='tight', facecolor=fig.get_facecolor())
-    print(f"Plot saved to {output_path}")
+    """Bearing between points in degrees (vectorized)."""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    d_lambda = np.radians(lon2 - lon1)
+    y = np.sin(d_lambda) * np.cos(phi2)
+    x = np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(d_lambda)
+    return (np.degrees(np.arctan2(y, x)) + 360) % 360
+
+def derived_cog(lat, lon):
+    """Bearing from the previous fix; held while the position does not move (noise at rest)."""
+    cog = np.full(len(lat), np.nan)
+    if len(lat) < 2:
+        return cog
+    dlat = np.diff(lat)
+    dlon = np.diff(lon)
+    moved = (np.abs(dlat) > 1e-7) | (np.abs(dlon) > 1e-7)
+    with np.errstate(invalid="ignore"):
+        bearing = calculate_bearing(lat[:-1], lon[:-1], lat[1:], lon[1:])
+    # Forward fill: sin movimiento se repite el último valor; sin posición (NaN) no hay COG
+    invalid = np.isnan(lat[:-1]) | np.isnan(lat[1:])
+    bearing[invalid] = np.nan
+    event = moved | invalid
+    src = np.maximum.accumulate(np.where(event, np.arange(1, len(lat)), 0))
+    filled = np.where(src > 0, bearing[np.maximum(src - 1, 0)], np.nan)
+    cog[1:] = filled
+    return cog
+
+def minmax_decimate(t, y, buckets):
+    """Min/max per time bucket (one bucket ~ one pixel column): keeps peaks and the
+    envelope, at most 4 points per bucket whatever the input length."""
+    n = len(t)
+    if n <= 4 * buckets:
+        return t, y
+    edges = np.linspace(t[0], t[-1], buckets + 1)
+    starts = np.searchsorted(t, edges[:-1], side="left")
+    starts = np.unique(starts[starts < n])  # buckets vacíos (huecos) fuera
+    ends = np.append(starts[1:], n) - 1
+    ymin = np.fmin.reduceat(y, starts)
+    ymax = np.fmax.reduceat(y, starts)
+    mid = (t[starts] + t[ends]) / 2
+    out_t = np.stack([t[starts], mid, mid, t[ends]], axis=1).ravel()
+    out_y = np.stack([y[starts], ymin, ymax, y[ends]], axis=1).ravel()
+    return out_t, out_y
+
+def unwrap_deg(y):
+    """Continuous angle (no 359 -> 0 jumps) so min/max buckets are not fooled by north."""
+    out = y.copy()
+    valid = ~np.isnan(y)
+    out[valid] = np.degrees(np.unwrap(np.radians(y[valid])))
+    return out
+
+def rewrap_deg(t, y):
+    """Back to [0, 360) with a NaN at each wrap so the line is cut instead of crossing the plot."""
+    w = np.mod(y, 360)
+    jumps = np.flatnonzero(np.abs(np.diff(w)) > 180) + 1
+    if not len(jumps):
+        return t, w
+    t_nan = (t[jumps - 1] + t[jumps]) / 2
+    return np.insert(t, jumps, t_nan), np.insert(w, jumps, np.nan)
+
+def decimate(t, y, buckets, angle=False):
+    if angle:
+        t, y = minmax_decimate(t, unwrap_deg(y), buckets)
+        return rewrap_deg(t, y)
+    return minmax_decimate(t, y, buckets)
+
+def _render_panel(panel, xlim, out_png, last):
+    """Renders one subplot to its own PNG (worker process; same size and margins for all)."""
+    plt.style.use("dark_background")
+    fig, ax = plt.subplots(figsize=(WIDTH_IN, PANEL_HEIGHT_IN))
+    fig.patch.set_facecolor(BG_COLOR)
+    # Márgenes fijos: los paneles se apilan luego y los ejes deben quedar alineados
+    fig.subplots_adjust(left=0.07, right=0.98, top=0.80 if panel.get("title") else 0.92, bottom=0.28 if last else 0.12)
+    ax.set_facecolor(BG_COLOR)
+    ax.grid(True, alpha=0.1, linestyle="--")
+    ax.spines["top"].set_visible(False)
+    ax.spines["right"].set_visible(False)
+    ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M:%S"))
+    ax.xaxis.set_major_locator(mdates.AutoDateLocator(minticks=10, maxticks=20))
+    ax.set_xlim(*xlim)
+    if panel.get("title"):
+        ax.set_title(panel["title"], color="white", fontsize=16, pad=25)
+    for series in panel["series"]:
+        t, y = series["t"], series["y"]
+        if series.get("fill"):
+            ax.fill_between(t, 0, y, color=series["color"], alpha=0.1)
+        ax.plot(t, y, color=series["color"], linewidth=series.get("lw", 1.5), alpha=series.get("alpha", 1.0), label=series["label"])
+    ax.set_ylabel(panel["ylabel"], color=panel["series"][0]["color"])
+    ax.legend(loc="upper right", frameon=False)
+    if last:
+        ax.set_xlabel("Local Time (HH:MM:SS)", color="white")
+        for label in ax.get_xticklabels():
+            label.set_rotation(30)
+            label.set_horizontalalignment("right")
+    else:
+        ax.tick_params(labelbottom=False)
+    fig.savefig(out_png, dpi=DPI, facecolor=fig.get_facecolor())
+    plt.close(fig)
+    return out_png
+
+def plot_session(path, output_path="logs/session_analysis_fancy.png", jobs=None):
+    t_start = time.perf_counter()
+    parsed = load_session_columns(path, kinds=("ble_parsed",))["ble_parsed"]
+    chans = [str(c) for c in parsed["chans"]]
+    main = parsed["chan"] == chans.index("main") if "main" in chans else np.zeros(len(parsed["chan"]), bool)
+    if "ts_ms" not in parsed or not main.any():
+        print("No ble_parsed main entries found.")
+        return
+
+    def col(name):
+        return parsed[name][main] if name in parsed else np.full(int(main.sum()), np.nan)
+
+    # ts_ms del paquete (parsed.ts_ms) como en la versión anterior; si falta, el de la entrada
+    ts_ms = col("f:ts_ms")
+    ts_ms = np.where(np.isnan(ts_ms), parsed["ts_ms"][main], ts_ms)
+    order = np.argsort(ts_ms, kind="stable")
+    ts_ms = ts_ms[order]
+    # Hora local como en datetime.fromtimestamp, en número de fecha de matplotlib
+    t0 = datetime.fromtimestamp(ts_ms[0] / 1000.0).astimezone()
+    utc_offset_ms = t0.utcoffset().total_seconds() * 1000
+    t = mdates.date2num((ts_ms + utc_offset_ms).astype("datetime64[ms]"))
+
+    lat = col("latitude")[order]
+    lon = col("longitude")[order]
+    hdg = col("heading_deg")[order]
+    pitch = col("field_4")[order]
+    heel = col("field_5")[order]
+    sog_kn = col("field_6")[order] * 1.94384
+    cog_device = col("cog_test_deg")[order]
+    cog_derived = derived_cog(lat, lon)
+
+    buckets = int(WIDTH_IN * DPI * 0.9)  # ~1 bucket por columna de píxeles del eje
+    start_time = t0.strftime("%H:%M:%S")
+    duration_sec = (ts_ms[-1] - ts_ms[0]) / 1000.0
+
+    def series(y, color, label, angle=False, **kw):
+        td, yd = decimate(t, y, buckets, angle=angle)
+        return {"t": td, "y": yd, "color": color, "label": label, **kw}
+
+    panels = [
+        {
+            "title": f"Vakaros Atlas 2 - Stability & COG Study\nStart: {start_time} | Duration: {duration_sec:.1f}s ({len(t)} samples)",
+            "ylabel": "Degrees",
+            "series": [series(hdg, "#4ea1ff", "Magnetic Heading", angle=True)],
+        },
+        {"ylabel": "Knots", "series": [series(sog_kn, "#ff5d5d", "SOG (knots)", fill=True)]},
+        {"ylabel": "Degrees", "series": [series(pitch, "#c084fc", "Pitch (Attitude)")]},
+        {"ylabel": "Degrees", "series": [series(heel, "#ffa94d", "Heel (Attitude)")]},
+    ]
+    if np.any(~np.isnan(lat)):
+        lat_diff_m = (lat - np.nanmean(lat)) * 111111
+        panels.append({"ylabel": "Meters", "series": [series(lat_diff_m, "#4dffb5", "GPS Lat Latency Noise (meters)", lw=1)]})
+    else:
+        panels.append({"ylabel": "Meters", "series": [{"t": [], "y": [], "color": "#4dffb5", "label": "GPS Lat Latency Noise (meters)"}]})
+    panels.append({
+        "ylabel": "Degrees",
+        "series": [
+            series(cog_device, "#ffcc66", "Device Reported COG", angle=True, lw=1.2, alpha=0.6),
+            series(cog_derived, "#ffffff", "Derived COG (Calculated from Lat/Lon)", angle=True),
+        ],
+    })
+    prep_s = time.perf_counter() - t_start
+
+    # Cada panel se renderiza en su propio proceso y luego se apilan las imágenes
+    xlim = (t[0], t[-1])
+    with tempfile.TemporaryDirectory() as tmp:
+        pngs = [os.path.join(tmp, f"panel_{i}.png") for i in range(len(panels))]
+        args = [(p, xlim, png, i == len(panels) - 1) for i, (p, png) in enumerate(zip(panels, pngs))]
+        if jobs == 1:
+            for a in args:
+                _render_panel(*a)
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                list(pool.map(_render_panel, *zip(*args)))
+        images = [mimage.imread(png) for png in pngs]
+    width = max(img.shape[1] for img in images)
+    images = [np.pad(img, ((0, 0), (0, width - img.shape[1]), (0, 0)), mode="edge") for img in images]
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    mimage.imsave(output_path, np.vstack(images))
+    print(f"Plot saved to {output_path} ({len(t)} samples, prep {prep_s:.2f}s, total {time.perf_counter() - t_start:.2f}s)")
 
 if __name__ == "__main__":
-    plot_session(r"c:\JAVIER\VAKAROSLIVE\vakaroslive_session_2025-12-23T10-39-05.775Z.json")
+    parser = argparse.ArgumentParser(description="Gráficas de una sesión grabada (series diezmadas min/max por píxel).")
+    parser.add_argument("path", nargs="?", default=r"c:\JAVIER\VAKAROSLIVE\vakaroslive_session_2025-12-23T10-39-05.775Z.json")
+    parser.add_argument("--out", default="logs/session_analysis_fancy.png")
+    parser.add_argument("--jobs", type=int, default=None, help="Procesos de render (1 = en serie).")
+    args = parser.parse_args()
+    plot_session(args.path, args.out, args.jobs)
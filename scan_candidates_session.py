@@ -1,37 +1,53 @@
-import json
-import base64
-import struct
+import argparse
+import time
 
-def haversine_m(lat1, lon1, lat2, lon2):
-    import math
-    R = 6371000
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    a = math.sin(dphi / 2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
+import numpy as np
 
-def scan_candidates(path):
-    with open(path, 'r') as f:
-        data = json.load(f)
-    
-    entries = data.get("entries", [])
-    for i, e in enumerate(entries):
-        if e.get("kind") == "ble_rx" and e.get("chan") == "main":
-            raw = base64.b64decode(e["raw_b64"])
-            if len(raw) < 16: continue
-            
-            for off in range(len(raw) - 15):
-                try:
-                    a_lat, a_lon, b_lat, b_lon = struct.unpack_from("<ffff", raw, off)
-                    if 35 < abs(a_lat) < 65 and 35 < abs(b_lat) < 65:
-                        dist = haversine_m(a_lat, a_lon, b_lat, b_lon)
-                        if 5 <= dist <= 2000:
-                            print(f"Found candidate at entry {i}, off {off}: {a_lat, a_lon} -> {b_lat, b_lon} (len {dist:.1f}m)")
-                except:
-                    continue
+from vakaroslive.candidates import CANDIDATE_MIN_BYTES, scan_packets
+from vakaroslive.session import load_session_columns
+
+def scan_candidates(path, chans=None, list_hits=0):
+    t0 = time.perf_counter()
+    cols = load_session_columns(path, kinds=("ble_rx",))
+    rx = cols["ble_rx"]
+    load_s = time.perf_counter() - t0
+    names = [str(c) for c in rx["chans"]]
+
+    t0 = time.perf_counter()
+    total = 0
+    for code, chan in enumerate(names):
+        if chans and chan not in chans:
+            continue
+        chan_mask = rx["chan"] == code
+        lengths = rx["raw_len"][chan_mask]
+        for length in np.unique(lengths):
+            if length < CANDIDATE_MIN_BYTES:
+                continue
+            # Paquetes de igual longitud apilados en una matriz (N, L)
+            sel = np.flatnonzero(chan_mask & (rx["raw_len"] == length))
+            starts = rx["raw_offset"][sel]
+            packets = rx["payload"][starts[:, None] + np.arange(length)]
+            rows, offsets, quads = scan_packets(packets)
+            total += len(rows)
+            hist = np.bincount(offsets, minlength=length - 15)
+            hit_offsets = np.flatnonzero(hist)
+            print(f"{chan} len={length}: {len(sel)} packets, {len(rows)} hits")
+            if len(hit_offsets):
+                print("  hits by offset: " + ", ".join(f"{o}={hist[o]}" for o in hit_offsets))
+                # Líneas distintas (redondeadas a ~10 cm) y cuántas veces aparecen
+                lines, counts = np.unique(np.round(quads[:, :4], 6), axis=0, return_counts=True)
+                for line, count in sorted(zip(lines.tolist(), counts.tolist()), key=lambda lc: -lc[1])[:5]:
+                    print(f"  x{count}: {tuple(line[:2])} -> {tuple(line[2:])}")
+            for i in range(min(list_hits, len(rows))):
+                a_lat, a_lon, b_lat, b_lon, dist = quads[i].tolist()
+                ts = rx["ts_ms"][sel[rows[i]]]
+                print(f"  Found candidate at ts {ts}, off {offsets[i]}: {(a_lat, a_lon)} -> {(b_lat, b_lon)} (len {dist:.1f}m)")
+    print(f"{total} hits; load {load_s:.2f}s, scan {time.perf_counter() - t0:.3f}s")
 
 if __name__ == "__main__":
-    scan_candidates(r"c:\JAVIER\VAKAROSLIVE\vakaroslive_session_2025-12-23T10-39-05.775Z.json")
+    parser = argparse.ArgumentParser(description="Busca pares de coordenadas (línea de salida) en todos los offsets de los paquetes.")
+    parser.add_argument("path", nargs="?", default=r"c:\JAVIER\VAKAROSLIVE\vakaroslive_session_2025-12-23T10-39-05.775Z.json")
+    parser.add_argument("--chans", default=None, help="Canales separados por coma (por defecto, todos).")
+    parser.add_argument("--list", type=int, default=0, help="Lista los primeros N hallazgos por canal/longitud.")
+    args = parser.parse_args()
+    scan_candidates(args.path, chans=args.chans.split(",") if args.chans else None, list_hits=args.list)
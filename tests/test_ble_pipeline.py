@@ -0,0 +1,250 @@
+"""BLE pipeline against `vakaroslive.fake_ble.FakeAtlas`: reconnect, notify→poll
+fallback and cmd1/cmd2 polling, with no hardware and in well under real time."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from typing import Any
+
+import pytest
+
+from vakaroslive.atlas2_protocol import (
+    VAKAROS_CHAR_COMMAND_1,
+    VAKAROS_CHAR_COMMAND_2,
+    VAKAROS_CHAR_TELEMETRY_COMPACT,
+    VAKAROS_CHAR_TELEMETRY_MAIN,
+)
+from vakaroslive.ble_atlas2 import Atlas2BleClient
+from vakaroslive.fake_ble import FakeAtlas, FakeBleakClient, FakeBleakError
+from vakaroslive.mock import BoatSim, LoadProfile, encode_start_line
+
+START_LINE = encode_start_line(42.232, -8.7345, 42.232, -8.7327)
+
+
+@pytest.fixture(autouse=True)
+def _cwd(tmp_path, monkeypatch):
+    # process_notify deja un log de depuración en logs/raw_packets.log (relativo al cwd)
+    (tmp_path / "logs").mkdir()
+    monkeypatch.chdir(tmp_path)
+
+
+def run(coro: Any, timeout: float = 10.0) -> Any:
+    return asyncio.run(asyncio.wait_for(coro, timeout))
+
+
+async def wait_until(predicate: Any, timeout: float = 3.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("timeout waiting for condition")
+        await asyncio.sleep(0.01)
+
+
+def drain(queue: asyncio.Queue[dict[str, Any]]) -> list[dict[str, Any]]:
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return events
+
+
+class Pipeline:
+    """`Atlas2BleClient` wired to a `FakeAtlas`, with short timeouts for tests."""
+
+    def __init__(self, atlas: FakeAtlas | None = None, **kwargs: Any) -> None:
+        self.atlas = atlas or FakeAtlas()
+        self.queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+        options: dict[str, Any] = {
+            "device_hint": "atlas",
+            "scan_timeout": 0.1,
+            "backoff_base_s": 0.05,
+            "backoff_max_s": 0.2,
+            "stable_after_s": 0.2,
+            "poll_start_delay_s": 0.05,
+            "no_data_timeout_s": 0.3,
+            "bleak_client": self.atlas.client,
+            "bleak_scanner": self.atlas.scanner,
+        }
+        options.update(kwargs)
+        self.ble = Atlas2BleClient(self.queue, **options)
+        self.events: list[dict[str, Any]] = []
+        self._task: asyncio.Task[None] | None = None
+
+    async def __aenter__(self) -> Pipeline:
+        self._task = asyncio.create_task(self.ble.run())
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        await self.ble.stop()
+        assert self._task is not None
+        await asyncio.wait_for(self._task, 3.0)
+        self.collect()
+
+    def collect(self) -> list[dict[str, Any]]:
+        self.events.extend(drain(self.queue))
+        return self.events
+
+    def of_type(self, etype: str) -> list[dict[str, Any]]:
+        return [e for e in self.collect() if e.get("type") == etype]
+
+
+def boat() -> BoatSim:
+    return BoatSim(0, LoadProfile(), random.Random(0))
+
+
+async def feed(atlas: FakeAtlas, seconds: float, main_hz: float = 20.0) -> None:
+    """Updates main at `main_hz` and compact at 1/10 of that (notified if delivery is on)."""
+    sim = boat()
+    step = 1.0 / main_hz
+    for i in range(int(seconds * main_hz)):
+        sim.step(step)
+        atlas.set_value(VAKAROS_CHAR_TELEMETRY_MAIN, sim.main_packet())
+        if i % 10 == 0:
+            atlas.set_value(VAKAROS_CHAR_TELEMETRY_COMPACT, sim.compact_packet())
+        await asyncio.sleep(step)
+
+
+def test_reconnects_to_last_address_without_scanning() -> None:
+    async def scenario() -> None:
+        async with Pipeline() as p:
+            await wait_until(lambda: p.atlas.connected)
+            assert p.atlas.scanner.discovers == 1
+            await asyncio.sleep(0.3)  # enlace estable (> stable_after_s): reintento inmediato
+            p.atlas.drop(readvertise_after_s=0.0)
+            await wait_until(lambda: p.atlas.connects == 2)
+            # Reintento directo a la última dirección: ningún scan más
+            assert p.atlas.scanner.discovers == 1
+            assert p.ble.last_reconnect_s is not None and p.ble.last_reconnect_s < 0.1
+        reconnects = [e for e in p.of_type("status") if e.get("reconnect_ms") is not None]
+        assert len(reconnects) == 1
+
+    run(scenario())
+
+
+def test_reconnect_waits_for_the_atlas_to_advertise_again() -> None:
+    async def scenario() -> None:
+        async with Pipeline(direct_retries=6) as p:
+            await wait_until(lambda: p.atlas.connected)
+            await asyncio.sleep(0.3)
+            # Invisible menos que la tanda de reintentos directos: no hace falta scan
+            p.atlas.drop(readvertise_after_s=0.1)
+            await wait_until(lambda: p.atlas.connects == 2)
+            assert 0.1 <= p.ble.last_reconnect_s < 0.5
+            assert p.atlas.scanner.discovers == 1
+        errors = [e for e in p.of_type("status") if e.get("error")]
+        assert errors  # los intentos con el Atlas invisible fallan y se notifican
+
+    run(scenario())
+
+
+def test_link_that_fails_after_connect_backs_off(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def failing_start_notify(self: FakeBleakClient, uuid: str, callback: Any, **_: Any) -> None:
+        raise FakeBleakError("fake: start_notify failed")
+
+    monkeypatch.setattr(FakeBleakClient, "start_notify", failing_start_notify)
+
+    async def scenario() -> int:
+        async with Pipeline() as p:
+            await asyncio.sleep(1.0)
+        return p.atlas.connects
+
+    # Sin backoff serían miles de conexiones por segundo
+    assert 3 <= run(scenario()) < 40
+
+
+def test_polls_only_the_characteristic_whose_notify_is_silent() -> None:
+    async def scenario() -> None:
+        atlas = FakeAtlas()
+        atlas.notify_delivery[VAKAROS_CHAR_TELEMETRY_COMPACT] = False
+        async with Pipeline(atlas) as p:
+            await wait_until(lambda: atlas.connected)
+            await feed(atlas, 1.6)
+            assert p.ble.acquisition is not None
+            assert p.ble.acquisition.mode() == "mixed"
+        assert atlas.reads[VAKAROS_CHAR_TELEMETRY_COMPACT] > 0
+        assert atlas.reads[VAKAROS_CHAR_TELEMETRY_MAIN] == 0
+        assert p.of_type("telemetry_compact")
+        assert len(p.of_type("telemetry_main")) >= 20
+
+    run(scenario())
+
+
+def test_no_notifications_falls_back_to_polling() -> None:
+    async def scenario() -> None:
+        atlas = FakeAtlas()
+        for uuid in atlas.notify_delivery:
+            atlas.notify_delivery[uuid] = False
+        async with Pipeline(atlas) as p:
+            await wait_until(lambda: atlas.connected)
+            await feed(atlas, 0.8)
+        assert atlas.reads[VAKAROS_CHAR_TELEMETRY_MAIN] > 0
+        main = p.of_type("telemetry_main")
+        assert main and all("raw_hex" in e for e in main)  # solo llegan por el camino de poll
+
+    run(scenario())
+
+
+def test_healthy_notify_is_not_polled() -> None:
+    async def scenario() -> None:
+        async with Pipeline() as p:
+            await wait_until(lambda: p.atlas.connected)
+            await feed(p.atlas, 1.3)
+            assert p.ble.acquisition is not None
+            assert p.ble.acquisition.mode() == "notify"
+        assert sum(p.atlas.reads.values()) == 0
+        assert p.ble.acquisition.dedup.suppressed == {"main": 0, "compact": 0}
+
+    run(scenario())
+
+
+def test_command_characteristics_are_polled() -> None:
+    async def scenario() -> None:
+        atlas = FakeAtlas()
+        for uuid in atlas.notify_delivery:
+            atlas.notify_delivery[uuid] = False
+        atlas.unreadable.add(VAKAROS_CHAR_COMMAND_2)
+        atlas.set_value(VAKAROS_CHAR_COMMAND_1, START_LINE, notify=False)
+        async with Pipeline(atlas) as p:
+            await wait_until(lambda: atlas.connected)
+            await feed(atlas, 1.3)
+        sources = {e["source"] for e in p.of_type("atlas_start_line_candidates")}
+        assert "command_1_poll" in sources
+        # El mismo valor no se vuelve a emitir en cada lectura
+        assert sum(1 for e in p.of_type("atlas_start_line_candidates") if e["source"] == "command_1_poll") == 1
+        # CMD2 no legible: un intento y se desactiva su polling
+        assert atlas.reads[VAKAROS_CHAR_COMMAND_2] == 1
+        assert atlas.reads[VAKAROS_CHAR_COMMAND_1] >= 2
+
+    run(scenario())
+
+
+def test_command_notify_reaches_the_hub() -> None:
+    async def scenario() -> None:
+        async with Pipeline() as p:
+            await wait_until(lambda: p.atlas.connected)
+            p.atlas.set_value(VAKAROS_CHAR_COMMAND_2, START_LINE)
+            await wait_until(lambda: bool(p.of_type("atlas_start_line_candidates")))
+        (event,) = p.of_type("atlas_start_line_candidates")
+        assert event["source"] == "command_2_notify"
+
+    run(scenario())
+
+
+def test_mcp_manager_with_fake_atlas() -> None:
+    from atlas2_mcp.ble_manager import Atlas2BleManager
+
+    async def scenario() -> None:
+        atlas = FakeAtlas()
+        events: list[dict[str, Any]] = []
+        manager = Atlas2BleManager(events.append, bleak_client=atlas.client, bleak_scanner=atlas.scanner)
+        task = asyncio.create_task(manager.run())
+        await wait_until(lambda: atlas.connected)
+        await feed(atlas, 0.3)
+        await manager.stop()
+        await asyncio.wait_for(task, 3.0)
+        assert (VAKAROS_CHAR_COMMAND_1, b"\x01") in atlas.writes  # wake-up proactivo
+        assert any(e["type"] == "telemetry_main" for e in events)
+        assert events[-1] == {"type": "status", "connected": False, "device_address": None}
+
+    run(scenario())
@@ -0,0 +1,43 @@
+"""Start-line candidate filters: the NumPy scanner and `SessionAnalyzer` agree."""
+
+from __future__ import annotations
+
+import random
+import struct
+
+import numpy as np
+
+from vakaroslive.analyze import SessionAnalyzer
+from vakaroslive.candidates import scan_packets
+
+LINE = (42.232, -8.7345, 42.232, -8.7327)  # ~150 m
+BAD_LON = (42.232, 200.0, 42.232, 200.001)  # latitudes válidas, longitud imposible
+
+
+def packets(n: int = 300, length: int = 40) -> list[bytes]:
+    rng = random.Random(1)
+    out = []
+    for i in range(n):
+        raw = bytearray(rng.getrandbits(8) for _ in range(length))
+        if i % 3 == 0:
+            struct.pack_into("<4f", raw, (i // 3) % (length - 15), *LINE)
+        elif i % 3 == 1:
+            struct.pack_into("<4f", raw, 4, *BAD_LON)
+        out.append(bytes(raw))
+    return out
+
+
+def test_numpy_scanner_and_analyzer_find_the_same_hits() -> None:
+    raws = packets()
+    rows, offsets, quads = scan_packets(np.frombuffer(b"".join(raws), dtype=np.uint8).reshape(len(raws), -1))
+    numpy_hits: dict[str, int] = {}
+    for offset in offsets.tolist():
+        numpy_hits[f"main@{offset}"] = numpy_hits.get(f"main@{offset}", 0) + 1
+
+    analyzer = SessionAnalyzer()
+    for i, raw in enumerate(raws):
+        analyzer._scan(i, "main", raw)
+
+    assert analyzer.candidate_hits == numpy_hits
+    assert len(rows) >= 100
+    assert not np.any(np.abs(quads[:, [1, 3]]) > 180)
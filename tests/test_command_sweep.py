@@ -0,0 +1,52 @@
+"""`command_sweep` correlation against the fake Atlas through the MCP BLE manager."""
+
+from __future__ import annotations
+
+import asyncio
+
+from atlas2_mcp.ble_manager import Atlas2BleManager
+from atlas2_mcp.sweep import CommandSweep, format_sweep_table
+from vakaroslive.atlas2_protocol import (
+    VAKAROS_CHAR_COMMAND_1,
+    VAKAROS_CHAR_COMMAND_2,
+    VAKAROS_CHAR_TELEMETRY_MAIN,
+)
+from vakaroslive.fake_ble import FakeAtlas
+
+MAIN = bytes(range(40))
+
+
+def test_sweep_reports_responses_and_needs_a_telemetry_baseline() -> None:
+    async def scenario() -> dict:
+        atlas = FakeAtlas()
+        writes = 0
+
+        def on_write(uuid: str, data: bytes) -> None:
+            nonlocal writes
+            if data[:1] != b"\x05":
+                return
+            writes += 1
+            atlas.set_value(VAKAROS_CHAR_COMMAND_2, bytes([0xA0, data[1], 0, 0]))
+            # Telemetría que aparece por primera vez tras una escritura: no es un cambio
+            atlas.set_value(VAKAROS_CHAR_TELEMETRY_MAIN, MAIN)
+
+        atlas.on_write = on_write
+        manager = Atlas2BleManager(lambda _: None, bleak_client=atlas.client, bleak_scanner=atlas.scanner)
+        task = asyncio.create_task(manager.run(atlas.device.address))
+        while not atlas.connected:
+            await asyncio.sleep(0.01)
+        sweep = CommandSweep(manager, VAKAROS_CHAR_COMMAND_1, interval_s=0.05, window_s=0.03, quiet_s=0.1)
+        result = await sweep.run([bytes([5, v]) for v in range(3)] + [b"\x06\x00"])
+        await manager.stop()
+        await asyncio.wait_for(task, 3.0)
+        return result
+
+    result = asyncio.run(asyncio.wait_for(scenario(), 10.0))
+    rows = result["rows"]
+    assert [row["payload"] for row in rows] == ["0500", "0501", "0502", "0600"]
+    assert rows[0]["changes"] == {"cmd2": {"n": 1, "new": True, "bytes": [0, 1, 2, 3], "hex": "a0000000"}}
+    assert rows[1]["changes"] == {"cmd2": {"n": 1, "bytes": [1], "hex": "a0010000"}}
+    assert rows[2]["changes"] == {"cmd2": {"n": 1, "bytes": [1], "hex": "a0020000"}}
+    assert "changes" not in rows[3]
+    assert result["unmasked"] == ["main", "compact"]
+    assert "no noise estimate" in format_sweep_table(result)
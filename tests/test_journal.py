@@ -0,0 +1,86 @@
+"""`SessionJournal` start/stop lifecycle, including a start that races a draining stop."""
+
+from __future__ import annotations
+
+import gzip
+import json
+from pathlib import Path
+import threading
+import time
+from typing import Any
+
+import pytest
+
+from vakaroslive.journal import JournalStopping, SessionJournal
+
+
+def read_kinds(journal: SessionJournal) -> list[str]:
+    kinds = []
+    for name in journal.files:
+        with gzip.open(name, "rt", encoding="utf-8") as fh:
+            kinds.extend(json.loads(line)["kind"] for line in fh)
+    return kinds
+
+
+def record(journal: SessionJournal, n: int) -> None:
+    for i in range(n):
+        journal.record("command", 1_000 + i, cmd={"i": i})
+
+
+def test_start_stop_start_writes_both_sessions(tmp_path: Path) -> None:
+    journal = SessionJournal(tmp_path, chunk_kb=1)
+    journal.start()
+    record(journal, 50)
+    first = journal.stop()
+    time.sleep(0.002)  # otro started_ts_ms, otro nombre de segmento
+    journal.start()
+    record(journal, 30)
+    second = journal.stop()
+
+    assert first["entries"] == 50 and second["entries"] == 30
+    assert first["files"] != second["files"]
+    assert read_kinds(journal).count("command") == 30
+    assert sum(Path(f).exists() for f in first["files"] + second["files"]) == 2
+    assert not journal._buf and journal._queue is None and journal._thread is None
+
+
+def test_start_during_stop_is_refused_and_nothing_is_lost(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    journal = SessionJournal(tmp_path, chunk_kb=1)
+    opening = threading.Event()
+    real_open = SessionJournal._open
+
+    def slow_open(self: SessionJournal, path: Path) -> Any:
+        opening.set()
+        time.sleep(0.3)
+        return real_open(self, path)
+
+    monkeypatch.setattr(SessionJournal, "_open", slow_open)
+    journal.start()
+    record(journal, 20)
+    stopper = threading.Thread(target=journal.stop)
+    stopper.start()
+    assert opening.wait(2.0)
+    assert journal.stopping
+    with pytest.raises(JournalStopping):
+        journal.start()
+    record(journal, 5)  # inactivo mientras cierra: se ignora
+    stopper.join(3.0)
+    assert not journal.stopping and not journal.active
+    assert read_kinds(journal).count("command") == 20
+
+    monkeypatch.undo()
+    journal.configure(tmp_path)  # chunks por defecto: 2000 records de golpe caben sin descartes
+    journal.start()
+    record(journal, 2000)
+    status = journal.stop()
+    assert status["entries"] == 2000 and status["bytes"] > 0 and status["dropped_chunks"] == 0
+    assert read_kinds(journal).count("command") == 2000
+    assert not journal._buf
+
+
+def test_flush_without_writer_drops_and_counts(tmp_path: Path) -> None:
+    journal = SessionJournal(tmp_path)
+    journal._append('{"kind":"command"}\n')  # p. ej. un record del loop que corre con stop()
+    journal._flush()
+    assert not journal._buf and journal._buf_bytes == 0
+    assert journal.dropped_chunks == 1 and journal.bytes_in == 0
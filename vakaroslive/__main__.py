@@ -10,7 +10,11 @@ from typing import Any
 from aiohttp import web
 
 from .ble_atlas2 import Atlas2BleClient
-from .server import TelemetryHub, create_app
+from .ingest import IngestQueue
+from .journal import COMPRESSIONS, JOURNAL
+from .mock import LoadProfile, mock_telemetry
+from .server import FleetHub, TelemetryHub, create_app
+from .tracing import TRACER
 
 
 def _parse_args() -> argparse.Namespace:
@@ -31,11 +35,47 @@ def _parse_args() -> argparse.Namespace:
     )
     parser.add_argument(
         "--device",
+        action="append",
         default=None,
-        help="Dirección BLE (recomendado) o substring del nombre para auto-selección.",
+        help=(
+            "Dirección BLE (recomendado) o substring del nombre para auto-selección. "
+            "Repetible para modo flota (un cliente BLE por equipo); admite `id=dirección`."
+        ),
     )
     parser.add_argument("--scan-timeout", default=8.0, type=float)
+    parser.add_argument(
+        "--telemetry-depth",
+        default=1,
+        type=int,
+        help="Muestras de telemetría pendientes por característica (1 = solo la más reciente).",
+    )
+    parser.add_argument(
+        "--trace-sample",
+        default=0.0,
+        type=float,
+        help="Fracción de eventos con trazas de latencia BLE→WebSocket (0 = desactivado).",
+    )
+    parser.add_argument(
+        "--record",
+        action="store_true",
+        help="Graba la sesión en el servidor desde el arranque (también con POST /api/record).",
+    )
+    parser.add_argument(
+        "--journal-dir", default=None, help="Directorio del journal de sesión (por defecto logs/journal)."
+    )
+    parser.add_argument(
+        "--journal-compression", default="gzip", choices=COMPRESSIONS, help="Compresión de los segmentos."
+    )
+    parser.add_argument(
+        "--journal-rotate-mb", default=64.0, type=float, help="MB (sin comprimir) por segmento."
+    )
     parser.add_argument("--mock", action="store_true", help="Genera telemetría falsa.")
+    parser.add_argument(
+        "--mock-rate-hz",
+        default=5.0,
+        type=float,
+        help="Paquetes main/s por barco simulado (con --mock).",
+    )
     parser.add_argument("--log-level", default="INFO")
     return parser.parse_args()
 
@@ -50,45 +90,12 @@ async def _run_site(
     return runner
 
 
-async def _mock_telemetry(queue: asyncio.Queue[dict[str, Any]]) -> None:
-    import math
-    import time
-
-    lat = 42.230282
-    lon = -8.732954
-    heading = 0.0
-
-    queue.put_nowait(
-        {
-            "type": "status",
-            "ts_ms": int(time.time() * 1000),
-            "connected": True,
-            "device_address": "mock",
-            "error": None,
-        }
-    )
-
-    while True:
-        now_ms = int(time.time() * 1000)
-        heading = (heading + 4.0) % 360.0
-        lat += 0.00001 * math.cos(math.radians(heading))
-        lon += 0.00001 * math.sin(math.radians(heading))
-        queue.put_nowait(
-            {
-                "type": "telemetry_main",
-                "ts_ms": now_ms,
-                "msg_type": 0x02,
-                "msg_subtype": 0x0A,
-                "latitude": lat,
-                "longitude": lon,
-                "heading_deg": heading,
-                "field_4": None,
-                "field_5": None,
-                "field_6": None,
-                "raw_len": 35,
-            }
-        )
-        await asyncio.sleep(0.2)
+def _parse_device(value: str) -> tuple[str, str]:
+    """`id=hint` -> (id, hint); a bare hint is also its own boat id."""
+    boat_id, sep, hint = value.partition("=")
+    if sep and boat_id.strip() and hint.strip():
+        return boat_id.strip(), hint.strip()
+    return value.strip(), value.strip()
 
 
 async def main() -> None:
@@ -99,18 +106,43 @@ async def main() -> None:
     )
     logger = logging.getLogger("vakaroslive")
 
-    event_queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=2000)
+    TRACER.configure(args.trace_sample)
 
-    persist_path = Path.cwd() / "logs" / "vakaroslive_state.json"
-    hub = TelemetryHub(event_queue, persist_path=persist_path)
-    ble = Atlas2BleClient(
-        event_queue=event_queue,
-        device_hint=args.device,
-        scan_timeout=args.scan_timeout,
-        logger=logging.getLogger("vakaroslive.ble"),
+    devices = [_parse_device(d) for d in (args.device or []) if d.strip()]
+    fleet: FleetHub | None = FleetHub() if len(devices) > 1 else None
+    logs_dir = Path.cwd() / "logs"
+    JOURNAL.configure(
+        directory=Path(args.journal_dir) if args.journal_dir else logs_dir / "journal",
+        compression=args.journal_compression,
+        rotate_mb=args.journal_rotate_mb,
     )
 
-    app = create_app(hub=hub, ble=ble)
+    boats: list[tuple[TelemetryHub, Atlas2BleClient, IngestQueue]] = []
+    for boat_id, hint in devices or [(None, None)]:
+        event_queue = IngestQueue(telemetry_depth=args.telemetry_depth)
+        if fleet is None:
+            hub = TelemetryHub(event_queue, persist_path=logs_dir / "vakaroslive_state.json")
+        else:
+            safe_id = "".join(c if c.isalnum() else "_" for c in str(boat_id))
+            hub = TelemetryHub(
+                event_queue,
+                persist_path=logs_dir / f"vakaroslive_state_{safe_id}.json",
+                boat_id=boat_id,
+            )
+            fleet.add(hub)
+        ble = Atlas2BleClient(
+            event_queue=event_queue,
+            device_hint=hint,
+            scan_timeout=args.scan_timeout,
+            boat_id=boat_id,
+            logger=logging.getLogger(
+                "vakaroslive.ble" if fleet is None else f"vakaroslive.ble.{boat_id}"
+            ),
+        )
+        boats.append((hub, ble, event_queue))
+
+    hub, ble, _ = boats[0]
+    app = create_app(hub=hub, ble=ble, fleet=fleet)
 
     ssl_context: ssl.SSLContext | None = None
     scheme = "http"
@@ -121,22 +153,40 @@ async def main() -> None:
         ssl_context.load_cert_chain(certfile=str(args.certfile), keyfile=str(args.keyfile))
         scheme = "https"
 
+    if args.record:
+        JOURNAL.start()
     runner = await _run_site(app, host=args.host, port=args.port, ssl_context=ssl_context)
     logger.info("UI: %s://%s:%s", scheme, args.host, args.port)
 
-    tasks: list[asyncio.Task[Any]] = [
-        asyncio.create_task(hub.run(), name="hub"),
-    ]
-    if args.mock:
-        tasks.append(asyncio.create_task(_mock_telemetry(event_queue), name="mock"))
-    elif not args.no_ble:
-        tasks.append(asyncio.create_task(ble.run(), name="ble"))
+    if fleet is not None:
+        logger.info("Modo flota: %s", ", ".join(fleet.hubs))
+
+    tasks: list[asyncio.Task[Any]] = []
+    for i, (boat_hub, boat_ble, boat_queue) in enumerate(boats):
+        suffix = "" if boat_hub.boat_id is None else f"-{boat_hub.boat_id}"
+        tasks.append(asyncio.create_task(boat_hub.run(), name=f"hub{suffix}"))
+        if args.mock:
+            tasks.append(
+                asyncio.create_task(
+                    mock_telemetry(
+                        boat_queue,
+                        boat_index=i,
+                        profile=LoadProfile(rate_hz=args.mock_rate_hz),
+                        device_address=f"mock{suffix}",
+                        boat_id=boat_hub.boat_id,
+                    ),
+                    name=f"mock{suffix}",
+                )
+            )
+        elif not args.no_ble:
+            tasks.append(asyncio.create_task(boat_ble.run(), name=f"ble{suffix}"))
 
     try:
         await asyncio.gather(*tasks)
     finally:
         for task in tasks:
             task.cancel()
+        JOURNAL.stop()
         await runner.cleanup()
 
 
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from collections import deque
+import time
+from typing import Any
+
+from . import metrics
+
+TELEMETRY_CHARS = ("main", "compact")
+# Ritmo nominal de notify del Atlas 2; el intervalo real se aprende de las llegadas.
+EXPECTED_NOTIFY_HZ = {"main": 5.0, "compact": 1.0}
+
+
+class DedupWindow:
+    """Suppresses a packet that the *other* acquisition path delivered within `window_s`.
+
+    With polling running alongside notify, one sample can arrive once by notify and
+    once by a GATT read. Each payload is remembered with the path (`"notify"`/`"poll"`)
+    and arrival `ts_ms` that delivered it; only a copy from the other path within the
+    window is dropped. Identical payloads on the same path are real samples (steady
+    heading, boat at rest) and always pass.
+    """
+
+    def __init__(self, window_s: float = 0.75) -> None:
+        self.window_ms = float(window_s) * 1000.0
+        self._seen: dict[str, dict[bytes, tuple[str, int]]] = {c: {} for c in TELEMETRY_CHARS}
+        self.suppressed: dict[str, int] = {c: 0 for c in TELEMETRY_CHARS}
+
+    def is_duplicate(self, char: str, raw: bytes, source: str, ts_ms: int) -> bool:
+        seen = self._seen.get(char)
+        if seen is None:
+            return False
+        last = seen.get(raw)
+        if last is not None and last[0] != source and abs(ts_ms - last[1]) <= self.window_ms:
+            self.suppressed[char] += 1
+            metrics.BLE_DUPLICATES.labels(char).inc()
+            return True
+        seen[raw] = (source, ts_ms)
+        if len(seen) > 32:
+            cutoff = ts_ms - self.window_ms
+            for key in [k for k, (_, t) in seen.items() if t < cutoff]:
+                del seen[key]
+        return False
+
+
+class AcquisitionController:
+    """Decides, per telemetry characteristic, whether to rely on notify or GATT polling.
+
+    Notify health is judged per characteristic against its own cadence: each one starts
+    from `EXPECTED_NOTIFY_HZ` and learns its observed inter-arrival interval (EWMA). A
+    characteristic needs polling only when no notify has arrived for `stall_factor`
+    intervals (at least `min_stall_s`), so a healthy 1 Hz compact stream is not polled
+    just because it is slower than main. While polling, the interval follows
+    the fraction of reads that return a new value: almost every read changed -> poll
+    faster, mostly repeats -> back off (bounded by `min_interval_s`/`max_interval_s`).
+
+    Callbacks may run outside the event loop thread; they only append to deques.
+    `dedup` is shared by the notify and poll paths and must be used from the loop.
+    """
+
+    def __init__(
+        self,
+        *,
+        window_s: float = 3.0,
+        expected_hz: dict[str, float] | None = None,
+        stall_factor: float = 3.0,
+        min_stall_s: float = 1.0,
+        min_interval_s: float = 0.05,
+        max_interval_s: float = 1.0,
+        initial_interval_s: float = 0.2,
+    ) -> None:
+        self.window_s = float(window_s)
+        self.stall_factor = float(stall_factor)
+        self.min_stall_s = float(min_stall_s)
+        expected = {**EXPECTED_NOTIFY_HZ, **(expected_hz or {})}
+        self._interval: dict[str, float] = {c: 1.0 / expected[c] for c in TELEMETRY_CHARS}
+        self._last_notify: dict[str, float | None] = {c: None for c in TELEMETRY_CHARS}
+        self.min_interval_s = float(min_interval_s)
+        self.max_interval_s = float(max_interval_s)
+        self.poll_interval_s = max(self.min_interval_s, min(self.max_interval_s, initial_interval_s))
+        self._notify: dict[str, deque[float]] = {c: deque() for c in TELEMETRY_CHARS}
+        self._poll_reads: dict[str, deque[tuple[float, bool]]] = {c: deque() for c in TELEMETRY_CHARS}
+        self._polling = False
+        self.dedup = DedupWindow()
+
+    def _trim(self, buf: deque[float], now: float) -> None:
+        cutoff = now - self.window_s
+        while buf and buf[0] < cutoff:
+            buf.popleft()
+
+    def _trim_reads(self, buf: deque[tuple[float, bool]], now: float) -> None:
+        cutoff = now - self.window_s
+        while buf and buf[0][0] < cutoff:
+            buf.popleft()
+
+    def on_notify(self, char: str, now: float | None = None) -> None:
+        buf = self._notify.get(char)
+        if buf is None:
+            return
+        now = time.monotonic() if now is None else now
+        buf.append(now)
+        last = self._last_notify[char]
+        self._last_notify[char] = now
+        if last is not None:
+            # Un corte largo no debe inflar de golpe el intervalo aprendido.
+            gap = min(now - last, 2 * self.stall_after_s(char))
+            self._interval[char] += 0.1 * (gap - self._interval[char])
+
+    def on_poll_read(self, char: str, changed: bool, now: float | None = None) -> None:
+        buf = self._poll_reads.get(char)
+        if buf is not None:
+            buf.append((time.monotonic() if now is None else now, changed))
+
+    def notify_hz(self, char: str, now: float | None = None) -> float:
+        now = time.monotonic() if now is None else now
+        buf = self._notify[char]
+        self._trim(buf, now)
+        return len(buf) / self.window_s
+
+    def stall_after_s(self, char: str) -> float:
+        return max(self.min_stall_s, self.stall_factor * self._interval[char])
+
+    def needs_poll(self, char: str, now: float | None = None) -> bool:
+        last = self._last_notify[char]
+        if last is None:
+            return True
+        now = time.monotonic() if now is None else now
+        return now - last > self.stall_after_s(char)
+
+    def any_needs_poll(self, now: float | None = None) -> bool:
+        now = time.monotonic() if now is None else now
+        return any(self.needs_poll(c, now) for c in TELEMETRY_CHARS)
+
+    def set_polling(self, active: bool) -> None:
+        self._polling = bool(active)
+
+    def adapt_poll_interval(self, now: float | None = None) -> float:
+        now = time.monotonic() if now is None else now
+        # Manda la característica que más cambia: es la que perdería muestras.
+        ratio: float | None = None
+        for buf in self._poll_reads.values():
+            self._trim_reads(buf, now)
+            if len(buf) < 3:
+                continue
+            char_ratio = sum(1 for _, changed in buf if changed) / len(buf)
+            ratio = char_ratio if ratio is None else max(ratio, char_ratio)
+        if ratio is not None:
+            if ratio > 0.8:
+                self.poll_interval_s *= 0.8
+            elif ratio < 0.3:
+                self.poll_interval_s *= 1.25
+            self.poll_interval_s = max(
+                self.min_interval_s, min(self.max_interval_s, self.poll_interval_s)
+            )
+        return self.poll_interval_s
+
+    def mode(self, now: float | None = None) -> str:
+        now = time.monotonic() if now is None else now
+        notify_ok = [not self.needs_poll(c, now) for c in TELEMETRY_CHARS]
+        if all(notify_ok):
+            return "notify"
+        if self._polling:
+            return "mixed" if any(notify_ok) else "poll"
+        return "notify" if any(notify_ok) else "idle"
+
+    def effective_hz(self, char: str, now: float | None = None) -> float:
+        now = time.monotonic() if now is None else now
+        notify = self._notify[char]
+        self._trim(notify, now)
+        polled = self._poll_reads[char]
+        self._trim_reads(polled, now)
+        return (len(notify) + sum(1 for _, changed in polled if changed)) / self.window_s
+
+    def snapshot(self, now: float | None = None) -> dict[str, Any]:
+        now = time.monotonic() if now is None else now
+        return {
+            "mode": self.mode(now),
+            "poll_interval_s": round(self.poll_interval_s, 3) if self._polling else None,
+            "notify_hz": {c: round(self.notify_hz(c, now), 2) for c in TELEMETRY_CHARS},
+            "stall_after_s": {c: round(self.stall_after_s(c), 2) for c in TELEMETRY_CHARS},
+            "effective_hz": {c: round(self.effective_hz(c, now), 2) for c in TELEMETRY_CHARS},
+            "duplicates": dict(self.dedup.suppressed),
+        }
@@ -0,0 +1,398 @@
+from __future__ import annotations
+
+import argparse
+import base64
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import json
+import math
+import struct
+import time
+from typing import Any
+
+from .candidates import CANDIDATE_LAT, CANDIDATE_MIN_BYTES, candidate_len_m
+from .session import SessionStream
+from .util_geo import MPS_TO_KNOTS
+
+GAP_MS = 300  # analyze_gaps: a 10 Hz stream should never stall this long
+JITTER_MS = 250  # analyze_dropouts: small drops (> 250 ms, <= DROPOUT_MS)
+DROPOUT_MS = 5000
+CONN_WINDOW_MS = 500  # check_conn_gap: ± window around each dropout edge
+CONN_WINDOW_MAX = 10
+MAX_DETAILS = 10
+
+
+def _window_row(ts_ms: int, entry: dict[str, Any]) -> dict[str, Any] | None:
+    kind = entry.get("kind")
+    if kind == "dashboard":
+        return {"ts_ms": ts_ms, "kind": kind, "connected": (entry.get("state") or {}).get("connected")}
+    if kind == "ble_rx":
+        return {"ts_ms": ts_ms, "kind": kind, "chan": entry.get("chan")}
+    return None
+
+
+class SessionAnalyzer:
+    """All the per-session reports (gaps, dropouts, connection around dropouts,
+    start-line candidate offsets, (0,0) positions) fed one entry at a time.
+
+    Only the last main packet, the rows around the pending dropout edges and the
+    counters are kept, so memory does not grow with the session.
+    """
+
+    def __init__(self) -> None:
+        self.entries = 0
+        self.kinds: dict[str, int] = {}
+        self.first_ts_ms: int | None = None
+        self.last_ts_ms: int | None = None
+
+        self.main_packets = 0
+        self._last_main: int | None = None
+        self._first_main: int | None = None
+        self.gaps: list[tuple[int, int]] = []  # (ts antes del hueco, duración)
+        self._gap_count = 0
+        self._gap_sum = 0
+        self._gap_max = 0
+        self._jitter_count = 0
+        self._jitter_sum = 0
+
+        # Filas recientes (desde el último main - ventana) y ventanas abiertas tras cada corte
+        self._recent: deque[dict[str, Any]] = deque()
+        self._open_windows: list[dict[str, Any]] = []
+        self.conn_windows: list[dict[str, Any]] = []
+
+        self.candidate_hits: dict[str, int] = {}
+        self.candidate_examples: list[dict[str, Any]] = []
+        self.start_line_events = 0
+
+        self.africa = 0
+        self.valid_positions = 0
+        self.bbox: list[float] | None = None  # [lat_min, lat_max, lon_min, lon_max]
+        self.max_sog_kn: float | None = None
+        self._max_sog_parsed_kn: float | None = None
+        self._follow: Any = None
+        self.follow_toggles: list[tuple[int, Any]] = []
+
+    def feed(self, entry: dict[str, Any]) -> None:
+        index = self.entries
+        self.entries += 1
+        kind = entry.get("kind")
+        self.kinds[str(kind)] = self.kinds.get(str(kind), 0) + 1
+        ts_ms = entry.get("ts_ms")
+        if isinstance(ts_ms, (int, float)):
+            ts_ms = int(ts_ms)
+            if self.first_ts_ms is None:
+                self.first_ts_ms = ts_ms
+            self.last_ts_ms = ts_ms
+            self._track_window(ts_ms, entry)
+        else:
+            ts_ms = None
+
+        if kind == "ble_rx":
+            chan = entry.get("chan")
+            if chan == "main" and ts_ms is not None:
+                self._on_main(ts_ms)
+            raw_b64 = entry.get("raw_b64")
+            if raw_b64:
+                self._scan(index, str(chan), base64.b64decode(raw_b64))
+        elif kind == "ble_parsed":
+            chan = entry.get("chan")
+            if chan == "atlas_start_line_candidates":
+                self.start_line_events += 1
+            elif chan == "main":
+                self._on_parsed_main(entry.get("parsed") or {})
+        elif kind == "dashboard":
+            self._on_dashboard(index, entry.get("state") or {})
+
+    def _track_window(self, ts_ms: int, entry: dict[str, Any]) -> None:
+        row = _window_row(ts_ms, entry)
+        if row is None:
+            return
+        self._recent.append(row)
+        if self._last_main is None:
+            while self._recent[0]["ts_ms"] < ts_ms - CONN_WINDOW_MS:
+                self._recent.popleft()
+        for window in self._open_windows:
+            if ts_ms <= window["at_ms"] + CONN_WINDOW_MS:
+                window["rows"].append(row)
+        if self._open_windows and ts_ms > self._open_windows[0]["at_ms"] + CONN_WINDOW_MS:
+            self._open_windows = [w for w in self._open_windows if ts_ms <= w["at_ms"] + CONN_WINDOW_MS]
+
+    def _on_main(self, ts_ms: int) -> None:
+        self.main_packets += 1
+        last = self._last_main
+        if self._first_main is None:
+            self._first_main = ts_ms
+        self._last_main = ts_ms
+        if last is not None:
+            diff = ts_ms - last
+            if diff > GAP_MS:
+                self._gap_count += 1
+                self._gap_sum += diff
+                self._gap_max = max(self._gap_max, diff)
+                if len(self.gaps) < MAX_DETAILS:
+                    self.gaps.append((last, diff))
+            if JITTER_MS < diff <= DROPOUT_MS:
+                self._jitter_count += 1
+                self._jitter_sum += diff
+            elif diff > DROPOUT_MS:
+                self._on_dropout(last, ts_ms)
+        # El último main delimita lo que puede hacer falta para la ventana del próximo corte
+        while self._recent and self._recent[0]["ts_ms"] < ts_ms - CONN_WINDOW_MS:
+            self._recent.popleft()
+
+    def _on_dropout(self, start_ms: int, end_ms: int) -> None:
+        start_rows = [
+            r for r in self._recent if start_ms - CONN_WINDOW_MS <= r["ts_ms"] <= start_ms + CONN_WINDOW_MS
+        ]
+        end_window = {
+            "at_ms": end_ms,
+            "rows": [r for r in self._recent if end_ms - CONN_WINDOW_MS <= r["ts_ms"] <= end_ms],
+        }
+        self.conn_windows.append({
+            "start_ms": start_ms,
+            "end_ms": end_ms,
+            "gap_s": round((end_ms - start_ms) / 1000.0, 1),
+            "around_start": start_rows,
+            "around_end": end_window["rows"],
+        })
+        self._open_windows.append(end_window)
+
+    def _scan(self, index: int, chan: str, raw: bytes) -> None:
+        n = len(raw)
+        if n < CANDIDATE_MIN_BYTES:
+            return
+        lat_lo, lat_hi = CANDIDATE_LAT
+        # Una lectura por alineación: offset = align + 4 * k
+        for align in range(4):
+            count = (n - align) // 4
+            if count < 4:
+                continue
+            values = struct.unpack_from(f"<{count}f", raw, align)
+            for k in range(count - 3):
+                a_lat = values[k]
+                # Descarte rápido por latitud; el resto de filtros, los de scan_packets
+                if not lat_lo < abs(a_lat) < lat_hi:
+                    continue
+                a_lon, b_lat, b_lon = values[k + 1 : k + 4]
+                dist = candidate_len_m(a_lat, a_lon, b_lat, b_lon)
+                if dist is None:
+                    continue
+                key = f"{chan}@{align + 4 * k}"
+                self.candidate_hits[key] = self.candidate_hits.get(key, 0) + 1
+                if len(self.candidate_examples) < MAX_DETAILS:
+                    self.candidate_examples.append({
+                        "entry": index,
+                        "chan": chan,
+                        "offset": align + 4 * k,
+                        "a": [round(a_lat, 6), round(a_lon, 6)],
+                        "b": [round(b_lat, 6), round(b_lon, 6)],
+                        "len_m": round(dist, 1),
+                    })
+
+    def _on_position(self, lat: Any, lon: Any) -> None:
+        if not isinstance(lat, (int, float)) or not isinstance(lon, (int, float)):
+            return
+        if not (abs(lat) <= 90.0 and abs(lon) <= 180.0) or (abs(lat) < 1.0 and abs(lon) < 1.0):
+            return
+        box = self.bbox
+        if box is None:
+            self.bbox = [lat, lat, lon, lon]
+        else:
+            box[0] = min(box[0], lat)
+            box[1] = max(box[1], lat)
+            box[2] = min(box[2], lon)
+            box[3] = max(box[3], lon)
+
+    def _on_parsed_main(self, parsed: dict[str, Any]) -> None:
+        self._on_position(parsed.get("latitude"), parsed.get("longitude"))
+        field_6 = parsed.get("field_6")
+        if isinstance(field_6, (int, float)) and math.isfinite(field_6):
+            sog = float(field_6) * MPS_TO_KNOTS
+            if self._max_sog_parsed_kn is None or sog > self._max_sog_parsed_kn:
+                self._max_sog_parsed_kn = sog
+
+    def _on_dashboard(self, index: int, state: dict[str, Any]) -> None:
+        sog = state.get("sog_knots")
+        if isinstance(sog, (int, float)) and math.isfinite(sog):
+            if self.max_sog_kn is None or sog > self.max_sog_kn:
+                self.max_sog_kn = float(sog)
+        follow = (state.get("marks") or {}).get("start_line_follow_atlas")
+        if follow != self._follow:
+            self.follow_toggles.append((index, follow))
+            self._follow = follow
+        lat = state.get("latitude")
+        lon = state.get("longitude")
+        if lat is not None and lon is not None:
+            if abs(lat) < 1.0 and abs(lon) < 1.0:
+                self.africa += 1
+            else:
+                self.valid_positions += 1
+            self._on_position(lat, lon)
+
+    def report(self, meta: dict[str, Any] | None = None) -> dict[str, Any]:
+        meta = meta or {}
+        started = meta.get("started_ts_ms") or self._first_main
+        stopped = meta.get("stopped_ts_ms") or self.last_ts_ms
+        # SOG del dashboard (fusionado); si la sesión no lo tiene, field_6 del paquete main
+        max_sog = self.max_sog_kn if self.max_sog_kn is not None else self._max_sog_parsed_kn
+        return {
+            "entries": self.entries,
+            "kinds": self.kinds,
+            "first_ts_ms": self.first_ts_ms,
+            "last_ts_ms": self.last_ts_ms,
+            "duration_s": round((stopped - started) / 1000.0, 1) if started and stopped else None,
+            "started_ts_ms": started,
+            "stopped_ts_ms": stopped,
+            "bbox": [round(v, 6) for v in self.bbox] if self.bbox else None,
+            "max_sog_kn": round(max_sog, 2) if max_sog is not None else None,
+            "gaps": {
+                "main_packets": self.main_packets,
+                "count": self._gap_count,
+                "max_s": round(self._gap_max / 1000.0, 2),
+                "mean_s": round(self._gap_sum / self._gap_count / 1000.0, 2) if self._gap_count else None,
+                "lost_s": round(self._gap_sum / 1000.0, 1),
+                "first": [
+                    {"offset_s": round((ts - self._first_main) / 1000.0, 1), "gap_s": round(d / 1000.0, 2)}
+                    for ts, d in self.gaps
+                ],
+            },
+            "dropouts": {
+                "major": [
+                    {
+                        "offset_s": round((w["start_ms"] - started) / 1000.0, 1) if started else None,
+                        "at": datetime.fromtimestamp(w["start_ms"] / 1000).strftime("%H:%M:%S"),
+                        "restored_after_s": w["gap_s"],
+                    }
+                    for w in self.conn_windows
+                ],
+                "jitter_count": self._jitter_count,
+                "jitter_mean_ms": round(self._jitter_sum / self._jitter_count) if self._jitter_count else None,
+            },
+            "conn_gap": [
+                {
+                    "start_ms": w["start_ms"],
+                    "end_ms": w["end_ms"],
+                    "around_start": w["around_start"][:CONN_WINDOW_MAX],
+                    "around_end": w["around_end"][:CONN_WINDOW_MAX],
+                }
+                for w in self.conn_windows
+            ],
+            "candidates": {
+                "hits_by_offset": dict(sorted(self.candidate_hits.items(), key=lambda kv: -kv[1])),
+                "examples": self.candidate_examples,
+                "start_line_events": self.start_line_events,
+            },
+            "positions": {
+                "africa": self.africa,
+                "valid": self.valid_positions,
+                "follow_atlas_toggles": self.follow_toggles,
+            },
+        }
+
+
+def analyze_file(path: str) -> dict[str, Any]:
+    """Full report of one session in a single streaming pass (picklable worker)."""
+    t0 = time.perf_counter()
+    stream = SessionStream(path)
+    analyzer = SessionAnalyzer()
+    try:
+        for entry in stream:
+            analyzer.feed(entry)
+    except Exception as e:
+        # Un fichero ilegible no debe tumbar un lote (pool de procesos, catálogo)
+        return {"path": path, "error": f"{type(e).__name__}: {e}"}
+    report = analyzer.report(stream.meta)
+    return {
+        "path": path,
+        **report,
+        "truncated": stream.truncated,
+        "analyze_s": round(time.perf_counter() - t0, 3),
+    }
+
+
+def analyze_files(paths: list[str], jobs: int | None = None) -> list[dict[str, Any]]:
+    """One process per file (up to `jobs`); results keep the order of `paths`."""
+    if len(paths) <= 1 or jobs == 1:
+        return [analyze_file(p) for p in paths]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(analyze_file, paths))
+
+
+def _row_text(row: dict[str, Any]) -> str:
+    if row["kind"] == "dashboard":
+        return f"[{row['ts_ms']}] DASH: Connected={row['connected']}"
+    return f"[{row['ts_ms']}] RX: {row['chan']}"
+
+
+def format_report(report: dict[str, Any]) -> str:
+    if "error" in report:
+        return f"== {report['path']}\nERROR: {report['error']}"
+    gaps = report["gaps"]
+    drop = report["dropouts"]
+    cand = report["candidates"]
+    pos = report["positions"]
+    lines = [
+        f"== {report['path']} ({report['analyze_s']}s)"
+        + (" [truncado: segmento en escritura o incompleto]" if report.get("truncated") else ""),
+        f"Total entries: {report['entries']} {report['kinds']}",
+        f"Total Session Duration: {report['duration_s']}s",
+        f"Bounding box (lat_min, lat_max, lon_min, lon_max): {report['bbox']}, max SOG: {report['max_sog_kn']} kn",
+        "",
+        f"Main packets: {gaps['main_packets']}",
+        f"Total gaps > {GAP_MS}ms: {gaps['count']}",
+    ]
+    if gaps["count"]:
+        lines += [
+            f"Max gap: {gaps['max_s']:.2f}s",
+            f"Mean gap size when it cuts: {gaps['mean_s']:.2f}s",
+            f"Total time lost in gaps: {gaps['lost_s']:.1f}s",
+        ]
+        lines += [f"At {g['offset_s']:.1f}s: Gap of {g['gap_s']:.2f}s" for g in gaps["first"]]
+    lines += ["", f"Major Dropouts (> {DROPOUT_MS // 1000} seconds): {len(drop['major'])}"]
+    for d in drop["major"]:
+        lines.append(f"Dropped at offset {d['offset_s']}s (Time: {d['at']}), restored {d['restored_after_s']:.1f}s later")
+    if drop["jitter_count"]:
+        lines.append(f"Frequent jitter Drops (>{JITTER_MS}ms): {drop['jitter_count']} occurrences, average {drop['jitter_mean_ms']}ms")
+    for w in report["conn_gap"]:
+        lines.append(f"--- Around Gap Start ({w['start_ms']}) ---")
+        lines += [_row_text(r) for r in w["around_start"]]
+        lines.append(f"--- Around Gap End ({w['end_ms']}) ---")
+        lines += [_row_text(r) for r in w["around_end"]]
+    lines += ["", f"Start line candidate events: {cand['start_line_events']}"]
+    if cand["hits_by_offset"]:
+        lines.append("Candidate hits by chan@offset: " + ", ".join(f"{k}={v}" for k, v in cand["hits_by_offset"].items()))
+        for ex in cand["examples"]:
+            lines.append(f"Found candidate at entry {ex['entry']}, {ex['chan']} off {ex['offset']}: {ex['a']} -> {ex['b']} (len {ex['len_m']}m)")
+    lines += [
+        "",
+        f"Africa positions (0,0): {pos['africa']}",
+        f"Valid positions: {pos['valid']}",
+        f"Follow Atlas toggles: {pos['follow_atlas_toggles']}",
+    ]
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m vakaroslive.analyze",
+        description=(
+            "Huecos, cortes, conexión alrededor de cada corte, candidatos de línea de salida y "
+            "posiciones (0,0) de sesiones grabadas, en una sola pasada por fichero."
+        ),
+    )
+    parser.add_argument("paths", nargs="+", help="Ficheros vakaroslive_session_*.json.")
+    parser.add_argument("--json", action="store_true", help="Salida JSON (lista de informes).")
+    parser.add_argument(
+        "--jobs", default=None, type=int, help="Procesos en paralelo (por defecto, nº de CPUs)."
+    )
+    args = parser.parse_args()
+    reports = analyze_files(args.paths, args.jobs)
+    if args.json:
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+    else:
+        print("\n\n".join(format_report(r) for r in reports))
+
+
+if __name__ == "__main__":
+    main()
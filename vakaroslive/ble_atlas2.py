@@ -3,7 +3,9 @@ from __future__ import annotations
 import asyncio
 import contextlib
 import logging
+import random
 import re
+import threading
 import time
 from typing import Any
 
@@ -13,6 +15,8 @@ except ModuleNotFoundError:  # pragma: no cover
     BleakClient = None  # type: ignore[assignment]
     BleakScanner = None  # type: ignore[assignment]
 
+from . import metrics
+from .acquisition import TELEMETRY_CHARS, AcquisitionController
 from .atlas2_protocol import (
     DEVICE_NAME_FILTER,
     VAKAROS_CHAR_COMMAND_1,
@@ -24,35 +28,139 @@ from .atlas2_protocol import (
     parse_telemetry_compact,
     parse_telemetry_main,
 )
+from .handoff import PacketHandoff
+from .ingest import IngestQueue
+from .journal import JOURNAL
+from .tracing import TRACER
 
 _MAC_RE = re.compile(r"^[0-9A-Fa-f]{2}([:-][0-9A-Fa-f]{2}){5}$")
 
+# Hijos de métricas resueltos una vez: el hot path solo incrementa.
+_PKT_MAIN_NOTIFY = metrics.BLE_PACKETS.labels("main", "notify")
+_PKT_MAIN_POLL = metrics.BLE_PACKETS.labels("main", "poll")
+_PKT_COMPACT_NOTIFY = metrics.BLE_PACKETS.labels("compact", "notify")
+_PKT_COMPACT_POLL = metrics.BLE_PACKETS.labels("compact", "poll")
+_PKT_CMD1_NOTIFY = metrics.BLE_PACKETS.labels("cmd1", "notify")
+_PKT_CMD2_NOTIFY = metrics.BLE_PACKETS.labels("cmd2", "notify")
+_DECODE_MAIN = metrics.DECODE_SECONDS.labels("main")
+_DECODE_COMPACT = metrics.DECODE_SECONDS.labels("compact")
+
+
+def start_line_event(raw: bytes, source: str, ts_ms: int) -> dict[str, Any] | None:
+    candidates = extract_start_line_candidates(raw)
+    if not candidates:
+        return None
+    return {
+        "type": "atlas_start_line_candidates",
+        "ts_ms": ts_ms,
+        "source": source,
+        "raw_len": len(raw),
+        "raw_hex": raw.hex(),
+        "candidates": candidates,
+    }
+
+
+def decode_notify(char: str, raw: bytes, ts_ms: int, cb_ns: int = 0) -> list[dict[str, Any]]:
+    """Decodes one notified packet into hub events (telemetry and/or start-line candidates).
+
+    Shared by the BLE client and the packet-level load generator (`vakaroslive.mock`),
+    so both exercise the same parse path and decode metrics.
+    """
+    events: list[dict[str, Any]] = []
+    if char == "main":
+        t0 = time.perf_counter()
+        parsed = parse_telemetry_main(raw)
+        _DECODE_MAIN.observe(time.perf_counter() - t0)
+        if parsed:
+            event = {"type": "telemetry_main", "ts_ms": ts_ms, **parsed.__dict__}
+            trace = TRACER.start(cb_ns)
+            if trace is not None:
+                event["_trace"] = trace
+            events.append(event)
+        line = start_line_event(raw, "telemetry_main_notify", ts_ms)
+        if line is not None:
+            events.append(line)
+    elif char == "compact":
+        line = start_line_event(raw, "telemetry_compact_notify", ts_ms)
+        if line is not None:
+            events.append(line)
+        t0 = time.perf_counter()
+        parsed = parse_telemetry_compact(raw)
+        _DECODE_COMPACT.observe(time.perf_counter() - t0)
+        if parsed:
+            event = {
+                "type": "telemetry_compact",
+                "ts_ms": ts_ms,
+                "raw_hex": raw.hex(),
+                **parsed.__dict__,
+            }
+            trace = TRACER.start(cb_ns)
+            if trace is not None:
+                event["_trace"] = trace
+            events.append(event)
+    elif char in ("cmd1", "cmd2"):
+        source = "command_1_notify" if char == "cmd1" else "command_2_notify"
+        line = start_line_event(raw, source, ts_ms)
+        if line is not None:
+            events.append(line)
+    return events
+
 
 class Atlas2BleClient:
     def __init__(
         self,
-        event_queue: asyncio.Queue[dict[str, Any]],
+        event_queue: asyncio.Queue[dict[str, Any]] | IngestQueue,
         device_hint: str | None,
         scan_timeout: float,
         logger: logging.Logger | None = None,
+        direct_retries: int = 3,
+        backoff_base_s: float = 0.5,
+        backoff_max_s: float = 8.0,
+        stable_after_s: float = 10.0,
+        poll_start_delay_s: float = 1.5,
+        no_data_timeout_s: float = 6.0,
+        bleak_client: Any = None,
+        bleak_scanner: Any = None,
+        boat_id: str | None = None,
     ) -> None:
         self._event_queue = event_queue
+        self.boat_id = boat_id  # etiqueta de las entradas del journal en modo flota
         self._device_hint = device_hint
         self._scan_timeout = scan_timeout
         self._logger = logger or logging.getLogger(__name__)
+        # Punto de inyección: `vakaroslive.fake_ble` sustituye a bleak en pruebas/benchmarks.
+        self._client_cls = bleak_client or BleakClient
+        self._scanner_cls = bleak_scanner or BleakScanner
+        self._poll_start_delay_s = float(poll_start_delay_s)
+        self._no_data_timeout_s = float(no_data_timeout_s)
+
+        # Reconexión rápida: se reintenta la última dirección conocida sin scan completo
+        # (backoff exponencial con jitter) y solo tras `direct_retries` fallos se escanea.
+        # Una conexión cuenta como fallo salvo que haya durado `stable_after_s` sin error.
+        self._direct_retries = max(0, int(direct_retries))
+        self._backoff_base_s = float(backoff_base_s)
+        self._backoff_max_s = float(backoff_max_s)
+        self._stable_after_s = float(stable_after_s)
+        self._last_address: str | None = None
+        self._connect_failures = 0
+        self._dropped_at_mono: float | None = None
+        self.last_reconnect_s: float | None = None
 
         self._stop = asyncio.Event()
         self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self.handoff: PacketHandoff | None = None
         self._disconnected = asyncio.Event()
+        self.acquisition: AcquisitionController | None = None
 
     async def stop(self) -> None:
         self._stop.set()
 
     async def scan(self, timeout: float | None = None) -> list[dict[str, Any]]:
-        if BleakScanner is None:
+        if self._scanner_cls is None:
             raise RuntimeError("Dependencia faltante: instala `bleak` (pip -r requirements.txt).")
         timeout = float(timeout or self._scan_timeout)
-        devices = await BleakScanner.discover(timeout=timeout)
+        devices = await self._scanner_cls.discover(timeout=timeout)
 
         results: list[dict[str, Any]] = []
         for d in devices:
@@ -69,13 +177,16 @@ class Atlas2BleClient:
         return results
 
     def _enqueue(self, event: dict[str, Any]) -> None:
+        # IngestQueue nunca lanza QueueFull; el descarte del más antiguo solo aplica a
+        # un asyncio.Queue acotado.
         try:
             self._event_queue.put_nowait(event)
         except asyncio.QueueFull:
             try:
-                _ = self._event_queue.get_nowait()
+                dropped = self._event_queue.get_nowait()
             except asyncio.QueueEmpty:
                 return
+            metrics.QUEUE_DROPS.labels(str(dropped.get("type"))).inc()
             try:
                 self._event_queue.put_nowait(event)
             except asyncio.QueueFull:
@@ -84,6 +195,9 @@ class Atlas2BleClient:
     def _emit(self, event: dict[str, Any]) -> None:
         if self._loop is None:
             return
+        if self._loop_thread_id == threading.get_ident():
+            self._enqueue(event)
+            return
         self._loop.call_soon_threadsafe(self._enqueue, event)
 
     @staticmethod
@@ -125,16 +239,83 @@ class Atlas2BleClient:
 
         return None
 
-    def _on_disconnect(self, _: BleakClient) -> None:
+    def _backoff_delay(self) -> float:
+        if self._connect_failures <= 0:
+            return 0.0
+        delay = min(self._backoff_max_s, self._backoff_base_s * 2 ** (self._connect_failures - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _wait_backoff(self, address: str | None, wake_on_advertisement: bool = True) -> None:
+        """Waits the backoff delay, or less if the Atlas is seen advertising again.
+
+        The advertisement shortcut only makes sense after a failed connect (out of
+        range); it never cuts the wait below `backoff_base_s`, so an Atlas that is
+        visible but keeps failing still backs off.
+        """
+        delay = self._backoff_delay()
+        if delay <= 0.0:
+            return
+        seen = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        target = (address or "").upper()
+        earliest = loop.time() + min(delay, self._backoff_base_s)
+
+        def on_advertisement(device: Any, _: Any) -> None:
+            if target and str(getattr(device, "address", "")).upper() == target and loop.time() >= earliest:
+                loop.call_soon_threadsafe(seen.set)
+
+        scanner: Any = None
+        if wake_on_advertisement and target and self._scanner_cls is not None:
+            try:
+                scanner = self._scanner_cls(detection_callback=on_advertisement)
+                await scanner.start()
+            except Exception as exc:
+                self._logger.debug("Scanner pasivo no disponible: %s", exc)
+                scanner = None
+        try:
+            wake_tasks = [
+                asyncio.create_task(seen.wait()),
+                asyncio.create_task(self._stop.wait()),
+            ]
+            _, pending = await asyncio.wait(
+                wake_tasks, timeout=delay, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in pending:
+                task.cancel()
+            if seen.is_set():
+                self._logger.info("Atlas visible de nuevo (%s); reconectando ya.", address)
+        finally:
+            if scanner is not None:
+                with contextlib.suppress(Exception):
+                    await scanner.stop()
+
+    async def _next_address(self) -> str | None:
+        if self._last_address is not None and self._connect_failures < self._direct_retries:
+            return self._last_address
+        if self._last_address is not None:
+            self._logger.info(
+                "%d reintentos directos fallidos; escaneando...", self._connect_failures
+            )
+        address = await self._find_device_address()
+        if address is not None and address != self._last_address:
+            self._last_address = address
+            self._connect_failures = 0
+        elif address is not None:
+            # Misma dirección tras el scan: otra tanda de reintentos directos.
+            self._connect_failures = 0
+        return address
+
+    def _on_disconnect(self, _: Any) -> None:
         if self._loop is None:
             return
         self._loop.call_soon_threadsafe(self._disconnected.set)
 
     async def run(self) -> None:
         self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
         self._emit({"type": "status", "ts_ms": int(time.time() * 1000), "connected": False})
 
-        if BleakClient is None or BleakScanner is None:
+        if self._client_cls is None or self._scanner_cls is None:
             self._logger.error(
                 "`bleak` no esta instalado. Ejecuta: pip install -r requirements.txt"
             )
@@ -150,7 +331,7 @@ class Atlas2BleClient:
             return
 
         while not self._stop.is_set():
-            address = await self._find_device_address()
+            address = await self._next_address()
             if not address:
                 self._emit(
                     {
@@ -166,16 +347,29 @@ class Atlas2BleClient:
 
             self._disconnected.clear()
             self._logger.info("Conectando a %s ...", address)
-            client: BleakClient | None = None
+            client: Any = None
             connected = False
+            connected_at = 0.0
             had_error = False
             warned_no_data = False
             cleared_no_data = False
             first_data = asyncio.Event()
+            acq = AcquisitionController()
+            self.acquisition = acq
             try:
-                client = BleakClient(address, disconnected_callback=self._on_disconnect)
+                client = self._client_cls(address, disconnected_callback=self._on_disconnect)
                 await client.connect()
                 connected = True
+                connected_at = time.monotonic()
+                metrics.BLE_CONNECTS.inc()
+                self._last_address = address
+                reconnect_ms: int | None = None
+                if self._dropped_at_mono is not None:
+                    self.last_reconnect_s = time.monotonic() - self._dropped_at_mono
+                    self._dropped_at_mono = None
+                    reconnect_ms = int(self.last_reconnect_s * 1000)
+                    metrics.BLE_RECONNECT_SECONDS.observe(self.last_reconnect_s)
+                    self._logger.info("Reconectado en %.1f s.", self.last_reconnect_s)
 
                 self._emit(
                     {
@@ -184,6 +378,7 @@ class Atlas2BleClient:
                         "connected": True,
                         "device_address": address,
                         "error": None,
+                        "reconnect_ms": reconnect_ms,
                     }
                 )
 
@@ -204,68 +399,62 @@ class Atlas2BleClient:
                             }
                         )
 
-                def maybe_emit_start_line(raw: bytes, source: str) -> None:
-                    candidates = extract_start_line_candidates(raw)
-                    if not candidates:
-                        return
-                    self._emit(
-                        {
-                            "type": "atlas_start_line_candidates",
-                            "ts_ms": int(time.time() * 1000),
-                            "source": source,
-                            "raw_len": len(raw),
-                            "raw_hex": raw.hex(),
-                            "candidates": candidates,
-                        }
+                def maybe_emit_start_line(raw: bytes, source: str, ts_ms: int | None = None) -> None:
+                    event = start_line_event(
+                        raw, source, ts_ms if ts_ms is not None else int(time.time() * 1000)
+                    )
+                    if event is not None:
+                        self._emit(event)
+
+                # Los callbacks de notify solo copian el paquete al buffer de hand-off; la
+                # decodificación y el encolado se hacen por lotes en el loop (ver PacketHandoff).
+                def process_notify(char: str, raw: bytes, ts_ms: int, cb_ns: int) -> None:
+                    mark_data_received()
+                    # Como el grabador del navegador: todo lo recibido, antes del dedup.
+                    JOURNAL.record_rx(char, raw, ts_ms, self.boat_id)
+                    if char == "main":
+                        acq.on_notify("main")
+                        if acq.dedup.is_duplicate("main", raw, "notify", ts_ms):
+                            return
+                        # Debug log to file
+                        with open("logs/raw_packets.log", "a") as f:
+                            f.write(f"MAIN: {raw.hex()}\n")
+                    elif char == "compact":
+                        acq.on_notify("compact")
+                        if acq.dedup.is_duplicate("compact", raw, "notify", ts_ms):
+                            return
+                    for event in decode_notify(char, raw, ts_ms, cb_ns):
+                        self._enqueue(event)
+
+                handoff = PacketHandoff(self._loop, process_notify)
+                handoff.bind_loop_thread()
+                self.handoff = handoff
+
+                def on_main(_: int, data: bytearray) -> None:
+                    _PKT_MAIN_NOTIFY.inc()
+                    handoff.push(
+                        "main",
+                        bytes(data),
+                        int(time.time() * 1000),
+                        time.monotonic_ns() if TRACER.enabled else 0,
                     )
-
-                def on_main(_: int, data: bytearray):
-                    if self._loop is not None:
-                        self._loop.call_soon_threadsafe(mark_data_received)
-                    raw = bytes(data)
-                    # Debug log to file
-                    with open("logs/raw_packets.log", "a") as f:
-                        f.write(f"MAIN: {raw.hex()}\n")
-                    
-                    parsed = parse_telemetry_main(raw)
-                    if parsed:
-                        self._emit(
-                            {
-                                "type": "telemetry_main",
-                                "ts_ms": int(time.time() * 1000),
-                                **parsed.__dict__,
-                            }
-                        )
-                    maybe_emit_start_line(raw, "telemetry_main_notify")
 
                 def on_compact(_: int, data: bytearray) -> None:
-                    raw = bytes(data)
-                    maybe_emit_start_line(raw, "telemetry_compact_notify")
-                    parsed = parse_telemetry_compact(raw)
-                    if not parsed:
-                        return
-                    self._emit(
-                        {
-                            "type": "telemetry_compact",
-                            "ts_ms": int(time.time() * 1000),
-                            "raw_hex": raw.hex(),
-                            **parsed.__dict__,
-                        }
+                    _PKT_COMPACT_NOTIFY.inc()
+                    handoff.push(
+                        "compact",
+                        bytes(data),
+                        int(time.time() * 1000),
+                        time.monotonic_ns() if TRACER.enabled else 0,
                     )
-                    if self._loop is not None:
-                        self._loop.call_soon_threadsafe(mark_data_received)
 
                 def on_cmd1(_: int, data: bytearray) -> None:
-                    raw = bytes(data)
-                    maybe_emit_start_line(raw, "command_1_notify")
-                    if self._loop is not None:
-                        self._loop.call_soon_threadsafe(mark_data_received)
+                    _PKT_CMD1_NOTIFY.inc()
+                    handoff.push("cmd1", bytes(data), int(time.time() * 1000))
 
                 def on_cmd2(_: int, data: bytearray) -> None:
-                    raw = bytes(data)
-                    maybe_emit_start_line(raw, "command_2_notify")
-                    if self._loop is not None:
-                        self._loop.call_soon_threadsafe(mark_data_received)
+                    _PKT_CMD2_NOTIFY.inc()
+                    handoff.push("cmd2", bytes(data), int(time.time() * 1000))
 
                 await client.start_notify(VAKAROS_CHAR_TELEMETRY_MAIN, on_main)
                 await client.start_notify(VAKAROS_CHAR_TELEMETRY_COMPACT, on_compact)
@@ -282,8 +471,8 @@ class Atlas2BleClient:
 
                 async def poll_telemetry_loop() -> None:
                     # Fallback: en algunos setups (WinRT) no llegan notificaciones, pero el valor se
-                    # puede leer por GATT. Poll a ~5 Hz para soporte en tiempo real.
-                    poll_interval_s = 0.2
+                    # puede leer por GATT. Solo se leen las características cuyo notify no está
+                    # sano, y el intervalo se adapta al ritmo de cambios (ver AcquisitionController).
                     last_main: bytes | None = None
                     last_compact: bytes | None = None
                     last_cmd1: bytes | None = None
@@ -292,43 +481,87 @@ class Atlas2BleClient:
                     cmd2_readable = True
                     last_cmd_poll = 0.0
 
+                    acq.set_polling(True)
                     while not self._stop.is_set() and not self._disconnected.is_set():
+                        if not acq.any_needs_poll():
+                            self._logger.info("Notificaciones estables; se detiene el polling.")
+                            break
                         try:
-                            raw_main = bytes(
-                                await client.read_gatt_char(VAKAROS_CHAR_TELEMETRY_MAIN)
+                            raw_main = (
+                                bytes(await client.read_gatt_char(VAKAROS_CHAR_TELEMETRY_MAIN))
+                                if acq.needs_poll("main")
+                                else None
                             )
-                            if raw_main and raw_main != last_main:
-                                maybe_emit_start_line(raw_main, "telemetry_main_poll")
+                            read_ns = time.monotonic_ns() if TRACER.enabled else 0
+                            read_ts_ms = int(time.time() * 1000)
+                            fresh_main = bool(raw_main) and raw_main != last_main
+                            if fresh_main:
+                                last_main = raw_main
+                                # El mismo paquete puede haber llegado ya por notify.
+                                fresh_main = not acq.dedup.is_duplicate(
+                                    "main", raw_main, "poll", read_ts_ms
+                                )
+                            if raw_main is not None:
+                                acq.on_poll_read("main", fresh_main)
+                            if fresh_main:
+                                _PKT_MAIN_POLL.inc()
+                                JOURNAL.record_rx(
+                                    "main", raw_main, read_ts_ms, self.boat_id, "poll"
+                                )
+                                maybe_emit_start_line(raw_main, "telemetry_main_poll", read_ts_ms)
+                                t0 = time.perf_counter()
                                 parsed = parse_telemetry_main(raw_main)
+                                _DECODE_MAIN.observe(time.perf_counter() - t0)
                                 if parsed:
-                                    self._emit(
-                                        {
-                                            "type": "telemetry_main",
-                                            "ts_ms": int(time.time() * 1000),
-                                            "raw_hex": raw_main.hex(),
-                                            **parsed.__dict__,
-                                        }
-                                    )
+                                    event = {
+                                        "type": "telemetry_main",
+                                        "ts_ms": read_ts_ms,
+                                        "raw_hex": raw_main.hex(),
+                                        **parsed.__dict__,
+                                    }
+                                    trace = TRACER.start(read_ns)
+                                    if trace is not None:
+                                        event["_trace"] = trace
+                                    self._emit(event)
                                     mark_data_received()
-                                last_main = raw_main
 
-                            raw_compact = bytes(
-                                await client.read_gatt_char(VAKAROS_CHAR_TELEMETRY_COMPACT)
+                            raw_compact = (
+                                bytes(await client.read_gatt_char(VAKAROS_CHAR_TELEMETRY_COMPACT))
+                                if acq.needs_poll("compact")
+                                else None
                             )
-                            if raw_compact and raw_compact != last_compact:
-                                maybe_emit_start_line(raw_compact, "telemetry_compact_poll")
+                            read_ns = time.monotonic_ns() if TRACER.enabled else 0
+                            read_ts_ms = int(time.time() * 1000)
+                            fresh_compact = bool(raw_compact) and raw_compact != last_compact
+                            if fresh_compact:
+                                last_compact = raw_compact
+                                # El mismo paquete puede haber llegado ya por notify.
+                                fresh_compact = not acq.dedup.is_duplicate(
+                                    "compact", raw_compact, "poll", read_ts_ms
+                                )
+                            if raw_compact is not None:
+                                acq.on_poll_read("compact", fresh_compact)
+                            if fresh_compact:
+                                _PKT_COMPACT_POLL.inc()
+                                JOURNAL.record_rx(
+                                    "compact", raw_compact, read_ts_ms, self.boat_id, "poll"
+                                )
+                                maybe_emit_start_line(raw_compact, "telemetry_compact_poll", read_ts_ms)
+                                t0 = time.perf_counter()
                                 parsed = parse_telemetry_compact(raw_compact)
+                                _DECODE_COMPACT.observe(time.perf_counter() - t0)
                                 if parsed:
-                                    self._emit(
-                                        {
-                                            "type": "telemetry_compact",
-                                            "ts_ms": int(time.time() * 1000),
-                                            "raw_hex": raw_compact.hex(),
-                                            **parsed.__dict__,
-                                        }
-                                    )
+                                    event = {
+                                        "type": "telemetry_compact",
+                                        "ts_ms": read_ts_ms,
+                                        "raw_hex": raw_compact.hex(),
+                                        **parsed.__dict__,
+                                    }
+                                    trace = TRACER.start(read_ns)
+                                    if trace is not None:
+                                        event["_trace"] = trace
+                                    self._emit(event)
                                     mark_data_received()
-                                last_compact = raw_compact
 
                             now_mono = time.monotonic()
                             if now_mono - last_cmd_poll >= 1.0:
@@ -339,6 +572,9 @@ class Atlas2BleClient:
                                             await client.read_gatt_char(VAKAROS_CHAR_COMMAND_1)
                                         )
                                         if raw_cmd1 and raw_cmd1 != last_cmd1:
+                                            JOURNAL.record_rx(
+                                                "cmd1", raw_cmd1, int(time.time() * 1000), self.boat_id, "poll"
+                                            )
                                             maybe_emit_start_line(raw_cmd1, "command_1_poll")
                                             last_cmd1 = raw_cmd1
                                     except Exception as exc:
@@ -353,6 +589,9 @@ class Atlas2BleClient:
                                             await client.read_gatt_char(VAKAROS_CHAR_COMMAND_2)
                                         )
                                         if raw_cmd2 and raw_cmd2 != last_cmd2:
+                                            JOURNAL.record_rx(
+                                                "cmd2", raw_cmd2, int(time.time() * 1000), self.boat_id, "poll"
+                                            )
                                             maybe_emit_start_line(raw_cmd2, "command_2_poll")
                                             last_cmd2 = raw_cmd2
                                     except Exception as exc:
@@ -365,12 +604,13 @@ class Atlas2BleClient:
                             self._logger.debug("Poll read failed: %s", exc)
                             break
 
-                        await asyncio.sleep(poll_interval_s)
+                        await asyncio.sleep(acq.adapt_poll_interval())
+                    acq.set_polling(False)
 
                 async def no_data_watchdog() -> None:
                     nonlocal warned_no_data
                     try:
-                        await asyncio.wait_for(first_data.wait(), timeout=6.0)
+                        await asyncio.wait_for(first_data.wait(), timeout=self._no_data_timeout_s)
                     except asyncio.TimeoutError:
                         warned_no_data = True
                         self._logger.warning(
@@ -399,12 +639,37 @@ class Atlas2BleClient:
 
                 watch_task = asyncio.create_task(no_data_watchdog(), name="no_data_watchdog")
                 # En la práctica, en Windows a veces NO llegan notifies aunque el valor cambie.
-                # Arrancamos polling tras un pequeño delay si no llega nada.
+                # Arrancamos polling tras un pequeño delay si no llega nada, y lo reactivamos
+                # si los notifies dejan de ser sanos más adelante.
                 async def delayed_poll_start() -> None:
-                    await asyncio.sleep(1.5)
+                    await asyncio.sleep(self._poll_start_delay_s)
                     if not first_data.is_set():
                         self._logger.info("Sin notificaciones; activando polling...")
                         start_polling()
+                    last_report: dict[str, Any] | None = None
+                    last_report_mono = 0.0
+                    while True:
+                        await asyncio.sleep(1.0)
+                        if acq.any_needs_poll() and (poll_task is None or poll_task.done()):
+                            stalled = [c for c in TELEMETRY_CHARS if acq.needs_poll(c)]
+                            self._logger.info("Notify detenido en %s; activando polling...", stalled)
+                            start_polling()
+                        report = acq.snapshot()
+                        now_mono = time.monotonic()
+                        if (
+                            last_report is None
+                            or report["mode"] != last_report["mode"]
+                            or now_mono - last_report_mono >= 5.0
+                        ):
+                            last_report = report
+                            last_report_mono = now_mono
+                            self._emit(
+                                {
+                                    "type": "acquisition",
+                                    "ts_ms": int(time.time() * 1000),
+                                    **report,
+                                }
+                            )
 
                 delayed_poll_task = asyncio.create_task(
                     delayed_poll_start(), name="delayed_poll_start"
@@ -434,6 +699,9 @@ class Atlas2BleClient:
                         await poll_task
             except Exception as exc:
                 had_error = True
+                if not connected:
+                    metrics.BLE_CONNECT_ERRORS.inc()
+                    self._connect_failures += 1
                 self._logger.exception("Error BLE: %s", exc)
                 self._emit(
                     {
@@ -444,7 +712,6 @@ class Atlas2BleClient:
                         "error": str(exc),
                     }
                 )
-                await asyncio.sleep(2.0)
             finally:
                 if client is not None:
                     try:
@@ -452,6 +719,16 @@ class Atlas2BleClient:
                             await client.disconnect()
                     except Exception:
                         pass
+                if connected:
+                    metrics.BLE_DISCONNECTS.inc()
+                    self._dropped_at_mono = time.monotonic()
+                    if self._dropped_at_mono - connected_at >= self._stable_after_s:
+                        # Enlace sano: un corte limpio se reintenta ya; un error, tras el backoff mínimo.
+                        self._connect_failures = 1 if had_error else 0
+                    else:
+                        # Conecta y cae enseguida (start_notify o GATT fallan): sin esto se
+                        # reintentaría en bucle sin espera.
+                        self._connect_failures += 1
                 if connected and not had_error:
                     self._emit(
                         {
@@ -462,3 +739,6 @@ class Atlas2BleClient:
                             "error": None,
                         }
                     )
+
+            if not self._stop.is_set():
+                await self._wait_backoff(address, wake_on_advertisement=not connected)
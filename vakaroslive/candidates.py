@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+from .util_geo import EARTH_RADIUS_M, haversine_m
+
+# Un candidato de línea de salida son 4 float32 seguidos: (a_lat, a_lon, b_lat, b_lon)
+CANDIDATE_LAT = (35.0, 65.0)
+CANDIDATE_LEN_M = (5.0, 2000.0)
+CANDIDATE_MIN_BYTES = 16
+
+
+def lat_in_range(lat: float) -> bool:
+    lat_lo, lat_hi = CANDIDATE_LAT
+    return lat_lo < abs(lat) < lat_hi
+
+
+def candidate_len_m(a_lat: float, a_lon: float, b_lat: float, b_lon: float) -> float | None:
+    """Line length if the quad passes every candidate filter, else None.
+
+    Same rules as `scan_packets`: both latitudes in `CANDIDATE_LAT`, finite longitudes
+    within ±180 and a length in `CANDIDATE_LEN_M`.
+    """
+    if not (lat_in_range(a_lat) and lat_in_range(b_lat)):
+        return None
+    if not (math.isfinite(a_lon) and math.isfinite(b_lon) and abs(a_lon) <= 180 and abs(b_lon) <= 180):
+        return None
+    dist = haversine_m(a_lat, a_lon, b_lat, b_lon)
+    len_lo, len_hi = CANDIDATE_LEN_M
+    if not (len_lo <= dist <= len_hi):
+        return None
+    return dist
+
+
+def haversine_m_array(lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """Vectorized haversine (arrays in degrees, float64 result)."""
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = np.radians(lon2 - lon1)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arctan2(np.sqrt(a), np.sqrt(np.clip(1 - a, 0, None)))
+
+
+def scan_packets(packets: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Candidate lines in a (N, L) uint8 stack of equal-length packets.
+
+    For each alignment (0..3) the stack is reinterpreted once as float32 columns, so the
+    4 floats at byte offset `align + 4*j` are columns j..j+3: every offset of every packet
+    is tested with a handful of array ops, with the rules of `candidate_len_m`. Returns
+    `(rows, offsets, quads)` of the hits, `quads` being (a_lat, a_lon, b_lat, b_lon, len_m).
+    """
+    n, length = packets.shape
+    lat_lo, lat_hi = CANDIDATE_LAT
+    len_lo, len_hi = CANDIDATE_LEN_M
+    rows_out, offs_out, quads_out = [], [], []
+    for align in range(4):
+        k = (length - align) // 4
+        if k < 4:
+            continue
+        with np.errstate(invalid="ignore", over="ignore"):
+            floats = np.ascontiguousarray(packets[:, align:align + 4 * k]).view("<f4").astype(np.float64)
+            a_lat, a_lon = floats[:, : k - 3], floats[:, 1 : k - 2]
+            b_lat, b_lon = floats[:, 2 : k - 1], floats[:, 3:]
+            mask = (np.abs(a_lat) > lat_lo) & (np.abs(a_lat) < lat_hi)
+            mask &= (np.abs(b_lat) > lat_lo) & (np.abs(b_lat) < lat_hi)
+            mask &= np.isfinite(a_lon) & np.isfinite(b_lon)
+            mask &= (np.abs(a_lon) <= 180) & (np.abs(b_lon) <= 180)
+            rows, cols = np.nonzero(mask)
+            dist = haversine_m_array(a_lat[rows, cols], a_lon[rows, cols], b_lat[rows, cols], b_lon[rows, cols])
+        keep = (dist >= len_lo) & (dist <= len_hi)
+        rows, cols = rows[keep], cols[keep]
+        rows_out.append(rows)
+        offs_out.append(align + 4 * cols)
+        quads_out.append(np.stack(
+            [a_lat[rows, cols], a_lon[rows, cols], b_lat[rows, cols], b_lon[rows, cols], dist[keep]], axis=1
+        ))
+    if not rows_out:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros((0, 5))
+    return np.concatenate(rows_out), np.concatenate(offs_out), np.concatenate(quads_out)
@@ -0,0 +1,356 @@
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import hashlib
+import json
+import math
+import os
+from pathlib import Path
+import sqlite3
+import time
+from typing import Any, Iterable
+
+from .analyze import analyze_file
+from .session import NDJSON_SUFFIXES
+
+DEFAULT_DB = Path("logs") / "sessions.sqlite"
+SESSION_GLOBS = ("vakaroslive_session_*.json", "vakaroslive_journal_*.ndjson*")
+SCHEMA_VERSION = 2
+# Un fichero modificado hace menos de esto se considera en escritura (journal activo)
+SETTLE_S = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    sha1 TEXT NOT NULL,
+    indexed_at REAL NOT NULL,
+    started_ts_ms INTEGER,
+    stopped_ts_ms INTEGER,
+    duration_s REAL,
+    lat_min REAL,
+    lat_max REAL,
+    lon_min REAL,
+    lon_max REAL,
+    entries INTEGER,
+    ble_rx INTEGER,
+    ble_parsed INTEGER,
+    dashboard INTEGER,
+    main_packets INTEGER,
+    gap_count INTEGER,
+    gap_max_s REAL,
+    gap_lost_s REAL,
+    dropouts INTEGER,
+    jitter_count INTEGER,
+    max_sog_kn REAL,
+    start_line_hits INTEGER,
+    start_line_seen INTEGER,
+    africa_positions INTEGER,
+    truncated INTEGER,
+    error TEXT,
+    report TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_started ON sessions (started_ts_ms);
+CREATE INDEX IF NOT EXISTS sessions_sog ON sessions (max_sog_kn);
+CREATE INDEX IF NOT EXISTS sessions_lat ON sessions (lat_min, lat_max);
+"""
+
+_COLUMNS = (
+    "path", "mtime", "size", "sha1", "indexed_at", "started_ts_ms", "stopped_ts_ms", "duration_s",
+    "lat_min", "lat_max", "lon_min", "lon_max", "entries", "ble_rx", "ble_parsed", "dashboard",
+    "main_packets", "gap_count", "gap_max_s", "gap_lost_s", "dropouts", "jitter_count", "max_sog_kn",
+    "start_line_hits", "start_line_seen", "africa_positions", "truncated", "error", "report",
+)
+
+
+def file_sha1(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _summarize(path: str, known_sha1: str | None) -> tuple[str, dict[str, Any] | None]:
+    """Worker: hash, and only analyze if the content changed (touch without edit = no parse)."""
+    try:
+        sha1 = file_sha1(path)
+    except OSError as e:
+        return "", {"path": path, "error": f"{type(e).__name__}: {e}"}
+    if sha1 == known_sha1:
+        return sha1, None
+    return sha1, analyze_file(path)
+
+
+def _row(path: str, stat: os.stat_result, sha1: str, report: dict[str, Any]) -> dict[str, Any]:
+    kinds = report.get("kinds") or {}
+    gaps = report.get("gaps") or {}
+    dropouts = report.get("dropouts") or {}
+    candidates = report.get("candidates") or {}
+    bbox = report.get("bbox") or [None] * 4
+    hits = sum((candidates.get("hits_by_offset") or {}).values())
+    return {
+        "path": path,
+        "mtime": stat.st_mtime,
+        "size": stat.st_size,
+        "sha1": sha1,
+        "indexed_at": time.time(),
+        "started_ts_ms": report.get("started_ts_ms"),
+        "stopped_ts_ms": report.get("stopped_ts_ms"),
+        "duration_s": report.get("duration_s"),
+        "lat_min": bbox[0],
+        "lat_max": bbox[1],
+        "lon_min": bbox[2],
+        "lon_max": bbox[3],
+        "entries": report.get("entries"),
+        "ble_rx": kinds.get("ble_rx", 0),
+        "ble_parsed": kinds.get("ble_parsed", 0),
+        "dashboard": kinds.get("dashboard", 0),
+        "main_packets": gaps.get("main_packets"),
+        "gap_count": gaps.get("count"),
+        "gap_max_s": gaps.get("max_s"),
+        "gap_lost_s": gaps.get("lost_s"),
+        "dropouts": len(dropouts.get("major") or []),
+        "jitter_count": dropouts.get("jitter_count"),
+        "max_sog_kn": report.get("max_sog_kn"),
+        "start_line_hits": hits,
+        "start_line_seen": int(hits > 0 or bool(candidates.get("start_line_events"))),
+        "africa_positions": (report.get("positions") or {}).get("africa"),
+        "truncated": int(bool(report.get("truncated"))),
+        "error": report.get("error"),
+        "report": json.dumps(report, ensure_ascii=False),
+    }
+
+
+class SessionCatalog:
+    """SQLite (WAL) catalogue of recorded sessions, one summary row per file.
+
+    A file is re-analyzed only when its mtime or size changed *and* its SHA-1 differs
+    from the stored one; a copy or `touch` only refreshes `mtime`. Summaries come from
+    `vakaroslive.analyze` (one streaming pass, files spread over a process pool). Files
+    modified in the last `settle_s` seconds (the journal segment being recorded) are
+    left for a later run, and a file that cannot be read gets a row with `error` set.
+    """
+
+    def __init__(self, db_path: Path | str = DEFAULT_DB, settle_s: float = SETTLE_S) -> None:
+        self.db_path = Path(db_path)
+        self.settle_s = float(settle_s)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # Solo es una caché de resúmenes: con otro esquema se reconstruye
+            self.conn.execute("DROP TABLE IF EXISTS sessions")
+        self.conn.executescript(_SCHEMA)
+        self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    @staticmethod
+    def discover(paths: Iterable[str]) -> list[str]:
+        """Files as given plus session/journal files found under the given directories."""
+        found: list[str] = []
+        for p in paths:
+            path = Path(p)
+            if path.is_dir():
+                for pattern in SESSION_GLOBS:
+                    found.extend(str(f.resolve()) for f in path.rglob(pattern) if f.is_file())
+            elif path.is_file():
+                found.append(str(path.resolve()))
+        # Los .columns/.tsidx son derivados, no sesiones
+        return sorted({f for f in found if f.endswith(".json") or f.endswith(NDJSON_SUFFIXES)})
+
+    def index(self, paths: Iterable[str], jobs: int | None = None) -> dict[str, int]:
+        files = self.discover(paths)
+        known = {
+            row["path"]: row for row in self.conn.execute("SELECT path, mtime, size, sha1 FROM sessions")
+        }
+        stats = {"files": len(files), "unchanged": 0, "in_progress": 0, "touched": 0, "indexed": 0}
+        todo: list[tuple[str, os.stat_result, str | None]] = []
+        now = time.time()
+        for path in files:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if now - st.st_mtime < self.settle_s:
+                stats["in_progress"] += 1
+                continue
+            row = known.get(path)
+            if row is not None and row["mtime"] == st.st_mtime and row["size"] == st.st_size:
+                stats["unchanged"] += 1
+                continue
+            todo.append((path, st, row["sha1"] if row is not None and row["size"] == st.st_size else None))
+        if not todo:
+            return stats
+
+        if len(todo) == 1 or jobs == 1:
+            results = [_summarize(path, sha1) for path, _, sha1 in todo]
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(_summarize, [t[0] for t in todo], [t[2] for t in todo]))
+
+        with self.conn:
+            for (path, st, _), (sha1, report) in zip(todo, results):
+                if report is None:
+                    self.conn.execute("UPDATE sessions SET mtime = ? WHERE path = ?", (st.st_mtime, path))
+                    stats["touched"] += 1
+                    continue
+                row = _row(path, st, sha1, report)
+                self.conn.execute(
+                    f"INSERT OR REPLACE INTO sessions ({', '.join(_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' for _ in _COLUMNS)})",
+                    [row[c] for c in _COLUMNS],
+                )
+                stats["indexed"] += 1
+        return stats
+
+    def prune(self) -> int:
+        """Drops rows whose file no longer exists."""
+        gone = [row["path"] for row in self.conn.execute("SELECT path FROM sessions") if not os.path.exists(row["path"])]
+        with self.conn:
+            self.conn.executemany("DELETE FROM sessions WHERE path = ?", [(p,) for p in gone])
+        return len(gone)
+
+    def query(
+        self,
+        since_ts_ms: int | None = None,
+        until_ts_ms: int | None = None,
+        min_sog_kn: float | None = None,
+        near: tuple[float, float] | None = None,
+        radius_km: float = 5.0,
+        start_line: bool | None = None,
+        limit: int = 100,
+    ) -> list[dict[str, Any]]:
+        """Sessions matching every given filter, newest first.
+
+        `near` keeps sessions whose bounding box intersects a `radius_km` box around
+        the point (the venue).
+        """
+        where: list[str] = []
+        args: list[Any] = []
+        if since_ts_ms is not None:
+            where.append("started_ts_ms >= ?")
+            args.append(since_ts_ms)
+        if until_ts_ms is not None:
+            where.append("started_ts_ms < ?")
+            args.append(until_ts_ms)
+        if min_sog_kn is not None:
+            where.append("max_sog_kn >= ?")
+            args.append(min_sog_kn)
+        if near is not None:
+            lat, lon = near
+            dlat = radius_km / 111.32
+            dlon = radius_km / (111.32 * max(0.01, math.cos(math.radians(lat))))
+            where.append("lat_max >= ? AND lat_min <= ? AND lon_max >= ? AND lon_min <= ?")
+            args.extend([lat - dlat, lat + dlat, lon - dlon, lon + dlon])
+        if start_line is not None:
+            where.append("start_line_seen = ?")
+            args.append(int(start_line))
+        sql = "SELECT * FROM sessions"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY started_ts_ms DESC LIMIT ?"
+        args.append(int(limit))
+        return [{k: row[k] for k in row.keys() if k != "report"} for row in self.conn.execute(sql, args)]
+
+
+def _parse_day(value: str) -> int:
+    return int(datetime.fromisoformat(value).timestamp() * 1000)
+
+
+def _format_row(row: dict[str, Any]) -> str:
+    started = (
+        datetime.fromtimestamp(row["started_ts_ms"] / 1000).strftime("%Y-%m-%d %H:%M")
+        if row["started_ts_ms"]
+        else "?"
+    )
+    bbox = (
+        f"({(row['lat_min'] + row['lat_max']) / 2:.4f}, {(row['lon_min'] + row['lon_max']) / 2:.4f})"
+        if row["lat_min"] is not None
+        else "(sin posición)"
+    )
+    return (
+        f"{started}  {row['duration_s'] or 0:>7.0f}s  {bbox:>22}  max {row['max_sog_kn'] or 0:5.1f} kn  "
+        f"rx {row['ble_rx']:>6}  huecos {row['gap_count'] or 0:>3}  cortes {row['dropouts'] or 0:>2}  "
+        f"línea {'sí' if row['start_line_seen'] else 'no'}  {os.path.basename(row['path'])}"
+        + ("  (truncada)" if row["truncated"] else "")
+        + (f"  ERROR {row['error']}" if row["error"] else "")
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m vakaroslive.catalog",
+        description="Catálogo SQLite de sesiones grabadas (resúmenes precalculados).",
+    )
+    parser.add_argument("--db", default=str(DEFAULT_DB), help="Base de datos SQLite.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_index = sub.add_parser("index", help="Indexa (incrementalmente) ficheros o directorios.")
+    p_index.add_argument("paths", nargs="+")
+    p_index.add_argument("--jobs", default=None, type=int, help="Procesos en paralelo.")
+    p_index.add_argument("--prune", action="store_true", help="Borra sesiones cuyo fichero ya no existe.")
+    p_index.add_argument(
+        "--settle-s",
+        default=SETTLE_S,
+        type=float,
+        help="Ignora ficheros modificados hace menos de N s (journal grabando).",
+    )
+
+    p_query = sub.add_parser("query", help="Busca sesiones.")
+    p_query.add_argument("--since", default=None, help="Desde (YYYY-MM-DD[THH:MM]).")
+    p_query.add_argument("--until", default=None, help="Hasta (YYYY-MM-DD[THH:MM]).")
+    p_query.add_argument("--days", default=None, type=float, help="Últimos N días.")
+    p_query.add_argument("--min-sog", default=None, type=float, help="SOG máximo de la sesión >= nudos.")
+    p_query.add_argument("--near", default=None, help="lat,lon del campo de regatas.")
+    p_query.add_argument("--km", default=5.0, type=float, help="Radio para --near.")
+    p_query.add_argument("--start-line", action="store_true", help="Solo con candidatos de línea de salida.")
+    p_query.add_argument("--limit", default=100, type=int)
+    p_query.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    catalog = SessionCatalog(args.db)
+    try:
+        if args.command == "index":
+            catalog.settle_s = args.settle_s
+            t0 = time.perf_counter()
+            stats = catalog.index(args.paths, jobs=args.jobs)
+            if args.prune:
+                stats["pruned"] = catalog.prune()
+            print(f"{stats} en {time.perf_counter() - t0:.2f}s")
+            return
+        since = _parse_day(args.since) if args.since else None
+        if args.days is not None:
+            since = int((time.time() - args.days * 86400) * 1000)
+        near = None
+        if args.near:
+            lat, _, lon = args.near.partition(",")
+            near = (float(lat), float(lon))
+        rows = catalog.query(
+            since_ts_ms=since,
+            until_ts_ms=_parse_day(args.until) if args.until else None,
+            min_sog_kn=args.min_sog,
+            near=near,
+            radius_km=args.km,
+            start_line=True if args.start_line else None,
+            limit=args.limit,
+        )
+        if args.json:
+            print(json.dumps(rows, ensure_ascii=False, indent=2))
+        else:
+            for row in rows:
+                print(_format_row(row))
+            print(f"# {len(rows)} sesiones")
+    finally:
+        catalog.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Any, Callable, Iterable
+
+from .atlas2_protocol import (
+    VAKAROS_CHAR_COMMAND_1,
+    VAKAROS_CHAR_COMMAND_2,
+    VAKAROS_CHAR_TELEMETRY_COMPACT,
+    VAKAROS_CHAR_TELEMETRY_MAIN,
+    VAKAROS_SERVICE_UUID,
+)
+
+
+class FakeBleakError(Exception):
+    """Raised where bleak would raise `BleakError`."""
+
+
+class FakeDevice:
+    def __init__(self, name: str, address: str, rssi: int = -60) -> None:
+        self.name = name
+        self.address = address
+        self.rssi = rssi
+        self.metadata = {"uuids": [VAKAROS_SERVICE_UUID]}
+
+
+class FakeAtlas:
+    """Scriptable in-process Atlas 2: GATT values, notifications, drops and failures.
+
+    One `FakeAtlas` backs any number of `FakeBleakClient`s created by `client()`;
+    `scanner` stands in for the `BleakScanner` class (`discover()` plus the passive
+    `detection_callback` scanner). Notifications are delivered on the caller's thread,
+    so a script driven from the event loop is fully deterministic.
+    """
+
+    def __init__(
+        self,
+        address: str = "FA:KE:00:00:00:01",
+        name: str = "Atlas 2 (fake)",
+        *,
+        connect_latency_s: float = 0.0,
+        read_latency_s: float = 0.0,
+    ) -> None:
+        self.device = FakeDevice(name, address)
+        self.connect_latency_s = connect_latency_s
+        self.read_latency_s = read_latency_s
+        self.advertising = True
+        self.values: dict[str, bytes] = {
+            VAKAROS_CHAR_TELEMETRY_MAIN: b"",
+            VAKAROS_CHAR_TELEMETRY_COMPACT: b"",
+            VAKAROS_CHAR_COMMAND_1: b"",
+            VAKAROS_CHAR_COMMAND_2: b"",
+        }
+        # Simula backends (WinRT) donde el notify se acepta pero nunca llega.
+        self.notify_delivery: dict[str, bool] = {uuid: True for uuid in self.values}
+        self.unreadable: set[str] = set()
+        self.writes: list[tuple[str, bytes]] = []
+        self.reads: dict[str, int] = {uuid: 0 for uuid in self.values}
+        self.on_write: Callable[[str, bytes], None] | None = None
+        self.connects = 0
+        self.drops = 0
+        self._connect_failures = 0
+        self._read_failures = 0
+        self._active: FakeBleakClient | None = None
+        self.scanner = _FakeScannerFactory(self)
+
+    # -- API del cliente falso -------------------------------------------------------
+    def client(self, address: Any, disconnected_callback: Any = None, **_: Any) -> FakeBleakClient:
+        return FakeBleakClient(self, address, disconnected_callback)
+
+    @property
+    def connected(self) -> bool:
+        return self._active is not None and self._active.is_connected
+
+    # -- Guion ----------------------------------------------------------------------
+    def fail_connects(self, n: int) -> None:
+        """The next `n` `connect()` calls raise `FakeBleakError`."""
+        self._connect_failures = max(0, int(n))
+
+    def fail_reads(self, n: int) -> None:
+        """The next `n` `read_gatt_char()` calls raise `FakeBleakError`."""
+        self._read_failures = max(0, int(n))
+
+    def set_value(self, uuid: str, data: bytes, *, notify: bool = True) -> None:
+        """Updates the readable value and, if subscribed and delivering, notifies it."""
+        self.values[uuid] = bytes(data)
+        client = self._active
+        if notify and client is not None and self.notify_delivery.get(uuid, True):
+            client._deliver(uuid, bytes(data))
+
+    def drop(self, readvertise_after_s: float | None = 0.0) -> None:
+        """Injected link loss: the client sees a disconnect callback.
+
+        With `readvertise_after_s=None` the Atlas stays invisible until
+        `advertising` is set back to True.
+        """
+        self.drops += 1
+        client = self._active
+        self._active = None
+        if client is not None:
+            client._lost()
+        if readvertise_after_s is not None and readvertise_after_s <= 0:
+            return
+        self.advertising = False
+        if readvertise_after_s is not None:
+            asyncio.get_running_loop().call_later(
+                readvertise_after_s, setattr, self, "advertising", True
+            )
+
+    async def play(
+        self, packets: Iterable[tuple[float, str, bytes]], *, speed: float = 1.0
+    ) -> int:
+        """Plays `(t_s, char_uuid, data)` in time order; `speed > 1` runs faster than real time.
+
+        Packets that fall due together are delivered back-to-back, like one BLE
+        connection event. Returns the number of packets delivered.
+        """
+        start = time.perf_counter()
+        sent = 0
+        for t_s, uuid, data in packets:
+            delay = t_s / speed - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.set_value(uuid, data)
+            sent += 1
+        return sent
+
+    # -- Interno --------------------------------------------------------------------
+    async def _connect(self, client: FakeBleakClient) -> None:
+        if self.connect_latency_s > 0:
+            await asyncio.sleep(self.connect_latency_s)
+        if self._connect_failures > 0:
+            self._connect_failures -= 1
+            raise FakeBleakError("fake: connection failed")
+        if not self.advertising:
+            raise FakeBleakError(f"fake: device {self.device.address} not found")
+        if self._active is not None and self._active is not client:
+            raise FakeBleakError("fake: already connected to another central")
+        self._active = client
+        self.connects += 1
+
+    async def _read(self, uuid: str) -> bytes:
+        self.reads[uuid] = self.reads.get(uuid, 0) + 1
+        if self.read_latency_s > 0:
+            await asyncio.sleep(self.read_latency_s)
+        if self._read_failures > 0:
+            self._read_failures -= 1
+            raise FakeBleakError("fake: read failed")
+        if uuid in self.unreadable:
+            raise FakeBleakError(f"fake: characteristic {uuid} is not readable")
+        return self.values.get(uuid, b"")
+
+
+class FakeBleakClient:
+    """Subset of `bleak.BleakClient` used by the bridge and the MCP manager (`atlas2_mcp.fake_ble`)."""
+
+    def __init__(self, atlas: FakeAtlas, address: Any, disconnected_callback: Any = None) -> None:
+        self._atlas = atlas
+        self.address = str(getattr(address, "address", address))
+        self._disconnected_callback = disconnected_callback
+        self._callbacks: dict[str, Callable[[int, bytearray], None]] = {}
+        self.is_connected = False
+
+    async def __aenter__(self) -> FakeBleakClient:
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        await self.disconnect()
+
+    async def connect(self, **_: Any) -> bool:
+        if self.address.upper() != self._atlas.device.address.upper():
+            raise FakeBleakError(f"fake: device {self.address} not found")
+        await self._atlas._connect(self)
+        self.is_connected = True
+        return True
+
+    async def disconnect(self) -> bool:
+        if self.is_connected:
+            self.is_connected = False
+            self._callbacks.clear()
+            if self._atlas._active is self:
+                self._atlas._active = None
+            if self._disconnected_callback is not None:
+                self._disconnected_callback(self)
+        return True
+
+    async def start_notify(self, uuid: str, callback: Callable[[int, bytearray], None], **_: Any) -> None:
+        self._require_connected()
+        if uuid not in self._atlas.values:
+            raise FakeBleakError(f"fake: characteristic {uuid} not found")
+        self._callbacks[uuid] = callback
+
+    async def stop_notify(self, uuid: str) -> None:
+        self._callbacks.pop(uuid, None)
+
+    async def read_gatt_char(self, uuid: str, **_: Any) -> bytearray:
+        self._require_connected()
+        return bytearray(await self._atlas._read(uuid))
+
+    async def write_gatt_char(self, uuid: str, data: bytes, response: bool = False) -> None:
+        self._require_connected()
+        self._atlas.writes.append((uuid, bytes(data)))
+        if self._atlas.on_write is not None:
+            self._atlas.on_write(uuid, bytes(data))
+
+    def _require_connected(self) -> None:
+        if not self.is_connected:
+            raise FakeBleakError("fake: not connected")
+
+    def _deliver(self, uuid: str, data: bytes) -> None:
+        callback = self._callbacks.get(uuid)
+        if callback is not None:
+            callback(0, bytearray(data))
+
+    def _lost(self) -> None:
+        self.is_connected = False
+        self._callbacks.clear()
+        if self._disconnected_callback is not None:
+            self._disconnected_callback(self)
+
+
+class FakeBleakScanner:
+    def __init__(self, atlas: FakeAtlas, detection_callback: Any = None) -> None:
+        self._atlas = atlas
+        self._callback = detection_callback
+        self._task: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _watch(self) -> None:
+        # Un anuncio cada 100 ms mientras el Atlas sea visible.
+        while True:
+            if self._atlas.advertising and self._callback is not None:
+                self._callback(self._atlas.device, None)
+            await asyncio.sleep(0.1)
+
+
+class _FakeScannerFactory:
+    """Callable like the `BleakScanner` class, with its static `discover()`."""
+
+    def __init__(self, atlas: FakeAtlas) -> None:
+        self._atlas = atlas
+        self.discovers = 0
+
+    def __call__(self, detection_callback: Any = None, **_: Any) -> FakeBleakScanner:
+        return FakeBleakScanner(self._atlas, detection_callback)
+
+    async def discover(self, timeout: float = 5.0, **_: Any) -> list[FakeDevice]:
+        self.discovers += 1
+        # Un scan real dura `timeout`; aquí basta con ceder el loop.
+        await asyncio.sleep(0)
+        return [self._atlas.device] if self._atlas.advertising else []
+
+
+async def run_pipeline_benchmark(
+    seconds: float, rate_hz: float, speed: float, drop_every_s: float, notify_compact: bool
+) -> dict[str, Any]:
+    """Drives `Atlas2BleClient` + `TelemetryHub` against a `FakeAtlas` at `speed`x real time."""
+    import logging
+
+    from .ble_atlas2 import Atlas2BleClient
+    from .ingest import IngestQueue
+    from .mock import LoadProfile, BoatSim, encode_start_line
+    from .server import TelemetryHub
+
+    atlas = FakeAtlas()
+    atlas.notify_delivery[VAKAROS_CHAR_TELEMETRY_COMPACT] = notify_compact
+    queue = IngestQueue()
+    hub = TelemetryHub(queue)
+    ble = Atlas2BleClient(
+        queue,
+        device_hint=atlas.device.address,
+        scan_timeout=0.1,
+        logger=logging.getLogger("vakaroslive.fake_ble"),
+        backoff_base_s=0.05,
+        backoff_max_s=0.2,
+        stable_after_s=0.5,
+        poll_start_delay_s=0.2,
+        no_data_timeout_s=1.0,
+        bleak_client=atlas.client,
+        bleak_scanner=atlas.scanner,
+    )
+
+    # Guion: main a `rate_hz`, compact a 1 Hz y una línea de salida cada 10 s (tiempo simulado).
+    sim = BoatSim(0, LoadProfile(), random.Random(0))
+    step = 1.0 / rate_hz
+    script: list[tuple[float, str, bytes]] = []
+    n = int(seconds * speed * rate_hz)
+    for i in range(n):
+        t = i * step
+        sim.step(step)
+        script.append((t, VAKAROS_CHAR_TELEMETRY_MAIN, sim.main_packet()))
+        if i % max(1, int(rate_hz)) == 0:
+            script.append((t, VAKAROS_CHAR_TELEMETRY_COMPACT, sim.compact_packet()))
+        if i % max(1, int(rate_hz * 10)) == 0:
+            script.append(
+                (t, VAKAROS_CHAR_COMMAND_1, encode_start_line(42.232, -8.7345, 42.232, -8.7327))
+            )
+
+    async def drops() -> None:
+        while drop_every_s > 0:
+            await asyncio.sleep(drop_every_s)
+            atlas.drop(readvertise_after_s=0.0)
+
+    hub_task = asyncio.create_task(hub.run())
+    ble_task = asyncio.create_task(ble.run())
+    while not atlas.connected:
+        await asyncio.sleep(0.01)
+    drop_task = asyncio.create_task(drops())
+    t0 = time.perf_counter()
+    cpu0 = time.process_time()
+    delivered = await atlas.play(script, speed=speed)
+    drop_task.cancel()
+    await asyncio.sleep(0.3)
+    elapsed = time.perf_counter() - t0
+    cpu = time.process_time() - cpu0
+    acquisition = ble.acquisition.snapshot() if ble.acquisition is not None else None
+    await ble.stop()
+    for task in (ble_task, hub_task):
+        task.cancel()
+    await asyncio.gather(drop_task, ble_task, hub_task, return_exceptions=True)
+
+    simulated_s = n * step
+    return {
+        "simulated_s": round(simulated_s, 1),
+        "wall_s": round(elapsed, 3),
+        "speedup": round(simulated_s / elapsed, 1),
+        "packets_scripted": len(script),
+        "packets_delivered": delivered,
+        "events_processed": hub.events_processed,
+        "connects": atlas.connects,
+        "drops": atlas.drops,
+        "last_reconnect_ms": (
+            None if ble.last_reconnect_s is None else round(ble.last_reconnect_s * 1000.0, 1)
+        ),
+        "acquisition": acquisition,
+        "cpu_s": round(cpu, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m vakaroslive.fake_ble",
+        description="Pipeline BLE completo contra un Atlas simulado (sin hardware).",
+    )
+    parser.add_argument("--seconds", default=3.0, type=float, help="Duración real del guion.")
+    parser.add_argument("--rate-hz", default=10.0, type=float, help="Paquetes main/s simulados.")
+    parser.add_argument("--speed", default=20.0, type=float, help="Veces más rápido que real.")
+    parser.add_argument(
+        "--drop-every", default=1.0, type=float, help="Segundos reales entre cortes (0 = nunca)."
+    )
+    parser.add_argument(
+        "--no-compact-notify",
+        action="store_true",
+        help="El compact no llega por notify (ejercita el fallback de polling).",
+    )
+    args = parser.parse_args()
+    result = asyncio.run(
+        run_pipeline_benchmark(
+            args.seconds, args.rate_hz, args.speed, args.drop_every, not args.no_compact_notify
+        )
+    )
+    for key, value in result.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
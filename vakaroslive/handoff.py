@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import deque
+import struct
+import threading
+import time
+from typing import Any, Callable
+
+
+class PacketHandoff:
+    """Batched hand-off of raw BLE packets from notify callbacks to the event loop.
+
+    `push` may be called from any thread: it appends `(char, raw, ts_ms, cb_ns)` to a buffer
+    and only schedules a loop wake-up when the buffer goes from empty to non-empty.
+    The loop-side drain then calls `handler` for the whole batch, so a burst of
+    notifications costs one self-pipe write instead of several per packet.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        handler: Callable[[str, bytes, int, int], None],
+    ) -> None:
+        self._loop = loop
+        self._handler = handler
+        self._buf: deque[tuple[str, bytes, int, int]] = deque()
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._loop_thread_id: int | None = None
+        self.wakeups = 0
+        self.packets = 0
+        self.batches = 0
+        self.max_batch = 0
+
+    def bind_loop_thread(self) -> None:
+        """Call from the loop thread so same-thread pushes skip the self-pipe."""
+        self._loop_thread_id = threading.get_ident()
+
+    def push(self, char: str, raw: bytes, ts_ms: int, cb_ns: int = 0) -> None:
+        """`cb_ns` is the callback's `monotonic_ns()` when latency tracing is on, else 0."""
+        with self._lock:
+            self._buf.append((char, raw, ts_ms, cb_ns))
+            self.packets += 1
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.wakeups += 1
+        if self._loop_thread_id == threading.get_ident():
+            self._loop.call_soon(self._drain)
+        else:
+            self._loop.call_soon_threadsafe(self._drain)
+
+    def _drain(self) -> None:
+        with self._lock:
+            batch = list(self._buf)
+            self._buf.clear()
+            self._scheduled = False
+        self.batches += 1
+        if len(batch) > self.max_batch:
+            self.max_batch = len(batch)
+        for char, raw, ts_ms, cb_ns in batch:
+            self._handler(char, raw, ts_ms, cb_ns)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "packets": self.packets,
+            "wakeups": self.wakeups,
+            "batches": self.batches,
+            "max_batch": self.max_batch,
+        }
+
+
+def _sample_main_packet(i: int) -> bytes:
+    head = bytes([0x02, 0x0A]) + bytes(6)
+    body = struct.pack(
+        "<fffffff", 42.23 + i * 1e-6, -8.73, float(i % 360), 1.0, 2.0, 3.0, 90.0
+    )
+    return head + body
+
+
+async def _bench_one(
+    rate_hz: float, seconds: float, batched: bool, burst: int = 1
+) -> dict[str, Any]:
+    """Producer thread at `rate_hz` notifications/s emulating bleak callback threads.
+
+    `burst > 1` delivers packets back-to-back in groups, as BLE stacks do when several
+    notifications land in the same connection event.
+    """
+    from .atlas2_protocol import parse_telemetry_main
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+    wakeups = 0
+    legacy_packets = 0
+
+    def mark_data_received() -> None:
+        return None
+
+    def process(char: str, raw: bytes, ts_ms: int, cb_ns: int) -> None:
+        mark_data_received()
+        parsed = parse_telemetry_main(raw)
+        if parsed:
+            queue.put_nowait({"type": "telemetry_main", "ts_ms": ts_ms, **parsed.__dict__})
+
+    handoff = PacketHandoff(loop, process)
+    handoff.bind_loop_thread()
+
+    def legacy_callback(raw: bytes) -> None:
+        # Ruta anterior: un call_soon_threadsafe para mark_data_received y otro por evento.
+        nonlocal wakeups, legacy_packets
+        legacy_packets += 1
+        wakeups += 1
+        loop.call_soon_threadsafe(mark_data_received)
+        parsed = parse_telemetry_main(raw)
+        if parsed:
+            event = {"type": "telemetry_main", "ts_ms": int(time.time() * 1000), **parsed.__dict__}
+            wakeups += 1
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    stop = threading.Event()
+
+    def producer() -> None:
+        interval = burst / rate_hz
+        next_t = time.perf_counter()
+        i = 0
+        while not stop.is_set():
+            for _ in range(burst):
+                raw = _sample_main_packet(i)
+                if batched:
+                    handoff.push("main", raw, int(time.time() * 1000))
+                else:
+                    legacy_callback(raw)
+                i += 1
+            next_t += interval
+            delay = next_t - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    async def consumer() -> None:
+        while True:
+            await queue.get()
+
+    consumer_task = asyncio.create_task(consumer())
+    thread = threading.Thread(target=producer, daemon=True)
+    cpu0 = time.process_time()
+    thread.start()
+    await asyncio.sleep(seconds)
+    stop.set()
+    await asyncio.to_thread(thread.join)
+    await asyncio.sleep(0.05)
+    cpu = time.process_time() - cpu0
+    consumer_task.cancel()
+    return {
+        "mode": "batched" if batched else "legacy",
+        "rate_hz": rate_hz,
+        "packets": handoff.packets if batched else legacy_packets,
+        "wakeups": handoff.wakeups if batched else wakeups,
+        "cpu_ms": round(cpu * 1000.0, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m vakaroslive.handoff",
+        description="Compara wake-ups del loop y CPU: hand-off por paquete vs por lotes.",
+    )
+    parser.add_argument("--rates", default="10,20,50", help="Notificaciones/s, separadas por coma.")
+    parser.add_argument("--seconds", default=5.0, type=float)
+    parser.add_argument(
+        "--burst", default=1, type=int, help="Paquetes seguidos por evento de conexión."
+    )
+    args = parser.parse_args()
+
+    async def run_all() -> None:
+        for rate in [float(r) for r in args.rates.split(",") if r.strip()]:
+            for batched in (False, True):
+                result = await _bench_one(rate, args.seconds, batched, max(1, args.burst))
+                print(
+                    f"{result['mode']:>7} @ {rate:>5.0f} Hz: packets={result['packets']:>5} "
+                    f"wakeups={result['wakeups']:>5} cpu={result['cpu_ms']} ms"
+                )
+
+    asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
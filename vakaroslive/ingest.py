@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+import itertools
+from typing import Any
+
+from . import metrics
+
+# Eventos de telemetría que se pueden fusionar (latest wins); todo lo demás es control.
+TELEMETRY_EVENT_TYPES = ("telemetry_main", "telemetry_compact")
+
+
+class IngestQueue:
+    """Priority-aware replacement for the hub's `asyncio.Queue`.
+
+    Control events (`status`, `atlas_start_line_candidates`, commands...) go to an
+    unbounded FIFO and are never dropped. Telemetry has a latest-wins slot per
+    characteristic: a sample still pending when the next one arrives is replaced (and
+    counted in `coalesced`), so the hub never works through superseded samples.
+    `telemetry_depth > 1` keeps that many pending samples per lane instead. Arrival
+    order across lanes is preserved.
+
+    Same producer/consumer surface as `asyncio.Queue` (`put_nowait`, `get`,
+    `get_nowait`, `qsize`, `empty`); `put_nowait` never raises. Must be used from the
+    event loop thread.
+    """
+
+    def __init__(self, telemetry_depth: int = 1) -> None:
+        if telemetry_depth < 1:
+            raise ValueError("telemetry_depth must be >= 1")
+        self._seq = itertools.count()
+        self._control: deque[tuple[int, dict[str, Any]]] = deque()
+        self._lanes: dict[str, deque[tuple[int, dict[str, Any]]]] = {
+            etype: deque(maxlen=telemetry_depth) for etype in TELEMETRY_EVENT_TYPES
+        }
+        self._lane_list = [self._control, *self._lanes.values()]
+        self._coalesced_metrics = {
+            etype: metrics.QUEUE_COALESCED.labels(etype) for etype in TELEMETRY_EVENT_TYPES
+        }
+        self.coalesced: dict[str, int] = {etype: 0 for etype in TELEMETRY_EVENT_TYPES}
+        self._size = 0
+        self._not_empty = asyncio.Event()
+
+    def qsize(self) -> int:
+        return self._size
+
+    def empty(self) -> bool:
+        return self._size == 0
+
+    def put_nowait(self, event: dict[str, Any]) -> None:
+        item = (next(self._seq), event)
+        lane = self._lanes.get(event.get("type"))  # type: ignore[arg-type]
+        if lane is None:
+            self._control.append(item)
+            self._size += 1
+        elif len(lane) == lane.maxlen:
+            etype = event["type"]
+            lane.append(item)  # deque(maxlen) descarta la muestra pendiente superada
+            self.coalesced[etype] += 1
+            self._coalesced_metrics[etype].inc()
+        else:
+            lane.append(item)
+            self._size += 1
+        self._not_empty.set()
+
+    def get_nowait(self) -> dict[str, Any]:
+        best: deque[tuple[int, dict[str, Any]]] | None = None
+        for lane in self._lane_list:
+            if lane and (best is None or lane[0][0] < best[0][0]):
+                best = lane
+        if best is None:
+            raise asyncio.QueueEmpty
+        self._size -= 1
+        return best.popleft()[1]
+
+    async def get(self) -> dict[str, Any]:
+        while self._size == 0:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        return self.get_nowait()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "depth": self._size,
+            "control": len(self._control),
+            "telemetry": {etype: len(lane) for etype, lane in self._lanes.items()},
+            "coalesced": dict(self.coalesced),
+        }
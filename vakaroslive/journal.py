@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import base64
+from datetime import datetime, timezone
+import gzip
+import json
+import logging
+from pathlib import Path
+import queue
+import threading
+import time
+from typing import Any, BinaryIO
+
+from . import metrics
+
+try:
+    import zstandard  # type: ignore
+except Exception:  # pragma: no cover
+    zstandard = None  # type: ignore
+
+# Nombres de canal del grabador del navegador (app.js), para que las herramientas de sesión lean ambos
+RX_CHAN_NAMES = {"main": "main", "compact": "compact", "cmd1": "command_1", "cmd2": "command_2"}
+PARSED_CHANS = {"telemetry_main": "main", "telemetry_compact": "compact"}
+COMPRESSIONS = ("gzip", "zstd", "none")
+
+_logger = logging.getLogger(__name__)
+
+
+class JournalStopping(RuntimeError):
+    """`start()` called while a previous `stop()` is still draining the writer."""
+
+
+class SessionJournal:
+    """Server-side session recording as append-only NDJSON segments.
+
+    Entries use the browser recorder's shape (`{"ts_ms", "kind", ...}` with kinds
+    `ble_rx`, `ble_parsed`, `dashboard` and `command`), one JSON object per line,
+    with a `meta` line at the head of each segment. There is no entry cap: a new
+    segment is started every `rotate_mb` of uncompressed data.
+
+    `record_*` run on the event loop and only append to an in-memory chunk; full chunks
+    go to a writer thread through a queue of at most `max_pending` chunks, so the
+    footprint is bounded by `chunk_kb * (max_pending + 1)`. If the disk falls behind,
+    whole chunks are dropped and counted instead of growing the queue.
+
+    `stop()` blocks until the writer has drained; from the event loop call it with
+    `await asyncio.to_thread(JOURNAL.stop)`. Until it returns `stopping` is true and
+    `start()` raises `JournalStopping`.
+    """
+
+    def __init__(
+        self,
+        directory: Path | None = None,
+        compression: str = "gzip",
+        rotate_mb: float = 64.0,
+        chunk_kb: int = 256,
+        max_pending: int = 8,
+        flush_s: float = 1.0,
+        dashboard_hz: float = 1.0,
+    ) -> None:
+        self.active = False
+        self.stopping = False
+        self.configure(directory, compression, rotate_mb, chunk_kb, max_pending, flush_s, dashboard_hz)
+        self._buf: list[str] = []
+        self._buf_bytes = 0
+        # stop() puede correr en otro hilo (to_thread) mientras el loop sigue grabando.
+        self._buf_lock = threading.Lock()
+        # start()/stop() desde el loop y desde to_thread: transiciones de estado atómicas
+        self._ctl_lock = threading.Lock()
+        self._last_flush = 0.0
+        self._last_dashboard: dict[str | None, float] = {}
+        self._queue: queue.Queue[bytes | None] | None = None
+        self._thread: threading.Thread | None = None
+        self._reset_counters()
+
+    def configure(
+        self,
+        directory: Path | None = None,
+        compression: str = "gzip",
+        rotate_mb: float = 64.0,
+        chunk_kb: int = 256,
+        max_pending: int = 8,
+        flush_s: float = 1.0,
+        dashboard_hz: float = 1.0,
+    ) -> None:
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Compresión no soportada: {compression}")
+        if compression == "zstd" and zstandard is None:
+            _logger.warning("zstandard no está instalado; el journal usa gzip.")
+            compression = "gzip"
+        self.directory = directory
+        self.compression = compression
+        self.rotate_bytes = int(rotate_mb * 1024 * 1024)
+        self.chunk_bytes = int(chunk_kb) * 1024
+        self.max_pending = max(1, int(max_pending))
+        self.flush_s = float(flush_s)
+        self.dashboard_interval_s = 1.0 / dashboard_hz if dashboard_hz > 0 else 0.0
+
+    def _reset_counters(self) -> None:
+        self.entries = 0
+        self.bytes_in = 0
+        self.dropped_chunks = 0
+        self.files: list[str] = []
+        self.started_ts_ms: int | None = None
+        self.stopped_ts_ms: int | None = None
+
+    # --- control ---
+
+    def start(self) -> dict[str, Any]:
+        with self._ctl_lock:
+            if self.stopping:
+                raise JournalStopping("El journal aún se está cerrando; reintenta en un momento.")
+            if self.active:
+                return self.status()
+            if self.directory is None:
+                raise RuntimeError("Journal sin directorio (configure(directory=...)).")
+            self._reset_counters()
+            self.started_ts_ms = int(time.time() * 1000)
+            self._queue = queue.Queue(maxsize=self.max_pending)
+            self._thread = threading.Thread(
+                target=self._writer, args=(self._queue, self.started_ts_ms), name="journal", daemon=True
+            )
+            self._thread.start()
+            self._last_flush = time.monotonic()
+            self._last_dashboard.clear()
+            self.active = True
+        _logger.info("Journal de sesión activo en %s", self.directory)
+        return self.status()
+
+    def stop(self) -> dict[str, Any]:
+        """Flushes and closes the current segment (blocks until the writer finishes)."""
+        with self._ctl_lock:
+            if not self.active:
+                return self.status()
+            self.active = False
+            self.stopping = True
+            self.stopped_ts_ms = int(time.time() * 1000)
+            # Se desenganchan la cola y el hilo de esta sesión: un _flush del loop que llegue
+            # después ya no puede encolar detrás del centinela.
+            with self._buf_lock:
+                chunks, thread = self._queue, self._thread
+                data = self._take_buf()
+                self._queue = None
+                self._thread = None
+        try:
+            if chunks is not None and thread is not None:
+                if data:
+                    self._put(chunks, data)
+                # Como mucho `max_pending` chunks por escribir; si el escritor murió, no hay que esperarle
+                if thread.is_alive():
+                    chunks.put(None)
+                thread.join()
+        finally:
+            with self._ctl_lock:
+                self.stopping = False
+        _logger.info("Journal detenido: %s entradas en %s", self.entries, self.files)
+        return self.status()
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "active": self.active,
+            "stopping": self.stopping,
+            "directory": str(self.directory) if self.directory is not None else None,
+            "compression": self.compression,
+            "started_ts_ms": self.started_ts_ms,
+            "stopped_ts_ms": self.stopped_ts_ms,
+            "entries": self.entries,
+            "bytes": self.bytes_in,
+            "dropped_chunks": self.dropped_chunks,
+            "files": list(self.files),
+        }
+
+    # --- hot path (event loop) ---
+
+    def _append(self, line: str) -> None:
+        with self._buf_lock:
+            self._buf.append(line)
+            self._buf_bytes += len(line)
+        self.entries += 1
+        metrics.JOURNAL_ENTRIES.inc()
+        if self._buf_bytes >= self.chunk_bytes or time.monotonic() - self._last_flush >= self.flush_s:
+            self._flush()
+
+    def _take_buf(self) -> bytes:
+        # Llamar con _buf_lock tomado
+        data = "".join(self._buf).encode("utf-8")
+        self._buf.clear()
+        self._buf_bytes = 0
+        return data
+
+    def _put(self, chunks: queue.Queue[bytes | None], data: bytes) -> None:
+        try:
+            chunks.put_nowait(data)
+            self.bytes_in += len(data)
+        except queue.Full:
+            self._drop()
+
+    def _drop(self) -> None:
+        self.dropped_chunks += 1
+        metrics.JOURNAL_DROPPED_CHUNKS.inc()
+
+    def _flush(self) -> None:
+        self._last_flush = time.monotonic()
+        with self._buf_lock:
+            if not self._buf:
+                return
+            data = self._take_buf()
+            # Bajo el mismo lock que stop() usa para desenganchar la cola
+            if self._queue is None:
+                # Sin escritor (p. ej. un record que corre con stop()): se descarta, no se acumula
+                self._drop()
+                return
+            self._put(self._queue, data)
+
+    def record(self, kind: str, ts_ms: int | None = None, boat: str | None = None, **fields: Any) -> None:
+        if not self.active:
+            return
+        entry: dict[str, Any] = {"ts_ms": ts_ms or int(time.time() * 1000), "kind": kind}
+        if boat is not None:
+            entry["boat"] = boat
+        entry.update(fields)
+        self._append(json.dumps(entry, separators=(",", ":"), default=str) + "\n")
+
+    def record_rx(self, char: str, raw: bytes, ts_ms: int, boat: str | None = None, path: str | None = None) -> None:
+        if not self.active:
+            return
+        extra = {"path": path} if path else {}
+        self.record(
+            "ble_rx",
+            ts_ms,
+            boat,
+            chan=RX_CHAN_NAMES.get(char, char),
+            raw_b64=base64.b64encode(raw).decode("ascii"),
+            raw_len=len(raw),
+            **extra,
+        )
+
+    def record_event(self, event: dict[str, Any], boat: str | None = None) -> None:
+        """Decoded telemetry as `ble_parsed` (other hub events are left to the dashboard)."""
+        if not self.active:
+            return
+        chan = PARSED_CHANS.get(str(event.get("type")))
+        if chan is None:
+            return
+        parsed = {k: v for k, v in event.items() if k not in ("type", "_trace")}
+        self.record("ble_parsed", event.get("ts_ms"), boat, chan=chan, parsed=parsed)
+
+    def record_dashboard(self, state: dict[str, Any], boat: str | None = None) -> None:
+        """State snapshot, throttled to `dashboard_hz` per boat (the hub broadcasts far more often)."""
+        if not self.active:
+            return
+        now = time.monotonic()
+        if now - self._last_dashboard.get(boat, float("-inf")) < self.dashboard_interval_s:
+            return
+        self._last_dashboard[boat] = now
+        self.record("dashboard", None, boat, state=state)
+
+    # --- writer thread ---
+
+    def _segment_path(self, started_ts_ms: int, segment: int) -> Path:
+        started = datetime.fromtimestamp(started_ts_ms / 1000, tz=timezone.utc)
+        # Con milisegundos: un start/stop/start en el mismo segundo no pisa el segmento anterior
+        stamp = f"{started:%Y-%m-%dT%H-%M-%S}-{started_ts_ms % 1000:03d}Z"
+        suffix = {"gzip": ".ndjson.gz", "zstd": ".ndjson.zst", "none": ".ndjson"}[self.compression]
+        assert self.directory is not None
+        return self.directory / f"vakaroslive_journal_{stamp}_{segment:03d}{suffix}"
+
+    def _open(self, path: Path) -> tuple[BinaryIO, BinaryIO]:
+        raw = open(path, "wb")
+        if self.compression == "gzip":
+            return raw, gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6)  # type: ignore[return-value]
+        if self.compression == "zstd":
+            return raw, zstandard.ZstdCompressor(level=3).stream_writer(raw)
+        return raw, raw
+
+    def _writer(self, chunks: queue.Queue[bytes | None], started_ts_ms: int) -> None:
+        assert self.directory is not None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        segment = 0
+        raw: BinaryIO | None = None
+        out: BinaryIO | None = None
+        written = 0
+
+        def close() -> None:
+            if out is not None and raw is not None:
+                if out is not raw:
+                    out.close()
+                raw.close()
+
+        try:
+            while True:
+                data = chunks.get()
+                if data is None:
+                    break
+                if out is None or written >= self.rotate_bytes:
+                    close()
+                    path = self._segment_path(started_ts_ms, segment)
+                    raw, out = self._open(path)
+                    self.files.append(str(path))
+                    meta = {
+                        "ts_ms": int(time.time() * 1000),
+                        "kind": "meta",
+                        "started_ts_ms": started_ts_ms,
+                        "segment": segment,
+                    }
+                    out.write((json.dumps(meta) + "\n").encode("utf-8"))
+                    segment += 1
+                    written = 0
+                out.write(data)
+                # Sync flush por chunk: si el proceso muere, el segmento se puede leer hasta aquí
+                out.flush()
+                written += len(data)
+        except Exception as exc:
+            _logger.warning("Journal: error de escritura: %s", exc)
+        finally:
+            close()
+
+
+JOURNAL = SessionJournal()
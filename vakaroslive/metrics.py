@@ -0,0 +1,348 @@
+"""Minimal Prometheus-style metrics (text exposition format 0.0.4).
+
+Metric objects are module-level and cheap: the hot path only bumps ints/floats in
+pre-existing slots. Children for known label values should be resolved once with
+`labels(...)` and kept by the caller; single-label metrics are keyed by the plain
+string so dynamic lookups (e.g. by event type) do not build tuples.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+import time
+from typing import Any, Callable
+
+_LATENCY_BUCKETS_S = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+)
+
+
+def _fmt_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ("_buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self._buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self._buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._children: dict[Any, Any] = {}
+        if not labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> Any:
+        key: Any = values[0] if len(values) == 1 else values
+        child = self._children.get(key)
+        if child is None:
+            child = self._new_child()
+            self._children[key] = child
+        return child
+
+    def remove(self, *values: str) -> None:
+        key: Any = values[0] if len(values) == 1 else values
+        self._children.pop(key, None)
+
+    def _label_values(self, key: Any) -> tuple[str, ...]:
+        return key if isinstance(key, tuple) else (key,)
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._children[()].inc(amount)
+
+    def snapshot(self) -> dict[Any, float]:
+        return {k: c.value for k, c in self._children.items()}
+
+    def render(self) -> list[str]:
+        return [
+            f"{self.name}{_fmt_labels(self.labelnames, self._label_values(k))} {_fmt_value(c.value)}"
+            for k, c in list(self._children.items())
+        ]
+
+
+class Gauge(_Metric):
+    """Gauge whose value is set explicitly or read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] = (),
+        callback: Callable[[], float] | None = None,
+    ) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.callback = callback
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def set(self, value: float) -> None:
+        self._children[()].value = value
+
+    def render(self) -> list[str]:
+        if self.callback is not None:
+            try:
+                return [f"{self.name} {_fmt_value(float(self.callback()))}"]
+            except Exception:
+                return []
+        return [
+            f"{self.name}{_fmt_labels(self.labelnames, self._label_values(k))} {_fmt_value(c.value)}"
+            for k, c in list(self._children.items())
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = _LATENCY_BUCKETS_S,
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help_text, labelnames)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._children[()].observe(value)
+
+    def render(self) -> list[str]:
+        lines: list[str] = []
+        for key, child in list(self._children.items()):
+            values = self._label_values(key)
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += n
+                le = f'le="{_fmt_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_fmt_labels(self.labelnames, values, le)} {cumulative}"
+                )
+            lines.append(
+                f"{self.name}_sum{_fmt_labels(self.labelnames, values)} {_fmt_value(child.sum)}"
+            )
+            lines.append(f"{self.name}_count{_fmt_labels(self.labelnames, values)} {child.count}")
+        return lines
+
+
+class RateGauge:
+    """Per-second rate of a counter, computed between consecutive scrapes."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, source: Counter) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = source.labelnames
+        self._source = source
+        self._last_ts: float | None = None
+        self._last: dict[Any, float] = {}
+
+    def render(self) -> list[str]:
+        now = time.monotonic()
+        current = self._source.snapshot()
+        lines: list[str] = []
+        if self._last_ts is not None and now > self._last_ts:
+            dt = now - self._last_ts
+            for key, value in current.items():
+                rate = (value - self._last.get(key, 0.0)) / dt
+                values = key if isinstance(key, tuple) else (key,)
+                lines.append(
+                    f"{self.name}{_fmt_labels(self.labelnames, values)} {_fmt_value(round(rate, 3))}"
+                )
+        self._last_ts = now
+        self._last = current
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: list[Any] = []
+
+    def register(self, metric: Any) -> Any:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        out: list[str] = []
+        for metric in self._metrics:
+            out.append(f"# HELP {metric.name} {metric.help}")
+            out.append(f"# TYPE {metric.name} {metric.kind}")
+            out.extend(metric.render())
+        return "\n".join(out) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+_TRACKED_QUEUES: list[Any] = []
+
+
+def track_queue(queue: Any) -> None:
+    """Adds a queue (anything with `qsize()`) to the depth gauge."""
+    if queue not in _TRACKED_QUEUES:
+        _TRACKED_QUEUES.append(queue)
+
+
+QUEUE_DEPTH = REGISTRY.register(
+    Gauge(
+        "vakaroslive_event_queue_depth",
+        "Events waiting in the ingestion queue(s).",
+        callback=lambda: sum(q.qsize() for q in _TRACKED_QUEUES),
+    )
+)
+QUEUE_DROPS = REGISTRY.register(
+    Counter(
+        "vakaroslive_event_queue_dropped_total",
+        "Events dropped because the ingestion queue was full.",
+        ("type",),
+    )
+)
+QUEUE_COALESCED = REGISTRY.register(
+    Counter(
+        "vakaroslive_event_queue_coalesced_total",
+        "Telemetry samples superseded by a newer one of the same type while queued.",
+        ("type",),
+    )
+)
+EVENTS = REGISTRY.register(
+    Counter("vakaroslive_events_total", "Events processed by the hub.", ("type",))
+)
+EVENTS_RATE = REGISTRY.register(
+    RateGauge("vakaroslive_events_per_second", "Hub events per second since last scrape.", EVENTS)
+)
+BLE_PACKETS = REGISTRY.register(
+    Counter(
+        "vakaroslive_ble_packets_total",
+        "Raw BLE packets received per characteristic and path (notify/poll).",
+        ("char", "path"),
+    )
+)
+BLE_PACKETS_RATE = REGISTRY.register(
+    RateGauge(
+        "vakaroslive_ble_packets_per_second",
+        "BLE packets per second since last scrape.",
+        BLE_PACKETS,
+    )
+)
+BLE_DUPLICATES = REGISTRY.register(
+    Counter(
+        "vakaroslive_ble_duplicates_total",
+        "Packets suppressed because notify and poll delivered the same sample.",
+        ("char",),
+    )
+)
+JOURNAL_ENTRIES = REGISTRY.register(
+    Counter("vakaroslive_journal_entries_total", "Entries written to the server-side session journal.")
+)
+JOURNAL_DROPPED_CHUNKS = REGISTRY.register(
+    Counter(
+        "vakaroslive_journal_dropped_chunks_total",
+        "Journal chunks dropped because the writer thread fell behind.",
+    )
+)
+DECODE_SECONDS = REGISTRY.register(
+    Histogram("vakaroslive_decode_seconds", "Time to decode one BLE packet.", ("char",))
+)
+APPLY_SECONDS = REGISTRY.register(
+    Histogram("vakaroslive_apply_seconds", "Time to apply one event to AtlasState.")
+)
+BROADCAST_SECONDS = REGISTRY.register(
+    Histogram("vakaroslive_broadcast_seconds", "Time to encode and fan out one frame.")
+)
+CLIENTS = REGISTRY.register(
+    Gauge("vakaroslive_clients", "Connected stream clients.", ("transport",))
+)
+CLIENT_SEND_LAG = REGISTRY.register(
+    Gauge(
+        "vakaroslive_client_send_lag_seconds",
+        "Delay between frame encoding and the last completed send, per client.",
+        ("client",),
+    )
+)
+BLE_CONNECTS = REGISTRY.register(
+    Counter("vakaroslive_ble_connects_total", "Successful BLE connections.")
+)
+BLE_DISCONNECTS = REGISTRY.register(
+    Counter("vakaroslive_ble_disconnects_total", "BLE disconnections after a connection.")
+)
+BLE_RECONNECT_SECONDS = REGISTRY.register(
+    Histogram(
+        "vakaroslive_ble_reconnect_seconds",
+        "Time from a BLE drop to the next successful connection.",
+        buckets=(0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 12.0, 20.0, 30.0, 60.0, 120.0),
+    )
+)
+BLE_CONNECT_ERRORS = REGISTRY.register(
+    Counter("vakaroslive_ble_connect_errors_total", "Failed BLE connection attempts.")
+)
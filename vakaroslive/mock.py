@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass
+import math
+import random
+import struct
+import threading
+import time
+from typing import Any
+
+from .handoff import PacketHandoff
+from .ingest import IngestQueue
+from .journal import JOURNAL
+
+_M_PER_DEG_LAT = 111_320.0
+_KNOTS_TO_MPS = 0.514444
+
+
+def encode_telemetry_main(
+    lat: float,
+    lon: float,
+    heading_deg: float,
+    *,
+    field_4: float = 0.0,
+    field_5: float = 0.0,
+    sog_mps: float = 0.0,
+    cog_deg: float = 0.0,
+) -> bytes:
+    """36-byte main packet laid out as `parse_telemetry_main` expects (0x02/0x0A + 7x f32)."""
+    head = bytes([0x02, 0x0A]) + bytes(6)
+    return head + struct.pack(
+        "<fffffff", lat, lon, heading_deg, field_4, field_5, sog_mps, cog_deg
+    )
+
+
+def encode_telemetry_compact(heading_deg: float, field_2: int = 0) -> bytes:
+    """6-byte compact packet (0xFE, heading x10 as u16, field_2 as u16)."""
+    heading_raw = int(round((heading_deg % 360.0) * 10.0))
+    return bytes([0xFE, 0x01]) + struct.pack("<HH", heading_raw, field_2 & 0xFFFF)
+
+
+def encode_start_line(a_lat: float, a_lon: float, b_lat: float, b_lon: float) -> bytes:
+    """Command packet carrying two GPS points, as found by `extract_start_line_candidates`."""
+    return bytes([0x03, 0x01, 0x00, 0x00]) + struct.pack("<ffff", a_lat, a_lon, b_lat, b_lon)
+
+
+@dataclass
+class LoadProfile:
+    """Packet mix and timing of one simulated Atlas 2."""
+
+    rate_hz: float = 5.0  # paquetes main/s
+    compact_hz: float = 1.0
+    burst: int = 1  # paquetes seguidos por evento de conexión
+    start_line_every_s: float = 10.0  # 0 = sin paquetes de comando
+    tack_every_s: float = 30.0
+    gap_every_s: float = 0.0  # media entre cortes de datos (0 = sin cortes)
+    gap_s: float = 3.0
+    speed_kn: float = 6.0
+    seed: int | None = None
+
+
+class BoatSim:
+    """Close-hauled boat that tacks through ~90° at a bounded turn rate."""
+
+    def __init__(self, boat_index: int, profile: LoadProfile, rng: random.Random) -> None:
+        self.lat = 42.230282 + 0.0005 * boat_index
+        self.lon = -8.732954
+        self.heading = (37.0 * boat_index + 45.0) % 360.0
+        self.target = self.heading
+        self.speed_mps = profile.speed_kn * _KNOTS_TO_MPS
+        self._profile = profile
+        self._rng = rng
+        self._next_tack_s = self._tack_interval()
+        self._t = 0.0
+
+    def _tack_interval(self) -> float:
+        every = self._profile.tack_every_s
+        return every * self._rng.uniform(0.7, 1.3) if every > 0 else math.inf
+
+    def step(self, dt: float) -> None:
+        self._t += dt
+        if self._t >= self._next_tack_s:
+            self._t = 0.0
+            self._next_tack_s = self._tack_interval()
+            self.target = (self.target + self._rng.choice((-90.0, 90.0))) % 360.0
+        diff = (self.target - self.heading + 540.0) % 360.0 - 180.0
+        max_turn = 25.0 * dt
+        self.heading = (self.heading + max(-max_turn, min(max_turn, diff))) % 360.0
+        # Pierde velocidad al virar y la recupera poco a poco.
+        base = self._profile.speed_kn * _KNOTS_TO_MPS
+        turning = abs(diff) > 5.0
+        goal = base * (0.6 if turning else 1.0) * self._rng.uniform(0.97, 1.03)
+        self.speed_mps += (goal - self.speed_mps) * min(1.0, dt)
+        dist = self.speed_mps * dt
+        rad = math.radians(self.heading)
+        self.lat += dist * math.cos(rad) / _M_PER_DEG_LAT
+        self.lon += dist * math.sin(rad) / (_M_PER_DEG_LAT * math.cos(math.radians(self.lat)))
+
+    def main_packet(self) -> bytes:
+        noise = self._rng.uniform(-2.0, 2.0)
+        return encode_telemetry_main(
+            self.lat,
+            self.lon,
+            (self.heading + noise) % 360.0,
+            sog_mps=self.speed_mps,
+            cog_deg=self.heading,
+        )
+
+    def compact_packet(self) -> bytes:
+        return encode_telemetry_compact(self.heading, int(self.speed_mps * 100))
+
+    def start_line_packet(self) -> bytes:
+        # Línea de ~150 m a barlovento de la salida del barco 0.
+        a_lat, a_lon = 42.2320, -8.7345
+        return encode_start_line(a_lat, a_lon, a_lat, a_lon + 150.0 / 82_500.0)
+
+
+class PacketLoadGenerator:
+    """Synthesizes raw Atlas 2 packets and feeds them through the real parse path.
+
+    A producer thread (like bleak's callback threads) pushes main/compact/cmd1 bytes into
+    a `PacketHandoff`; the loop side decodes them with `ble_atlas2.decode_notify` and
+    enqueues the events, exactly as the BLE client does. Gaps pause delivery while the
+    boat keeps moving; bursts deliver `burst` packets back-to-back.
+    """
+
+    def __init__(self, boat_index: int = 0, profile: LoadProfile | None = None) -> None:
+        self.boat_index = boat_index
+        self.profile = profile or LoadProfile()
+        if self.profile.rate_hz <= 0:
+            raise ValueError("rate_hz must be > 0")
+        self._stop = threading.Event()
+        self.sent: dict[str, int] = {"main": 0, "compact": 0, "cmd1": 0}
+        self.gaps = 0
+        self.handoff: PacketHandoff | None = None
+
+    def _produce(self, handoff: PacketHandoff) -> None:
+        p = self.profile
+        rng = random.Random(p.seed if p.seed is not None else self.boat_index)
+        sim = BoatSim(self.boat_index, p, rng)
+        burst = max(1, int(p.burst))
+        interval = burst / p.rate_hz
+        compact_interval = 1.0 / p.compact_hz if p.compact_hz > 0 else math.inf
+        gap_until = 0.0
+        next_gap = rng.expovariate(1.0 / p.gap_every_s) if p.gap_every_s > 0 else math.inf
+
+        start = time.perf_counter()
+        last = start
+        next_t = start
+        next_compact = start
+        next_line = start + p.start_line_every_s if p.start_line_every_s > 0 else math.inf
+        while not self._stop.is_set():
+            now = time.perf_counter()
+            dt = (now - last) / burst
+            for _ in range(burst):
+                sim.step(dt)
+            last = now
+            if now - start >= next_gap:
+                gap_until = now + p.gap_s
+                next_gap = (now - start) + p.gap_s + rng.expovariate(1.0 / p.gap_every_s)
+                self.gaps += 1
+            if now >= gap_until:
+                ts_ms = int(time.time() * 1000)
+                for _ in range(burst):
+                    handoff.push("main", sim.main_packet(), ts_ms)
+                    self.sent["main"] += 1
+                if now >= next_compact:
+                    next_compact += compact_interval
+                    handoff.push("compact", sim.compact_packet(), ts_ms)
+                    self.sent["compact"] += 1
+                if now >= next_line:
+                    next_line += p.start_line_every_s
+                    handoff.push("cmd1", sim.start_line_packet(), ts_ms)
+                    self.sent["cmd1"] += 1
+            else:
+                next_compact = max(next_compact, now)
+                next_line = max(next_line, now)
+            next_t += interval
+            delay = next_t - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            elif delay < -1.0:
+                # Muy por detrás (GIL/CPU saturada): no recuperar a ráfagas.
+                next_t = time.perf_counter()
+
+    async def run(
+        self,
+        queue: IngestQueue | asyncio.Queue[dict[str, Any]],
+        device_address: str = "mock",
+        boat_id: str | None = None,
+    ) -> None:
+        from .ble_atlas2 import decode_notify
+
+        loop = asyncio.get_running_loop()
+
+        def process(char: str, raw: bytes, ts_ms: int, cb_ns: int) -> None:
+            JOURNAL.record_rx(char, raw, ts_ms, boat_id)
+            for event in decode_notify(char, raw, ts_ms, cb_ns):
+                queue.put_nowait(event)
+
+        handoff = PacketHandoff(loop, process)
+        handoff.bind_loop_thread()
+        self.handoff = handoff
+        queue.put_nowait(
+            {
+                "type": "status",
+                "ts_ms": int(time.time() * 1000),
+                "connected": True,
+                "device_address": device_address,
+                "error": None,
+            }
+        )
+        self._stop.clear()
+        thread = threading.Thread(
+            target=self._produce, args=(handoff,), name=f"mock-{device_address}", daemon=True
+        )
+        thread.start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            self._stop.set()
+            thread.join(timeout=1.0)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "sent": dict(self.sent),
+            "gaps": self.gaps,
+            "handoff": self.handoff.stats() if self.handoff is not None else None,
+        }
+
+
+async def mock_telemetry(
+    queue: IngestQueue | asyncio.Queue[dict[str, Any]],
+    *,
+    boat_index: int = 0,
+    profile: LoadProfile | None = None,
+    device_address: str = "mock",
+    boat_id: str | None = None,
+) -> None:
+    """Simulated Atlas 2 for `--mock`: raw packets through the real decoders."""
+    await PacketLoadGenerator(boat_index, profile).run(queue, device_address, boat_id)
+
+
+async def run_fleet_benchmark(
+    boats: int, seconds: float, profile: LoadProfile
+) -> dict[str, Any]:
+    """Runs N packet generators through their hubs plus one fleet subscriber."""
+    from .server import FleetHub, SseSubscriber, TelemetryHub
+
+    fleet = FleetHub()
+    queues: list[IngestQueue] = []
+    generators: list[PacketLoadGenerator] = []
+    for i in range(boats):
+        queue = IngestQueue()
+        queues.append(queue)
+        generators.append(PacketLoadGenerator(i, profile))
+        fleet.add(TelemetryHub(queue, boat_id=f"boat{i + 1}"))
+    sink = SseSubscriber(fields=None, min_interval_s=0.0)
+    fleet.register_sse(sink)
+
+    tasks: list[asyncio.Task[Any]] = []
+    for hub, queue, gen in zip(fleet.hubs.values(), queues, generators):
+        tasks.append(asyncio.create_task(hub.run(), name=f"hub-{hub.boat_id}"))
+        tasks.append(
+            asyncio.create_task(
+                gen.run(queue, device_address=f"mock-{hub.boat_id}"),
+                name=f"mock-{hub.boat_id}",
+            )
+        )
+
+    t0 = time.perf_counter()
+    cpu0 = time.process_time()
+    await asyncio.sleep(seconds)
+    elapsed = time.perf_counter() - t0
+    cpu = time.process_time() - cpu0
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    sent = sum(sum(g.sent.values()) for g in generators)
+    processed = sum(hub.events_processed for hub in fleet.hubs.values())
+    coalesced = sum(sum(q.coalesced.values()) for q in queues)
+    wakeups = sum(g.handoff.wakeups for g in generators if g.handoff is not None)
+    return {
+        "boats": boats,
+        "seconds": round(elapsed, 3),
+        "offered_pps": round(boats * profile.rate_hz, 1),
+        "packets_sent": sent,
+        "packets_per_s": round(sent / elapsed, 1),
+        "events_processed": processed,
+        "events_per_s": round(processed / elapsed, 1),
+        "coalesced": coalesced,
+        "loop_wakeups": wakeups,
+        "gaps": sum(g.gaps for g in generators),
+        "cpu_s": round(cpu, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m vakaroslive.mock",
+        description="Generador de carga a nivel de paquete (main/compact/cmd) para la pasarela.",
+    )
+    parser.add_argument("--boats", default=6, type=int)
+    parser.add_argument("--seconds", default=5.0, type=float)
+    parser.add_argument("--rate-hz", default=50.0, type=float, help="Paquetes main/s por barco.")
+    parser.add_argument("--compact-hz", default=1.0, type=float)
+    parser.add_argument("--burst", default=1, type=int, help="Paquetes seguidos por ráfaga.")
+    parser.add_argument("--tack-every", default=30.0, type=float, help="Segundos entre viradas.")
+    parser.add_argument(
+        "--gap-every", default=0.0, type=float, help="Media de segundos entre cortes (0 = no)."
+    )
+    parser.add_argument("--gap-s", default=3.0, type=float, help="Duración de cada corte.")
+    parser.add_argument(
+        "--start-line-every", default=10.0, type=float, help="Segundos entre paquetes de línea."
+    )
+    args = parser.parse_args()
+    profile = LoadProfile(
+        rate_hz=args.rate_hz,
+        compact_hz=args.compact_hz,
+        burst=args.burst,
+        start_line_every_s=args.start_line_every,
+        tack_every_s=args.tack_every,
+        gap_every_s=args.gap_every,
+        gap_s=args.gap_s,
+    )
+    result = asyncio.run(run_fleet_benchmark(args.boats, args.seconds, profile))
+    for key, value in result.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
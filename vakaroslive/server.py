@@ -9,21 +9,170 @@ from typing import Any
 
 from aiohttp import WSMsgType, web
 
+from . import metrics
 from .ble_atlas2 import Atlas2BleClient
+from .ingest import IngestQueue
+from .journal import JOURNAL, JournalStopping
 from .state import GeoPoint, RaceMarks
+from .static_cache import StaticAssetCache
+from .tracing import TRACER
+
+STATIC_ASSETS = [
+    "app.js",
+    "styles.css",
+    "manifest.webmanifest",
+    "sw.js",
+    "icon.svg",
+    "leaflet.css",
+    "leaflet.js",
+]
+
+
+class SseSubscriber:
+    """Read-only `/api/stream` client: keeps only the latest pending frame per boat."""
+
+    def __init__(self, fields: frozenset[str] | None, min_interval_s: float) -> None:
+        self.fields = fields
+        self.min_interval_s = min_interval_s
+        self.pending: dict[str | None, tuple[int, str]] = {}
+        self.wakeup = asyncio.Event()
+
+    def offer(self, frame_id: int, data: str, boat: str | None = None) -> None:
+        self.pending[boat] = (frame_id, data)
+        self.wakeup.set()
+
+    def take(self) -> list[tuple[int, str]]:
+        frames = sorted(self.pending.values())
+        self.pending.clear()
+        self.wakeup.clear()
+        return frames
+
+
+def _filter_payload(payload: dict[str, Any], fields: frozenset[str]) -> dict[str, Any]:
+    state = payload.get("state")
+    if not isinstance(state, dict):
+        return payload
+    out: dict[str, Any] = {"type": payload.get("type"), "state": {k: state.get(k) for k in fields}}
+    if "boat" in payload:
+        out["boat"] = payload["boat"]
+    return out
+
+
+class FrameFanout:
+    """WebSocket clients and SSE subscribers fed with already-encoded frames."""
+
+    def __init__(self) -> None:
+        self._clients: set[web.WebSocketResponse] = set()
+        self._client_names: dict[web.WebSocketResponse, str] = {}
+        self._sse_clients: set[SseSubscriber] = set()
+        self._frame_id = 0
+        self._ws_clients_gauge = metrics.CLIENTS.labels("ws")
+        self._sse_clients_gauge = metrics.CLIENTS.labels("sse")
+
+    def __len__(self) -> int:
+        return len(self._clients) + len(self._sse_clients)
+
+    def next_frame_id(self) -> int:
+        self._frame_id += 1
+        return self._frame_id
+
+    def _offer_sse(self, payload: dict[str, Any], data: str) -> None:
+        if not self._sse_clients:
+            return
+        frame_id = self.next_frame_id()
+        boat = payload.get("boat")
+        # Un mismo filtro de campos se codifica una sola vez por frame.
+        encoded: dict[frozenset[str], str] = {}
+        for sub in self._sse_clients:
+            if sub.fields is None:
+                sub.offer(frame_id, data, boat)
+                continue
+            sub_data = encoded.get(sub.fields)
+            if sub_data is None:
+                sub_data = json.dumps(_filter_payload(payload, sub.fields))
+                encoded[sub.fields] = sub_data
+            sub.offer(frame_id, sub_data, boat)
+
+    async def publish(
+        self,
+        payload: dict[str, Any],
+        data: str,
+        t0: float,
+        trace: dict[str, int] | None = None,
+    ) -> None:
+        self._offer_sse(payload, data)
+        to_remove: list[web.WebSocketResponse] = []
+        for ws in self._clients:
+            if ws.closed:
+                to_remove.append(ws)
+                continue
+            try:
+                await ws.send_str(data)
+            except Exception:
+                to_remove.append(ws)
+                continue
+            if trace is not None:
+                TRACER.sent(trace, time.monotonic_ns())
+            name = self._client_names.get(ws)
+            if name is not None:
+                metrics.CLIENT_SEND_LAG.labels(name).value = time.perf_counter() - t0
+        for ws in to_remove:
+            self.unregister(ws)
+
+    async def register(
+        self,
+        ws: web.WebSocketResponse,
+        initial: list[dict[str, Any]],
+        name: str | None = None,
+    ) -> None:
+        self._clients.add(ws)
+        self._client_names[ws] = name or f"ws-{id(ws):x}"
+        self._ws_clients_gauge.inc()
+        for payload in initial:
+            await ws.send_json(payload)
+
+    def unregister(self, ws: web.WebSocketResponse) -> None:
+        if ws not in self._clients:
+            return
+        self._clients.discard(ws)
+        self._ws_clients_gauge.inc(-1)
+        name = self._client_names.pop(ws, None)
+        if name is not None:
+            metrics.CLIENT_SEND_LAG.remove(name)
+
+    def register_sse(self, sub: SseSubscriber, initial: list[dict[str, Any]]) -> None:
+        self._sse_clients.add(sub)
+        self._sse_clients_gauge.inc()
+        for payload in initial:
+            if sub.fields is not None:
+                payload = _filter_payload(payload, sub.fields)
+            sub.offer(self.next_frame_id(), json.dumps(payload), payload.get("boat"))
+
+    def unregister_sse(self, sub: SseSubscriber) -> None:
+        if sub not in self._sse_clients:
+            return
+        self._sse_clients.discard(sub)
+        self._sse_clients_gauge.inc(-1)
 
 
 class TelemetryHub:
     def __init__(
-        self, event_queue: asyncio.Queue[dict[str, Any]], persist_path: Path | None = None
+        self,
+        event_queue: asyncio.Queue[dict[str, Any]] | IngestQueue,
+        persist_path: Path | None = None,
+        boat_id: str | None = None,
     ) -> None:
         self._event_queue = event_queue
         from .state import AtlasState
 
         self.state = AtlasState()
-        self._clients: set[web.WebSocketResponse] = set()
+        self.boat_id = boat_id
+        self.fanout = FrameFanout()
+        self.fleet: FleetHub | None = None
+        self.events_processed = 0
         self._persist_path = persist_path
         self._logger = logging.getLogger(__name__)
+        metrics.track_queue(event_queue)
         self._load_persisted()
 
     def _load_persisted(self) -> None:
@@ -49,12 +198,23 @@ class TelemetryHub:
         except Exception:
             return
 
-    async def broadcast_state(self, event: dict[str, Any] | None) -> None:
-        await self.broadcast({"type": "state", "state": self.state.to_dict(), "event": event})
+    def state_payload(self, event: dict[str, Any] | None = None) -> dict[str, Any]:
+        payload: dict[str, Any] = {"type": "state", "state": self.state.to_dict(), "event": event}
+        if self.boat_id is not None:
+            payload["boat"] = self.boat_id
+        return payload
+
+    async def broadcast_state(
+        self, event: dict[str, Any] | None, trace: dict[str, int] | None = None
+    ) -> None:
+        payload = self.state_payload(event)
+        JOURNAL.record_dashboard(payload["state"], self.boat_id)
+        await self.broadcast(payload, trace=trace)
 
     async def handle_command(self, cmd: dict[str, Any]) -> None:
         ctype = cmd.get("type")
         now_ms = int(time.time() * 1000)
+        JOURNAL.record("command", now_ms, self.boat_id, cmd=cmd)
 
         def point_from_current() -> GeoPoint | None:
             if self.state.latitude is None or self.state.longitude is None:
@@ -191,33 +351,106 @@ class TelemetryHub:
         self._save_persisted()
         await self.broadcast_state(event={"type": "cmd", "cmd": ctype, "ts_ms": now_ms})
 
-    async def broadcast(self, payload: dict[str, Any]) -> None:
-        to_remove: list[web.WebSocketResponse] = []
-        for ws in self._clients:
-            if ws.closed:
-                to_remove.append(ws)
-                continue
-            try:
-                await ws.send_json(payload)
-            except Exception:
-                to_remove.append(ws)
-        for ws in to_remove:
-            self._clients.discard(ws)
+    async def broadcast(
+        self, payload: dict[str, Any], trace: dict[str, int] | None = None
+    ) -> None:
+        t0 = time.perf_counter()
+        # Se codifica una sola vez por frame, compartido por /ws, /api/stream y la flota.
+        data = json.dumps(payload)
+        if trace is not None:
+            trace["encoded"] = time.monotonic_ns()
+            TRACER.finish_hub(trace)
+        await self.fanout.publish(payload, data, t0, trace)
+        if self.fleet is not None:
+            await self.fleet.fanout.publish(payload, data, t0, trace)
+        metrics.BROADCAST_SECONDS.observe(time.perf_counter() - t0)
 
     async def run(self) -> None:
         while True:
             event = await self._event_queue.get()
+            trace: dict[str, int] | None = event.pop("_trace", None)
+            if trace is not None:
+                trace["dequeued"] = time.monotonic_ns()
+            metrics.EVENTS.labels(str(event.get("type"))).inc()
+            t0 = time.perf_counter()
             marks_changed = self.state.apply_event(event)
+            metrics.APPLY_SECONDS.observe(time.perf_counter() - t0)
+            if trace is not None:
+                trace["applied"] = time.monotonic_ns()
+            JOURNAL.record_event(event, self.boat_id)
+            self.events_processed += 1
             if marks_changed:
                 self._save_persisted()
-            await self.broadcast_state(event=event)
+            await self.broadcast_state(event=event, trace=trace)
 
-    async def register(self, ws: web.WebSocketResponse) -> None:
-        self._clients.add(ws)
-        await ws.send_json({"type": "state", "state": self.state.to_dict(), "event": None})
+    async def register(self, ws: web.WebSocketResponse, name: str | None = None) -> None:
+        await self.fanout.register(ws, [self.state_payload()], name=name)
 
     def unregister(self, ws: web.WebSocketResponse) -> None:
-        self._clients.discard(ws)
+        self.fanout.unregister(ws)
+
+    def register_sse(self, sub: SseSubscriber) -> None:
+        self.fanout.register_sse(sub, [self.state_payload()])
+
+    def unregister_sse(self, sub: SseSubscriber) -> None:
+        self.fanout.unregister_sse(sub)
+
+
+class FleetHub:
+    """Several boats (one TelemetryHub/AtlasState each) served by a single bridge.
+
+    Per-boat clients attach to the boat's own hub (`/ws?boat=<id>`); fleet clients
+    (`/ws?boat=*`) receive every boat's frames, tagged with `boat`, reusing the string
+    each hub already encoded.
+    """
+
+    def __init__(self) -> None:
+        self.hubs: dict[str, TelemetryHub] = {}
+        self.fanout = FrameFanout()
+
+    def add(self, hub: TelemetryHub) -> None:
+        if hub.boat_id is None:
+            raise ValueError("Fleet hubs need a boat_id")
+        if hub.boat_id in self.hubs:
+            raise ValueError(f"Duplicate boat id: {hub.boat_id}")
+        hub.fleet = self
+        self.hubs[hub.boat_id] = hub
+
+    def get(self, boat_id: str) -> TelemetryHub | None:
+        return self.hubs.get(boat_id)
+
+    def initial_payloads(self) -> list[dict[str, Any]]:
+        return [hub.state_payload() for hub in self.hubs.values()]
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "boats": [
+                {
+                    "boat": boat_id,
+                    "connected": hub.state.connected,
+                    "device_address": hub.state.device_address,
+                    "latitude": hub.state.latitude,
+                    "longitude": hub.state.longitude,
+                    "heading_deg": hub.state.heading_deg,
+                    "sog_knots": hub.state.sog_knots,
+                    "last_event_ts_ms": hub.state.last_event_ts_ms,
+                    "events_processed": hub.events_processed,
+                }
+                for boat_id, hub in self.hubs.items()
+            ]
+        }
+
+    async def register(self, ws: web.WebSocketResponse, name: str | None = None) -> None:
+        await self.fanout.register(ws, self.initial_payloads(), name=name)
+
+    def unregister(self, ws: web.WebSocketResponse) -> None:
+        self.fanout.unregister(ws)
+
+    def register_sse(self, sub: SseSubscriber) -> None:
+        self.fanout.register_sse(sub, self.initial_payloads())
+
+    def unregister_sse(self, sub: SseSubscriber) -> None:
+        self.fanout.unregister_sse(sub)
 
 
 class LooseWebSocketResponse(web.WebSocketResponse):
@@ -225,23 +458,43 @@ class LooseWebSocketResponse(web.WebSocketResponse):
         return True
 
 
-def create_app(hub: TelemetryHub, ble: Atlas2BleClient) -> web.Application:
+def create_app(
+    hub: TelemetryHub, ble: Atlas2BleClient, fleet: FleetHub | None = None
+) -> web.Application:
+    """`hub` is the default boat; with `fleet`, `?boat=<id>` selects another one and
+    `?boat=*` selects the aggregated fleet stream."""
     app = web.Application()
     static_dir = Path(__file__).with_name("static")
-
-    async def index(_: web.Request) -> web.FileResponse:
-        return web.FileResponse(static_dir / "index.html")
-
-    def _file_handler(filename: str):
-        async def handler(_: web.Request) -> web.FileResponse:
-            return web.FileResponse(static_dir / filename)
-
-        return handler
+    static_cache = StaticAssetCache(static_dir, STATIC_ASSETS)
+
+    def _target(request: web.Request) -> TelemetryHub | FleetHub:
+        boat = request.query.get("boat")
+        if fleet is None or not boat:
+            return hub
+        if boat == "*":
+            return fleet
+        target = fleet.get(boat)
+        if target is None:
+            raise web.HTTPNotFound(
+                text=json.dumps({"error": "unknown_boat", "boat": boat}),
+                content_type="application/json",
+            )
+        return target
+
+    async def _dispatch_command(target: TelemetryHub | FleetHub, payload: dict[str, Any]) -> None:
+        if isinstance(target, FleetHub):
+            boat_hub = target.get(str(payload.get("boat") or ""))
+            if boat_hub is None:
+                return
+            target = boat_hub
+        await target.handle_command(payload)
 
     async def ws_handler(request: web.Request) -> web.StreamResponse:
+        target = _target(request)
         ws = LooseWebSocketResponse(heartbeat=20)
         await ws.prepare(request)
-        await hub.register(ws)
+        peer = request.remote or "?"
+        await target.register(ws, name=f"{peer}#{id(ws):x}")
 
         try:
             async for msg in ws:
@@ -252,13 +505,76 @@ def create_app(hub: TelemetryHub, ble: Atlas2BleClient) -> web.Application:
                 except Exception:
                     continue
                 if isinstance(payload, dict):
-                    await hub.handle_command(payload)
+                    await _dispatch_command(target, payload)
         finally:
-            hub.unregister(ws)
+            target.unregister(ws)
         return ws
 
-    async def api_state(_: web.Request) -> web.Response:
-        return web.json_response(hub.state.to_dict())
+    async def sse_handler(request: web.Request) -> web.StreamResponse:
+        target = _target(request)
+        fields_raw = request.query.get("fields") or ""
+        fields = frozenset(f.strip() for f in fields_raw.split(",") if f.strip()) or None
+        try:
+            max_hz = float(request.query.get("max_hz") or 0.0)
+        except ValueError:
+            return web.json_response({"error": "invalid_max_hz"}, status=400)
+        min_interval_s = 1.0 / max_hz if max_hz > 0.0 else 0.0
+
+        resp = web.StreamResponse(
+            headers={
+                "Content-Type": "text/event-stream",
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no",
+            }
+        )
+        await resp.prepare(request)
+        sub = SseSubscriber(fields=fields, min_interval_s=min_interval_s)
+        target.register_sse(sub)
+        try:
+            await resp.write(b"retry: 2000\n\n")
+            while True:
+                try:
+                    await asyncio.wait_for(sub.wakeup.wait(), timeout=15.0)
+                except asyncio.TimeoutError:
+                    # Comentario keep-alive para proxies/túneles.
+                    await resp.write(b": ping\n\n")
+                    continue
+                for frame_id, data in sub.take():
+                    await resp.write(
+                        f"id: {frame_id}\nevent: state\ndata: {data}\n\n".encode("utf-8")
+                    )
+                if sub.min_interval_s > 0.0:
+                    await asyncio.sleep(sub.min_interval_s)
+        except ConnectionResetError:
+            pass
+        finally:
+            target.unregister_sse(sub)
+        return resp
+
+    async def metrics_handler(_: web.Request) -> web.Response:
+        return web.Response(
+            text=metrics.REGISTRY.render(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+    async def api_latency(request: web.Request) -> web.Response:
+        snapshot = TRACER.snapshot()
+        if request.query.get("reset") in {"1", "true"}:
+            TRACER.reset()
+        return web.json_response(snapshot)
+
+    async def api_state(request: web.Request) -> web.Response:
+        target = _target(request)
+        if isinstance(target, FleetHub):
+            return web.json_response(
+                {"boats": {boat_id: h.state.to_dict() for boat_id, h in target.hubs.items()}}
+            )
+        return web.json_response(target.state.to_dict())
+
+    async def api_fleet(_: web.Request) -> web.Response:
+        if fleet is None:
+            return web.json_response({"boats": []})
+        return web.json_response(fleet.summary())
 
     async def api_scan(request: web.Request) -> web.Response:
         timeout = float(request.query.get("timeout") or 6.0)
@@ -275,23 +591,47 @@ def create_app(hub: TelemetryHub, ble: Atlas2BleClient) -> web.Application:
             return web.json_response({"error": "invalid_json"}, status=400)
         if not isinstance(payload, dict):
             return web.json_response({"error": "invalid_payload"}, status=400)
-        await hub.handle_command(payload)
-        return web.json_response(hub.state.to_dict())
-
-    app.router.add_get("/", index)
-    for name in [
-        "app.js",
-        "styles.css",
-        "manifest.webmanifest",
-        "sw.js",
-        "icon.svg",
-        "leaflet.css",
-        "leaflet.js",
-    ]:
-        app.router.add_get(f"/{name}", _file_handler(name))
+        target = _target(request)
+        if isinstance(target, FleetHub):
+            return web.json_response({"error": "boat_required"}, status=400)
+        await target.handle_command(payload)
+        return web.json_response(target.state.to_dict())
+
+    async def api_record(request: web.Request) -> web.Response:
+        # GET: estado; POST {"action": "start"|"stop"} (o ?action=) controla el journal
+        if request.method == "GET":
+            return web.json_response(JOURNAL.status())
+        action = request.query.get("action")
+        if action is None:
+            try:
+                payload = await request.json()
+            except Exception:
+                return web.json_response({"error": "invalid_json"}, status=400)
+            action = payload.get("action") if isinstance(payload, dict) else None
+        if action == "start":
+            try:
+                return web.json_response(JOURNAL.start())
+            except JournalStopping as exc:
+                return web.json_response({"error": str(exc)}, status=409)
+            except RuntimeError as exc:
+                return web.json_response({"error": str(exc)}, status=503)
+        if action == "stop":
+            # stop() espera a que el escritor vacíe la cola (gzip): fuera del loop
+            return web.json_response(await asyncio.to_thread(JOURNAL.stop))
+        return web.json_response({"error": "invalid_action"}, status=400)
+
+    app.router.add_get("/", static_cache.handler("index.html"))
+    for name in STATIC_ASSETS:
+        app.router.add_get(f"/{name}", static_cache.handler(name))
     app.router.add_get("/ws", ws_handler)
     app.router.add_get("/api/state", api_state)
+    app.router.add_get("/api/stream", sse_handler)
+    app.router.add_get("/api/fleet", api_fleet)
+    app.router.add_get("/metrics", metrics_handler)
+    app.router.add_get("/api/latency", api_latency)
     app.router.add_get("/api/scan", api_scan)
     app.router.add_post("/api/cmd", api_cmd)
+    app.router.add_get("/api/record", api_record)
+    app.router.add_post("/api/record", api_record)
 
     return app
@@ -0,0 +1,462 @@
+from __future__ import annotations
+
+import argparse
+from array import array
+import base64
+import gzip
+import io
+import json
+import os
+import time
+from typing import Any, BinaryIO, Iterator
+
+import numpy as np
+
+try:
+    import zstandard  # type: ignore
+except Exception:  # pragma: no cover
+    zstandard = None  # type: ignore
+
+# Canales tal como los escribe el grabador del navegador (app.js)
+RX_CHANNELS = ("main", "compact", "command_1", "command_2")
+COLUMN_KINDS = ("ble_rx", "ble_parsed", "dashboard")
+COLUMNS_SUFFIX = ".columns"
+NDJSON_SUFFIXES = (".ndjson", ".ndjson.gz", ".ndjson.zst")
+
+_WS = " \t\r\n"
+_CHUNK = 1 << 20
+# Fin de un segmento comprimido que se está escribiendo o cuyo escritor murió
+_TRUNCATED_ERRORS: tuple[type[BaseException], ...] = (EOFError,) + (
+    (zstandard.ZstdError,) if zstandard is not None else ()
+)
+
+
+class SessionStream:
+    """Iterates the `entries` of a browser session JSON without loading the whole file.
+
+    The file is read in chunks and each entry is decoded with `raw_decode` as soon as
+    it is complete, so memory stays at one chunk plus one entry. Top-level keys other
+    than `entries` (i.e. `meta`) are collected into `self.meta` as they are passed;
+    `meta` is written first by the recorder, so it is available from the first entry.
+    A bare list of entries is accepted too, and so are server journals
+    (`.ndjson`, `.ndjson.gz`, `.ndjson.zst`, one entry per line, see
+    `vakaroslive.journal`), whose `meta` lines fill `self.meta`. A journal segment
+    that is still being written (or whose writer died) is read up to its last complete
+    line and `self.truncated` is set.
+
+    With `start_offset` (a byte offset from `iter_offsets`) reading starts directly at
+    that entry, inside the `entries` array.
+    """
+
+    def __init__(self, path: str, chunk_size: int = _CHUNK, start_offset: int | None = None) -> None:
+        self.path = path
+        self.chunk_size = int(chunk_size)
+        self.start_offset = start_offset
+        self.meta: dict[str, Any] = {}
+        self.extra: dict[str, Any] = {}
+        self.truncated = False
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for _, entry in self._iter(track=False):
+            yield entry
+
+    def iter_offsets(self) -> Iterator[tuple[int, dict[str, Any]]]:
+        """`(byte offset of the entry in the file, entry)`."""
+        return self._iter(track=True)
+
+    def _open_ndjson(self) -> BinaryIO:
+        if self.path.endswith(".gz"):
+            return gzip.open(self.path, "rb")  # type: ignore[return-value]
+        if self.path.endswith(".zst"):
+            if zstandard is None:
+                raise ValueError(f"{self.path}: hace falta `pip install zstandard`")
+            return zstandard.ZstdDecompressor().stream_reader(open(self.path, "rb"), closefd=True)
+        return open(self.path, "rb")
+
+    def _iter_ndjson(self, track: bool) -> Iterator[tuple[int, dict[str, Any]]]:
+        compressed = not self.path.endswith(".ndjson")
+        if compressed and (track or self.start_offset):
+            raise ValueError(f"{self.path}: los offsets solo valen para .ndjson sin comprimir")
+        with self._open_ndjson() as f:
+            offset = 0
+            if self.start_offset:
+                f.seek(self.start_offset)
+                offset = self.start_offset
+            lines = iter(f) if compressed else iter(f.readline, b"")
+            while True:
+                try:
+                    line = next(lines)
+                except StopIteration:
+                    break
+                except _TRUNCATED_ERRORS:
+                    self.truncated = True
+                    break
+                line_offset = offset
+                offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    if line.endswith(b"\n"):
+                        raise
+                    # Última línea a medio escribir
+                    self.truncated = True
+                    break
+                if not isinstance(entry, dict):
+                    continue
+                if entry.get("kind") == "meta":
+                    if not self.meta:
+                        self.meta = entry
+                    continue
+                yield line_offset, entry
+
+    def _iter(self, track: bool) -> Iterator[tuple[int, dict[str, Any]]]:
+        if any(self.path.endswith(ext) for ext in NDJSON_SUFFIXES):
+            yield from self._iter_ndjson(track)
+            return
+        decoder = json.JSONDecoder()
+        with open(self.path, "rb") as raw_file:
+            if self.start_offset:
+                raw_file.seek(self.start_offset)
+            f = io.TextIOWrapper(raw_file, encoding="utf-8")
+            buf = ""
+            pos = 0
+            eof = False
+            # Offset en bytes de buf[mark]; solo se avanza si track (cuesta un encode si no es ASCII)
+            mark = 0
+            mark_bytes = self.start_offset or 0
+
+            def byte_offset(p: int) -> int:
+                nonlocal mark, mark_bytes
+                if p > mark:
+                    text = buf[mark:p]
+                    mark_bytes += len(text) if text.isascii() else len(text.encode("utf-8"))
+                    mark = p
+                return mark_bytes
+
+            def fill() -> bool:
+                nonlocal buf, pos, eof, mark
+                if eof:
+                    return False
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    eof = True
+                    return False
+                if track:
+                    byte_offset(pos)
+                    mark = 0
+                buf = buf[pos:] + chunk
+                pos = 0
+                return True
+
+            def skip_ws() -> str:
+                nonlocal pos
+                while True:
+                    while pos < len(buf) and buf[pos] in _WS:
+                        pos += 1
+                    if pos < len(buf):
+                        return buf[pos]
+                    if not fill():
+                        return ""
+
+            def value() -> Any:
+                nonlocal pos
+                skip_ws()
+                while True:
+                    try:
+                        obj, end = decoder.raw_decode(buf, pos)
+                    except json.JSONDecodeError:
+                        if fill():
+                            continue
+                        raise
+                    # Un número al final del buffer puede estar cortado
+                    if end == len(buf) and not eof and fill():
+                        continue
+                    pos = end
+                    return obj
+
+            def expect(char: str) -> None:
+                nonlocal pos
+                if skip_ws() != char:
+                    raise ValueError(f"{self.path}: se esperaba {char!r} en la posición {pos}")
+                pos += 1
+
+            def entries(opened: bool = False) -> Iterator[tuple[int, dict[str, Any]]]:
+                nonlocal pos
+                if not opened:
+                    expect("[")
+                    if skip_ws() == "]":
+                        pos += 1
+                        return
+                while True:
+                    skip_ws()
+                    offset = byte_offset(pos) if track else -1
+                    entry = value()
+                    if isinstance(entry, dict):
+                        yield offset, entry
+                    sep = skip_ws()
+                    pos += 1
+                    if sep == "]":
+                        return
+                    if sep != ",":
+                        raise ValueError(f"{self.path}: separador inesperado {sep!r}")
+
+            if self.start_offset:
+                yield from entries(opened=True)
+                return
+            head = skip_ws()
+            if head == "[":
+                yield from entries()
+                return
+            expect("{")
+            if skip_ws() == "}":
+                return
+            while True:
+                key = value()
+                expect(":")
+                if key == "entries":
+                    yield from entries()
+                elif key == "meta":
+                    meta = value()
+                    self.meta = meta if isinstance(meta, dict) else {}
+                else:
+                    self.extra[key] = value()
+                sep = skip_ws()
+                pos += 1
+                if sep == "}":
+                    return
+                if sep != ",":
+                    raise ValueError(f"{self.path}: separador inesperado {sep!r}")
+
+
+def _number(value: Any) -> float | None:
+    if isinstance(value, bool):
+        return 1.0 if value else 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+
+def _flatten(obj: dict[str, Any], prefix: str = "", depth: int = 2) -> Iterator[tuple[str, float]]:
+    """Numeric/bool leaves of `obj` as `("a.b", value)`; strings and lists are skipped."""
+    for key, value in obj.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            if depth > 1:
+                yield from _flatten(value, f"{name}.", depth - 1)
+            continue
+        number = _number(value)
+        if number is not None:
+            yield name, number
+
+
+class _Columns:
+    """Float columns that appear on the fly; rows missing a column are NaN."""
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.ts_ms = array("q")
+        self.chan = array("b")
+        self.values: dict[str, array] = {}
+
+    def add(self, ts_ms: int, chan: int, fields: Iterator[tuple[str, float]]) -> None:
+        self.ts_ms.append(ts_ms)
+        self.chan.append(chan)
+        for name, number in fields:
+            column = self.values.get(name)
+            if column is None:
+                column = self.values[name] = array("d", [float("nan")]) * self.n
+            if len(column) > self.n:
+                continue  # clave repetida en la misma fila
+            column.append(number)
+        self.n += 1
+        for column in self.values.values():
+            if len(column) < self.n:
+                column.append(float("nan"))
+
+    def arrays(self) -> dict[str, np.ndarray]:
+        out = {
+            "ts_ms": np.frombuffer(self.ts_ms, dtype=np.int64).copy(),
+            "chan": np.frombuffer(self.chan, dtype=np.int8).copy(),
+        }
+        for name, column in self.values.items():
+            out[f"f:{name}"] = np.frombuffer(column, dtype=np.float64).copy()
+        return out
+
+
+def _chan_code(chans: list[str], chan: Any) -> int:
+    chan = str(chan)
+    try:
+        return chans.index(chan)
+    except ValueError:
+        chans.append(chan)
+        return len(chans) - 1
+
+
+def columns_dir(path: str) -> str:
+    base = path[:-5] if path.endswith(".json") else path
+    return base + COLUMNS_SUFFIX
+
+
+def convert_session(path: str, out_dir: str | None = None, chunk_size: int = _CHUNK) -> dict[str, Any]:
+    """Converts a session JSON into `<out_dir>/<kind>.npz` plus `meta.json`, in one pass.
+
+    - `ble_rx`: `ts_ms`, `chan` (código; nombres en `chans`), `raw_len`, `raw_offset` and
+      `payload`, the decoded bytes of every packet concatenated (uint8).
+    - `ble_parsed` / `dashboard`: `ts_ms`, `chan` and one float64 `f:<campo>` column per
+      numeric or bool field (`parsed.*`, `state.*` flattened one level, e.g.
+      `f:marks.start_line_follow_atlas`); NaN where the entry lacks it.
+    """
+    out_dir = out_dir or columns_dir(path)
+    t0 = time.perf_counter()
+    stream = SessionStream(path, chunk_size=chunk_size)
+    chans: list[str] = list(RX_CHANNELS)
+
+    rx_ts = array("q")
+    rx_chan = array("b")
+    rx_len = array("l")
+    payload = bytearray()
+    parsed = _Columns()
+    dashboard = _Columns()
+    other: dict[str, int] = {}
+
+    for entry in stream:
+        kind = entry.get("kind")
+        ts_ms = int(entry.get("ts_ms") or 0)
+        if kind == "ble_rx":
+            raw_b64 = entry.get("raw_b64")
+            raw = base64.b64decode(raw_b64) if raw_b64 else b""
+            rx_ts.append(ts_ms)
+            rx_chan.append(_chan_code(chans, entry.get("chan")))
+            rx_len.append(len(raw))
+            payload += raw
+        elif kind == "ble_parsed":
+            fields = entry.get("parsed")
+            parsed.add(
+                ts_ms,
+                _chan_code(chans, entry.get("chan")),
+                _flatten(fields) if isinstance(fields, dict) else iter(()),
+            )
+        elif kind == "dashboard":
+            state = entry.get("state")
+            dashboard.add(ts_ms, -1, _flatten(state) if isinstance(state, dict) else iter(()))
+        else:
+            other[str(kind)] = other.get(str(kind), 0) + 1
+
+    os.makedirs(out_dir, exist_ok=True)
+    lengths = np.frombuffer(rx_len, dtype=rx_len.typecode).astype(np.int32)
+    offsets = np.zeros(len(lengths), dtype=np.int64)
+    if len(lengths) > 1:
+        np.cumsum(lengths[:-1], out=offsets[1:])
+    chan_names = np.array(chans, dtype="U16")
+    np.savez(
+        os.path.join(out_dir, "ble_rx.npz"),
+        ts_ms=np.frombuffer(rx_ts, dtype=np.int64),
+        chan=np.frombuffer(rx_chan, dtype=np.int8),
+        raw_len=lengths,
+        raw_offset=offsets,
+        payload=np.frombuffer(bytes(payload), dtype=np.uint8),
+        chans=chan_names,
+    )
+    np.savez(os.path.join(out_dir, "ble_parsed.npz"), chans=chan_names, **parsed.arrays())
+    np.savez(os.path.join(out_dir, "dashboard.npz"), **dashboard.arrays())
+
+    summary = {
+        "source": os.path.abspath(path),
+        "source_mtime": os.path.getmtime(path),
+        "source_size": os.path.getsize(path),
+        "meta": stream.meta,
+        "rows": {"ble_rx": len(rx_ts), "ble_parsed": parsed.n, "dashboard": dashboard.n},
+        "other_kinds": other,
+        "convert_s": round(time.perf_counter() - t0, 3),
+    }
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return {"out_dir": out_dir, **summary}
+
+
+def _is_fresh(path: str, out_dir: str) -> bool:
+    try:
+        with open(os.path.join(out_dir, "meta.json"), "r", encoding="utf-8") as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return info.get("source_mtime") == os.path.getmtime(path) and info.get("source_size") == os.path.getsize(path)
+
+
+def load_session_columns(path: str, kinds: tuple[str, ...] = COLUMN_KINDS) -> dict[str, Any]:
+    """NumPy columns of a session: `{"meta": {...}, "ble_rx": {...}, ...}`.
+
+    `path` may be the columns directory or the original `.json`; in the latter case
+    the sibling `.columns` directory is (re)built first when missing or stale. Float
+    columns have their `f:` prefix stripped (`out["ble_parsed"]["heading_deg"]`) unless
+    that clashes with an entry column: `parsed.ts_ms` stays `"f:ts_ms"`.
+    """
+    if os.path.isdir(path):
+        out_dir = path
+    else:
+        out_dir = columns_dir(path)
+        if not _is_fresh(path, out_dir):
+            convert_session(path, out_dir)
+    with open(os.path.join(out_dir, "meta.json"), "r", encoding="utf-8") as f:
+        out: dict[str, Any] = {"meta": json.load(f)}
+    for kind in kinds:
+        with np.load(os.path.join(out_dir, f"{kind}.npz"), allow_pickle=False) as data:
+            columns = {name: data[name] for name in data.files if not name.startswith("f:")}
+            for name in data.files:
+                if name.startswith("f:"):
+                    bare = name[2:]
+                    columns[name if bare in columns else bare] = data[name]
+            out[kind] = columns
+    return out
+
+
+def rx_packets(ble_rx: dict[str, np.ndarray], chan: str, length: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """`(ts_ms, packets)` of one channel as a 2-D uint8 array (one row per packet).
+
+    Only packets of `length` bytes are stacked; by default, the most common length.
+    """
+    chans = list(ble_rx["chans"])
+    if chan not in chans:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 0), dtype=np.uint8)
+    mask = ble_rx["chan"] == chans.index(chan)
+    lengths = ble_rx["raw_len"]
+    if length is None:
+        if not mask.any():
+            return np.zeros(0, dtype=np.int64), np.zeros((0, 0), dtype=np.uint8)
+        length = int(np.bincount(lengths[mask]).argmax())
+    mask &= lengths == length
+    starts = ble_rx["raw_offset"][mask]
+    rows = ble_rx["payload"][starts[:, None] + np.arange(length)]
+    return ble_rx["ts_ms"][mask], rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m vakaroslive.session",
+        description="Convierte sesiones grabadas en el navegador (JSON) a columnas NumPy (.npz por tipo).",
+    )
+    parser.add_argument("paths", nargs="+", help="Ficheros vakaroslive_session_*.json.")
+    parser.add_argument("--out-dir", default=None, help="Directorio de salida (solo con un fichero).")
+    parser.add_argument("--force", action="store_true", help="Reconvierte aunque esté al día.")
+    args = parser.parse_args()
+    if args.out_dir and len(args.paths) > 1:
+        parser.error("--out-dir solo admite un fichero")
+    for path in args.paths:
+        out_dir = args.out_dir or columns_dir(path)
+        if not args.force and _is_fresh(path, out_dir):
+            print(f"{path}: al día ({out_dir})")
+            continue
+        result = convert_session(path, out_dir)
+        t0 = time.perf_counter()
+        load_session_columns(out_dir)
+        load_s = time.perf_counter() - t0
+        print(
+            f"{path} -> {out_dir}: {result['rows']} en {result['convert_s']}s "
+            f"(carga {load_s * 1000:.1f} ms)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Iterator
+
+import numpy as np
+
+from .session import SessionStream
+
+INDEX_SUFFIX = ".tsidx.npz"
+BLOCK_ENTRIES = 256
+INDEX_VERSION = 1
+
+
+def index_path(path: str) -> str:
+    base = path[:-5] if path.endswith(".json") else path
+    return base + INDEX_SUFFIX
+
+
+class SessionIndex:
+    """Sidecar time index of a session JSON.
+
+    Per entry: `ts_ms` and a `kind` code. Per block of `BLOCK_ENTRIES` entries: the
+    byte offset of its first entry and the block's min/max `ts_ms` (the recorder does
+    not guarantee order). A window query binary-searches the running max of the blocks,
+    keeps those whose range overlaps, and parses only those blocks from their offset.
+    """
+
+    def __init__(self, path: str, arrays: dict[str, np.ndarray]) -> None:
+        self.path = path
+        self.ts_ms = arrays["ts_ms"]
+        self.kind = arrays["kind"]
+        self.kinds = [str(k) for k in arrays["kinds"]]
+        self.block_offset = arrays["block_offset"]
+        self.block_min = arrays["block_min"]
+        self.block_max = arrays["block_max"]
+        self._block_cummax = np.maximum.accumulate(self.block_max) if len(self.block_max) else self.block_max
+
+    @classmethod
+    def build(cls, path: str, out_path: str | None = None) -> SessionIndex:
+        """One streaming pass over `path`; the index is saved next to it."""
+        kinds: list[str] = []
+        ts = []
+        codes = []
+        offsets = []
+        for i, (offset, entry) in enumerate(SessionStream(path).iter_offsets()):
+            if i % BLOCK_ENTRIES == 0:
+                offsets.append(offset)
+            value = entry.get("ts_ms")
+            ts.append(int(value) if isinstance(value, (int, float)) else -1)
+            kind = str(entry.get("kind"))
+            try:
+                codes.append(kinds.index(kind))
+            except ValueError:
+                kinds.append(kind)
+                codes.append(len(kinds) - 1)
+
+        ts_ms = np.array(ts, dtype=np.int64)
+        n_blocks = len(offsets)
+        starts = np.arange(n_blocks, dtype=np.int64) * BLOCK_ENTRIES
+        # Las entradas sin ts_ms (-1) no cuentan para el rango del bloque
+        valid = np.where(ts_ms >= 0, ts_ms, np.iinfo(np.int64).max)
+        block_min = np.minimum.reduceat(valid, starts) if n_blocks else np.zeros(0, dtype=np.int64)
+        block_max = np.maximum.reduceat(ts_ms, starts) if n_blocks else np.zeros(0, dtype=np.int64)
+        arrays = {
+            "ts_ms": ts_ms,
+            "kind": np.array(codes, dtype=np.int8),
+            "kinds": np.array(kinds, dtype="U32"),
+            "block_offset": np.array(offsets, dtype=np.int64),
+            "block_min": block_min,
+            "block_max": block_max,
+            "source_mtime": np.array(os.path.getmtime(path)),
+            "source_size": np.array(os.path.getsize(path), dtype=np.int64),
+            "version": np.array(INDEX_VERSION),
+        }
+        np.savez(out_path or index_path(path), **arrays)
+        return cls(path, arrays)
+
+    @classmethod
+    def load(cls, path: str, rebuild: bool = True) -> SessionIndex:
+        """Loads the sidecar of `path`, rebuilding it if missing or stale."""
+        idx_path = index_path(path)
+        try:
+            with np.load(idx_path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+            fresh = (
+                int(arrays["version"]) == INDEX_VERSION
+                and float(arrays["source_mtime"]) == os.path.getmtime(path)
+                and int(arrays["source_size"]) == os.path.getsize(path)
+            )
+        except (OSError, KeyError, ValueError):
+            fresh = False
+        if not fresh:
+            if not rebuild:
+                raise FileNotFoundError(f"Índice ausente o desfasado: {idx_path}")
+            return cls.build(path, idx_path)
+        return cls(path, arrays)
+
+    def rows(self, t0_ms: int, t1_ms: int, kinds: list[str] | None = None) -> np.ndarray:
+        """Entry numbers with `t0_ms <= ts_ms <= t1_ms` (and kind in `kinds`), in file order."""
+        first = int(np.searchsorted(self._block_cummax, t0_ms, side="left"))
+        blocks = first + np.flatnonzero(self.block_min[first:] <= t1_ms)
+        if not len(blocks):
+            return np.zeros(0, dtype=np.int64)
+        candidates = np.concatenate([
+            np.arange(b * BLOCK_ENTRIES, min((b + 1) * BLOCK_ENTRIES, len(self.ts_ms)))
+            for b in blocks
+        ])
+        ts = self.ts_ms[candidates]
+        mask = (ts >= t0_ms) & (ts <= t1_ms)
+        if kinds is not None:
+            codes = [self.kinds.index(k) for k in kinds if k in self.kinds]
+            mask &= np.isin(self.kind[candidates], codes)
+        return candidates[mask]
+
+    def read_rows(self, rows: np.ndarray) -> Iterator[tuple[int, dict[str, Any]]]:
+        """`(row, entry)` for the given sorted rows, parsing only from their blocks."""
+        rows = np.asarray(rows, dtype=np.int64)
+        i = 0
+        while i < len(rows):
+            block = int(rows[i]) // BLOCK_ENTRIES
+            row = block * BLOCK_ENTRIES
+            wanted = rows[(rows >= row) & (rows < row + BLOCK_ENTRIES)]
+            last = int(wanted[-1])
+            want = set(int(r) for r in wanted)
+            stream = SessionStream(self.path, chunk_size=64 * 1024, start_offset=int(self.block_offset[block]))
+            for entry in stream:
+                if row in want:
+                    yield row, entry
+                if row >= last:
+                    break
+                row += 1
+            i += len(wanted)
+
+    def window(self, t0_ms: int, t1_ms: int, kinds: list[str] | None = None) -> list[dict[str, Any]]:
+        """Entries between `t0_ms` and `t1_ms` (inclusive), optionally only `kinds`."""
+        return [entry for _, entry in self.read_rows(self.rows(t0_ms, t1_ms, kinds))]
+
+
+def query_window(path: str, t0_ms: int, t1_ms: int, kinds: list[str] | None = None) -> list[dict[str, Any]]:
+    return SessionIndex.load(path).window(t0_ms, t1_ms, kinds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m vakaroslive.session_index",
+        description="Índice temporal (ts_ms → offset) de sesiones grabadas y consultas por ventana.",
+    )
+    parser.add_argument("paths", nargs="+", help="Ficheros vakaroslive_session_*.json.")
+    parser.add_argument("--t0", type=int, default=None, help="Inicio de la ventana (ts_ms).")
+    parser.add_argument("--t1", type=int, default=None, help="Fin de la ventana (ts_ms).")
+    parser.add_argument("--around", type=int, default=None, help="Centro de la ventana (ts_ms); usa --span.")
+    parser.add_argument("--span", type=int, default=500, help="± ms alrededor de --around.")
+    parser.add_argument("--kinds", default=None, help="Tipos separados por coma (ble_rx,dashboard...).")
+    parser.add_argument("--rebuild", action="store_true", help="Regenera el índice aunque esté al día.")
+    args = parser.parse_args()
+
+    kinds = [k for k in args.kinds.split(",") if k] if args.kinds else None
+    for path in args.paths:
+        t = time.perf_counter()
+        index = SessionIndex.build(path) if args.rebuild else SessionIndex.load(path)
+        load_s = time.perf_counter() - t
+        if args.around is not None:
+            t0, t1 = args.around - args.span, args.around + args.span
+        elif args.t0 is not None or args.t1 is not None:
+            t0 = args.t0 if args.t0 is not None else int(index.block_min.min())
+            t1 = args.t1 if args.t1 is not None else int(index.block_max.max())
+        else:
+            print(
+                f"{path}: {len(index.ts_ms)} entradas, {len(index.block_offset)} bloques, "
+                f"kinds={index.kinds} ({load_s * 1000:.1f} ms)"
+            )
+            continue
+        t = time.perf_counter()
+        entries = index.window(t0, t1, kinds)
+        query_s = time.perf_counter() - t
+        for entry in entries:
+            print(json.dumps(entry, ensure_ascii=False))
+        print(f"# {path}: {len(entries)} entradas en [{t0}, {t1}] ({query_s * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -120,6 +120,8 @@ class AtlasState:
     compact_raw_len: int | None = None
 
     last_error: str | None = None
+    last_reconnect_ms: int | None = None
+    acquisition: dict[str, Any] | None = None
 
     _fix_history: list[tuple[int, float, float]] = field(
         default_factory=list, repr=False
@@ -158,6 +160,8 @@ class AtlasState:
             "compact_field_2": self.compact_field_2,
             "compact_raw_len": self.compact_raw_len,
             "last_error": self.last_error,
+            "last_reconnect_ms": self.last_reconnect_ms,
+            "acquisition": self.acquisition,
             "marks": self.marks.to_dict(),
         }
 
@@ -439,12 +443,25 @@ class AtlasState:
         if etype == "atlas_start_line_candidates":
             return self._apply_atlas_start_line_candidates(event)
 
+        if etype == "acquisition":
+            self.acquisition = {
+                "mode": event.get("mode"),
+                "poll_interval_s": event.get("poll_interval_s"),
+                "notify_hz": event.get("notify_hz"),
+                "effective_hz": event.get("effective_hz"),
+            }
+            return False
+
         if etype == "status":
             self.connected = bool(event.get("connected"))
             self.device_address = event.get("device_address")
             self.last_error = event.get("error")
+            reconnect_ms = event.get("reconnect_ms")
+            if isinstance(reconnect_ms, int):
+                self.last_reconnect_ms = reconnect_ms
             if not self.connected:
                 self._fix_history.clear()
+                self.acquisition = None
                 self.sog_knots = None
                 self.cog_deg = None
                 self.heading_main_ts_ms = None
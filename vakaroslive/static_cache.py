@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import mimetypes
+from dataclasses import dataclass, field
+from pathlib import Path
+import re
+
+from aiohttp import web
+
+try:
+    import brotli
+except ModuleNotFoundError:  # pragma: no cover
+    brotli = None  # type: ignore[assignment]
+
+# Tipos que merece la pena comprimir (el SVG es texto; PNG/ICO ya vienen comprimidos).
+_COMPRESSIBLE_SUFFIXES = {".html", ".js", ".css", ".svg", ".webmanifest", ".json"}
+_MIN_COMPRESS_BYTES = 256
+
+_CACHE_REVALIDATE = "no-cache"
+_CACHE_IMMUTABLE = "public, max-age=31536000, immutable"
+
+_CONTENT_TYPES = {
+    ".js": "application/javascript",
+    ".css": "text/css",
+    ".html": "text/html",
+    ".svg": "image/svg+xml",
+    ".webmanifest": "application/manifest+json",
+}
+
+
+@dataclass(frozen=True)
+class _Variant:
+    body: bytes
+    etag: str
+    encoding: str | None
+
+
+@dataclass
+class StaticAsset:
+    name: str
+    content_type: str
+    digest: str
+    variants: dict[str, _Variant] = field(default_factory=dict)
+
+    @property
+    def version(self) -> str:
+        return self.digest[:12]
+
+    def etags(self) -> set[str]:
+        return {v.etag for v in self.variants.values()}
+
+
+def _parse_accept_encoding(header: str) -> set[str]:
+    accepted: set[str] = set()
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        params = params.replace(" ", "")
+        if params.startswith("q=") and params[2:] in {"0", "0.0", "0.00", "0.000"}:
+            continue
+        accepted.add(token)
+    return accepted
+
+
+def _parse_if_none_match(header: str) -> set[str]:
+    tags: set[str] = set()
+    for part in header.split(","):
+        tag = part.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag:
+            tags.add(tag)
+    return tags
+
+
+class StaticAssetCache:
+    """Static files held in memory with precompressed variants and strong ETags.
+
+    Everything is read (and gzip/brotli-compressed) once at startup; requests only pick
+    the best variant and answer `If-None-Match` with 304. `index.html` is rewritten so
+    that its local assets point to `?v=<hash>` URLs, which are served as immutable.
+    """
+
+    def __init__(self, static_dir: Path, names: list[str], index_name: str = "index.html") -> None:
+        self._assets: dict[str, StaticAsset] = {}
+        for name in names:
+            if name == index_name:
+                continue
+            self._assets[name] = self._build(name, (static_dir / name).read_bytes())
+        index_raw = (static_dir / index_name).read_text(encoding="utf-8")
+        self._assets[index_name] = self._build(
+            index_name, self._versioned_index(index_raw).encode("utf-8")
+        )
+
+    @staticmethod
+    def _content_type(name: str) -> str:
+        suffix = Path(name).suffix.lower()
+        if suffix in _CONTENT_TYPES:
+            return _CONTENT_TYPES[suffix]
+        guessed, _ = mimetypes.guess_type(name)
+        return guessed or "application/octet-stream"
+
+    def _build(self, name: str, raw: bytes) -> StaticAsset:
+        digest = hashlib.sha256(raw).hexdigest()
+        asset = StaticAsset(name=name, content_type=self._content_type(name), digest=digest)
+        tag = digest[:32]
+        asset.variants["identity"] = _Variant(body=raw, etag=f'"{tag}"', encoding=None)
+
+        if Path(name).suffix.lower() in _COMPRESSIBLE_SUFFIXES and len(raw) >= _MIN_COMPRESS_BYTES:
+            gz = gzip.compress(raw, compresslevel=9, mtime=0)
+            if len(gz) < len(raw):
+                asset.variants["gzip"] = _Variant(body=gz, etag=f'"{tag}-gz"', encoding="gzip")
+            if brotli is not None:
+                br = brotli.compress(raw, quality=11)
+                if len(br) < len(raw):
+                    asset.variants["br"] = _Variant(body=br, etag=f'"{tag}-br"', encoding="br")
+        return asset
+
+    def _versioned_index(self, html: str) -> str:
+        def repl(match: re.Match[str]) -> str:
+            attr, name = match.group(1), match.group(2)
+            asset = self._assets.get(name)
+            if asset is None:
+                return match.group(0)
+            return f'{attr}="./{name}?v={asset.version}"'
+
+        return re.sub(r'(src|href)="\./([\w.\-]+)(?:\?v=[^"]*)?"', repl, html)
+
+    def get(self, name: str) -> StaticAsset | None:
+        return self._assets.get(name)
+
+    def version(self, name: str) -> str | None:
+        asset = self._assets.get(name)
+        return asset.version if asset else None
+
+    def respond(self, request: web.Request, name: str) -> web.Response:
+        asset = self._assets.get(name)
+        if asset is None:
+            raise web.HTTPNotFound()
+
+        accepted = _parse_accept_encoding(request.headers.get("Accept-Encoding", ""))
+        variant = asset.variants["identity"]
+        for key in ("br", "gzip"):
+            if key in accepted and key in asset.variants:
+                variant = asset.variants[key]
+                break
+
+        immutable = request.query.get("v") == asset.version
+        headers = {
+            "ETag": variant.etag,
+            "Cache-Control": _CACHE_IMMUTABLE if immutable else _CACHE_REVALIDATE,
+            "Vary": "Accept-Encoding",
+        }
+
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match:
+            tags = _parse_if_none_match(if_none_match)
+            if "*" in tags or tags & asset.etags():
+                return web.Response(status=304, headers=headers)
+
+        if variant.encoding is not None:
+            headers["Content-Encoding"] = variant.encoding
+        return web.Response(body=variant.body, content_type=asset.content_type, headers=headers)
+
+    def handler(self, name: str):
+        async def handle(request: web.Request) -> web.Response:
+            return self.respond(request, name)
+
+        return handle
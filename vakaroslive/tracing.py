@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from collections import deque
+import time
+from typing import Any
+
+# Intervalos entre marcas consecutivas; "total" va del callback BLE al envío por cliente.
+STAGES = ("decode", "queue", "apply", "encode", "send", "total")
+_HIST_EDGES_MS = (0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0, 250.0, 1000.0)
+
+
+class LatencyTracer:
+    """Sampled end-to-end latency tracing from BLE callback to WebSocket send.
+
+    A sampled event carries `_trace` with `time.monotonic_ns()` stamps (`ble_cb`,
+    `decoded`, then the hub adds `dequeued`, `applied`, `encoded` and one `sent` per
+    client). Stage durations go into bounded rolling windows. With `sample_rate == 0`
+    the only cost on the hot path is one attribute check.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, window: int = 2048) -> None:
+        self._windows: dict[str, deque[int]] = {s: deque(maxlen=window) for s in STAGES}
+        self._counter = 0
+        self._every = 0
+        self.enabled = False
+        self.sample_rate = 0.0
+        self.configure(sample_rate)
+
+    def configure(self, sample_rate: float) -> None:
+        rate = max(0.0, min(1.0, float(sample_rate)))
+        self.sample_rate = rate
+        self.enabled = rate > 0.0
+        # Muestreo determinista (1 de cada N): sin RNG en el hot path.
+        self._every = max(1, round(1.0 / rate)) if rate > 0.0 else 0
+
+    def should_sample(self) -> bool:
+        if not self.enabled:
+            return False
+        self._counter += 1
+        if self._counter >= self._every:
+            self._counter = 0
+            return True
+        return False
+
+    def start(self, cb_ns: int) -> dict[str, int] | None:
+        """Returns a trace dict stamped at decode time, or None if not sampled."""
+        if not cb_ns or not self.should_sample():
+            return None
+        return {"ble_cb": cb_ns, "decoded": time.monotonic_ns()}
+
+    def observe(self, stage: str, duration_ns: int) -> None:
+        window = self._windows.get(stage)
+        if window is not None and duration_ns >= 0:
+            window.append(duration_ns)
+
+    def finish_hub(self, trace: dict[str, int]) -> None:
+        """Records the stages up to `encoded` once the hub has stamped them."""
+        ble_cb = trace.get("ble_cb")
+        decoded = trace.get("decoded")
+        dequeued = trace.get("dequeued")
+        applied = trace.get("applied")
+        encoded = trace.get("encoded")
+        if ble_cb and decoded:
+            self.observe("decode", decoded - ble_cb)
+        if decoded and dequeued:
+            self.observe("queue", dequeued - decoded)
+        if dequeued and applied:
+            self.observe("apply", applied - dequeued)
+        if applied and encoded:
+            self.observe("encode", encoded - applied)
+
+    def sent(self, trace: dict[str, int], sent_ns: int) -> None:
+        encoded = trace.get("encoded")
+        if encoded:
+            self.observe("send", sent_ns - encoded)
+        ble_cb = trace.get("ble_cb")
+        if ble_cb:
+            self.observe("total", sent_ns - ble_cb)
+
+    def snapshot(self) -> dict[str, Any]:
+        stages: dict[str, Any] = {}
+        for stage, window in self._windows.items():
+            values = sorted(window)
+            if not values:
+                stages[stage] = {"count": 0}
+                continue
+            n = len(values)
+
+            def pct(p: float) -> float:
+                return round(values[min(n - 1, int(p * (n - 1) + 0.5))] / 1e6, 3)
+
+            hist = [0] * (len(_HIST_EDGES_MS) + 1)
+            edge_i = 0
+            for v in values:
+                ms = v / 1e6
+                while edge_i < len(_HIST_EDGES_MS) and ms > _HIST_EDGES_MS[edge_i]:
+                    edge_i += 1
+                hist[edge_i] += 1
+            stages[stage] = {
+                "count": n,
+                "p50_ms": pct(0.50),
+                "p90_ms": pct(0.90),
+                "p99_ms": pct(0.99),
+                "max_ms": round(values[-1] / 1e6, 3),
+                "hist_le_ms": dict(
+                    zip([str(e) for e in _HIST_EDGES_MS] + ["+Inf"], hist)
+                ),
+            }
+        return {"sample_rate": self.sample_rate, "stages": stages}
+
+    def reset(self) -> None:
+        for window in self._windows.values():
+            window.clear()
+
+
+TRACER = LatencyTracer()